@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Per-job artifact storage and HTTP serving
+Every generation writes into outputs/jobs/<job_id>/ so concurrent users never share a file;
+artifacts are served with strong content ETags, If-None-Match 304s and byte ranges
+"""
+
+import os
+import re
+import uuid
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from fastapi.responses import Response, StreamingResponse
+
+JOBS_DIRNAME = 'jobs'
+ARTIFACT_CHUNK_BYTES = 256 * 1024
+ETAG_CACHE_ENTRIES = 1024
+
+JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    """The Range header asks for bytes past the end of the artifact"""
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+def job_dir(output_dir, job_id):
+    """outputs/jobs/<job_id>; raises ValueError for anything that isn't a job id (no path tricks)"""
+    if not JOB_ID.match(job_id or ''):
+        raise ValueError(f"Invalid job id: {job_id!r}")
+    return Path(output_dir) / JOBS_DIRNAME / job_id
+
+
+def artifact_path(output_dir, job_id, filename):
+    """Path of one artifact inside a job's directory, or None if the name or id is not acceptable"""
+    if not filename or filename != os.path.basename(filename) or filename.startswith('.'):
+        return None
+    try:
+        return job_dir(output_dir, job_id) / filename
+    except ValueError:
+        return None
+
+
+class _ETagCache:
+    """Content hashes of artifacts, reused while a file's size, mtime and inode are unchanged"""
+
+    def __init__(self, max_entries=ETAG_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (signature, etag)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        path = str(path)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == signature:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        etag = f'"{digest.hexdigest()}"'
+
+        with self._lock:
+            self._entries[path] = (signature, etag)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+
+_etags = _ETagCache()
+
+
+def file_etag(path):
+    """Strong ETag: a hash of the file's bytes (cached, so each artifact is hashed once)"""
+    return _etags.get(path)
+
+
+def etag_matches(header, etag):
+    """If-None-Match comparison (weak, per RFC 9110): '*' or any listed tag with the same opaque value"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single 'bytes=' range, None to serve the whole file.
+    Multi-range and malformed headers are ignored (a 200 is always a valid answer)."""
+    match = BYTE_RANGE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def iter_file_range(path, start, end, chunk_size=ARTIFACT_CHUNK_BYTES):
+    """Yield bytes start..end (inclusive) of a file in bounded chunks"""
+    remaining = end - start + 1
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def artifact_response(request, path, media_type, filename=None, headers=None, storage=None):
+    """Serve a stored artifact with ETag, If-None-Match -> 304, Range/If-Range -> 206 and HEAD support.
+    With a StorageJanitor, the access is recorded for LRU eviction and the file is pinned while it streams."""
+    path = str(path)
+    if storage is not None:
+        storage.touch(path)
+    etag = await asyncio.to_thread(file_etag, path)
+    size = os.path.getsize(path)
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, no-cache',  # Always revalidate; the ETag makes that a cheap 304
+        **(headers or {}),
+    }
+    if filename:
+        headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={key: value for key, value in headers.items()
+                                                  if key in ('ETag', 'Cache-Control')})
+
+    byte_range = None
+    if_range = request.headers.get('if-range')
+    if 'range' in request.headers and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(request.headers['range'], size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+
+    start, end = byte_range or (0, size - 1)
+    headers['Content-Length'] = str(max(0, end - start + 1))
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    if request.method == 'HEAD':
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    body = iter_file_range(path, start, end)
+    if storage is not None:
+        body = storage.hold(path, body)
+    return StreamingResponse(body, status_code=status_code,
+                             media_type=media_type, headers=headers)
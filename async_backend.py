@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Async Neuphonic Backend
+Same methods as NeuphonicBackend, safe to await from the FastAPI event loop
+"""
+
+import copy
+import time
+import asyncio
+import weakref
+
+from pyneuphonic import TTSConfig
+
+from wav_stream import WAV_HEADER_BYTES, patch_wav_sizes, wav_header
+from downloads import DownloadError, async_download_to_file
+from resilience import RetryBudget, async_call_with_retry, download_breaker, neuphonic_breaker
+from script_parser import iter_script, validate_script
+from batch_planner import BATCH_LONGFORM_MAX_CHARS, BATCH_SSE_MAX_CHARS, plan_requests, request_filename
+from routing import LONGFORM, SSE
+from resampler import resample_wav_file
+
+
+class AsyncNeuphonicBackend:
+    """Non-blocking front for a NeuphonicBackend.
+
+    SSE synthesis uses AsyncSSEClient and downloads use httpx, both natively async.
+    Work that only exists as a blocking call (the SDK's voices/longform endpoints,
+    cache file copies, combining WAVs) is explicitly offloaded with asyncio.to_thread.
+    State (outputs directory, segment cache, voice mapping, job poller) is shared
+    with the wrapped sync backend.
+    """
+
+    def __init__(self, backend):
+        self.sync = backend
+        self.client = backend.client
+        self.clients = backend.clients
+        self.output_dir = backend.output_dir
+        self._request_slots = weakref.WeakKeyDictionary()  # event loop -> Semaphore
+
+    def for_job(self, job_id):
+        """A view that writes every file into outputs/jobs/<job_id>/ (see NeuphonicBackend.for_job)"""
+        view = copy.copy(self)
+        view.sync = self.sync.for_job(job_id)
+        view.output_dir = view.sync.output_dir
+        return view
+
+    def _slots(self):
+        """Bound concurrent submit/download calls per event loop (not the time spent waiting on jobs)"""
+        loop = asyncio.get_running_loop()
+        slots = self._request_slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self.sync.max_parallel_requests)
+            self._request_slots[loop] = slots
+        return slots
+
+    async def list_voices(self, show_cloned_only=False):
+        """List all available voices"""
+        return await asyncio.to_thread(self.sync.list_voices, show_cloned_only)
+
+    async def clone_voice(self, voice_name, audio_file_path, voice_tags=None):
+        """Clone a voice from an audio sample"""
+        return await asyncio.to_thread(self.sync.clone_voice, voice_name, audio_file_path, voice_tags)
+
+    async def generate_preview_audio(self, voice_id, text, output_filename="preview.wav"):
+        """Voice preview: a cache file copy when warm, otherwise synthesized (see NeuphonicBackend.generate_preview_audio)"""
+        return await asyncio.to_thread(self.sync.generate_preview_audio, voice_id, text, output_filename)
+
+    async def generate_longform_audio(self, text, voice_name=None, voice_id=None, output_filename=None, speed=1.0):
+        """Generate high-quality audio using Longform Inference (48kHz) without blocking the event loop"""
+        try:
+            # Determine voice_id
+            if voice_id is None:
+                if voice_name is None:
+                    print("❌ Either voice_name or voice_id must be provided")
+                    return None
+
+                voice_id = self.sync.voice_mappings.get(voice_name)
+                if voice_id is None:
+                    print(f"❌ Voice '{voice_name}' not found in voice mapping")
+                    return None
+
+            print(f"🎵 Generating longform audio...")
+            print(f"   Text: {text[:100]}{'...' if len(text) > 100 else ''}")
+            print(f"   Voice ID: {voice_id}")
+
+            budget = RetryBudget()
+            async with self._slots():
+                # The SDK's LongformInference is synchronous
+                submitted = await asyncio.to_thread(self.sync._submit_longform_job, text, voice_id, budget)
+            if submitted is None:
+                return None
+            tts, job_id = submitted
+
+            print("⏳ Waiting for job completion...")
+            job_result = await asyncio.wrap_future(self.sync.longform_jobs.submit(tts, job_id, text, budget, voice_id=voice_id))
+
+            async with self._slots():
+                return await self._download_longform_audio(job_result['audio_url'], output_filename, budget)
+
+        except Exception as e:
+            print(f"❌ Longform audio generation failed: {str(e)}")
+            return None
+
+    async def _download_longform_audio(self, audio_url, output_filename=None, budget=None):
+        """Stream a finished longform job into the outputs directory over httpx"""
+        print(f"🎉 Audio generation completed!")
+
+        if not output_filename:
+            timestamp = int(time.time())
+            output_filename = f"longform_{timestamp}.wav"
+
+        output_path = self.output_dir / output_filename
+
+        print(f"⬇️ Downloading audio to {output_path}...")
+        try:
+            download = await async_call_with_retry(
+                async_download_to_file, audio_url, output_path,
+                breaker=download_breaker, budget=budget, description="Audio download"
+            )
+        except DownloadError as e:
+            print(f"❌ {e}")
+            return None
+
+        print(f"✅ High-quality 48kHz audio saved: {output_path} "
+              f"({download['bytes'] / 1024 / 1024:.1f} MB at {download['throughput_mb_s']:.1f} MB/s)")
+        return str(output_path)
+
+    async def generate_simple_audio(self, text, voice_name=None, voice_id=None, output_filename=None, speed=1.0):
+        """Generate audio using simple TTS (AsyncSSEClient), writing chunks to disk as they arrive"""
+        try:
+            voice_id = await asyncio.to_thread(self.sync._resolve_simple_voice_id, voice_name, voice_id)
+            if not voice_id:
+                return None
+
+            print(f"🎵 Generating simple audio...")
+            print(f"   Text: {text[:100]}{'...' if len(text) > 100 else ''}")
+            print(f"   Voice ID: {voice_id}")
+            print(f"   Speed: {speed}x")
+
+            sse = self.clients.async_sse()
+            tts_config = TTSConfig(
+                lang_code='en',
+                voice_id=voice_id,
+                sampling_rate=22050,  # Match docs exactly
+                speed=speed
+            )
+
+            if not output_filename:
+                timestamp = int(time.time())
+                output_filename = f"simple_{timestamp}.wav"
+
+            output_path = self.output_dir / output_filename
+
+            print("⏳ Processing audio...")
+
+            sse_stats = {'voice_id': voice_id, 'chars': len(text), 'first_chunk_seconds': None, 'bytes': 0}
+
+            async def stream_to_file(f):
+                # Chunk-sized local writes are cheap enough to do inline; the network wait is what must not block
+                f.seek(WAV_HEADER_BYTES)
+                f.truncate()
+                started = time.monotonic()
+                sse_stats['first_chunk_seconds'] = None
+                sse_stats['bytes'] = 0
+                async with self.clients.async_connection():
+                    async for chunk in sse.send(text, tts_config=tts_config):
+                        if hasattr(chunk, 'data') and chunk.data and hasattr(chunk.data, 'audio') and chunk.data.audio:
+                            if sse_stats['first_chunk_seconds'] is None:
+                                sse_stats['first_chunk_seconds'] = time.monotonic() - started
+                            f.write(chunk.data.audio)
+                            sse_stats['bytes'] += len(chunk.data.audio)
+                sse_stats['total_seconds'] = time.monotonic() - started
+
+            try:
+                with open(str(output_path), 'wb') as f:
+                    f.write(wav_header(22050, channels=1, sample_width=2))
+                    await async_call_with_retry(
+                        stream_to_file, f, breaker=neuphonic_breaker, budget=RetryBudget(), description="SSE synthesis"
+                    )
+                    patch_wav_sizes(f, sse_stats['bytes'])
+
+                if sse_stats['bytes']:
+                    self.sync._record_sse_stats(sse_stats)
+                    print(f"⏱️  First audio chunk after {sse_stats['first_chunk_seconds'] * 1000:.0f}ms, "
+                          f"{sse_stats['bytes'] / 1024:.0f} KB in {sse_stats['total_seconds']:.2f}s")
+                    print(f"✅ Audio saved to: {output_path}")
+                    return str(output_path)
+                else:
+                    output_path.unlink()
+                    print("❌ No audio chunks received")
+                    return None
+
+            except Exception as sse_error:
+                if output_path.exists():
+                    output_path.unlink()
+                print(f"❌ SSE generation error: {sse_error}")
+                print("💡 Tip: SSE works best with shorter texts (under 500 characters)")
+                return None
+
+        except Exception as e:
+            print(f"❌ Failed to generate simple audio: {str(e)}")
+            return None
+
+    def stream_simple_audio(self, text, voice_id, speed=1.0, sampling_rate=22050):
+        """Async generator of WAV bytes as SSE chunks arrive"""
+        return self.sync.stream_simple_audio(text, voice_id, speed=speed, sampling_rate=sampling_rate)
+
+    async def combine_audio_files_hq(self, audio_files, output_filename="combined_48khz.wav", sampling_rate=48000, postprocess=None):
+        """Combine segment files (disk-bound, so run off the event loop)"""
+        return await asyncio.to_thread(self.sync.combine_audio_files_hq, audio_files, output_filename, sampling_rate, postprocess)
+
+    async def _generate_segment_cached(self, text, voice_id, output_filename, speed=1.0, use_longform=False):
+        """Generate one script segment, reusing cached audio when the same line was synthesized before"""
+        cache_key = self.sync._segment_cache_key(text, voice_id, speed, use_longform)
+        cached_file = await asyncio.to_thread(self.sync._load_cached_segment, cache_key, output_filename)
+        if cached_file:
+            return cached_file, True
+
+        started = time.monotonic()
+        if use_longform:
+            # Longform generation - don't pass speed (not working currently)
+            audio_file = await self.generate_longform_audio(text=text, voice_id=voice_id, output_filename=output_filename)
+        else:
+            audio_file = await self.generate_simple_audio(text=text, voice_id=voice_id, output_filename=output_filename, speed=speed)
+        self.sync.segment_router.record(LONGFORM if use_longform else SSE, text, time.monotonic() - started, ok=bool(audio_file))
+
+        if audio_file:
+            await asyncio.to_thread(self.sync.segment_cache.put, cache_key, audio_file)
+        return audio_file, False
+
+    async def create_podcast_from_script(self, script_file, output_filename="podcast_48khz.wav", use_longform=False, speed_mapping=None, use_parallel=False, progress_callback=None, voice_mapping=None, use_hybrid=False, postprocess=None):
+        """Create a complete podcast from a script file; parallel longform and hybrid segments run as concurrent tasks"""
+        try:
+            if speed_mapping is None:
+                speed_mapping = {}
+
+            voice_mapping = self.sync._load_voice_mapping(voice_mapping)  # In memory, cheap enough inline
+            # Unmapped speakers and empty lines are rejected before any job is submitted
+            total = (await asyncio.to_thread(validate_script, script_file, voice_mapping))['segments']
+
+            # Short same-speaker lines share a request, overlong lines are split at sentences
+            max_chars = BATCH_LONGFORM_MAX_CHARS if use_longform or use_hybrid else BATCH_SSE_MAX_CHARS
+            requests = await asyncio.to_thread(lambda: list(plan_requests(iter_script(script_file), max_chars=max_chars)))
+
+            report_segment = progress_callback or (lambda index, state: None)
+            for i in range(total):
+                report_segment(i, 'queued')
+            report = self.sync._request_reporter(lambda index: requests[index], report_segment)
+
+            async def run_segment(request):
+                i, voice_name, text = request.index, request.speaker, request.text
+                voice_id = voice_mapping.get(voice_name)
+                if not voice_id:
+                    print(f"❌ Voice '{voice_name}' not found in mapping. Skipping segment {i+1}.")
+                    report(i, 'skipped')
+                    return None
+
+                report(i, 'running')
+                longform = use_longform
+                if use_hybrid:
+                    longform = self.sync.segment_router.choose(text) == LONGFORM
+                audio_file, cached = await self._generate_segment_cached(
+                    text=text,
+                    voice_id=voice_id,
+                    output_filename=request_filename(request),
+                    speed=speed_mapping.get(voice_name, 1.0),
+                    use_longform=longform
+                )
+                if audio_file and use_hybrid and not longform:
+                    audio_file = await asyncio.to_thread(resample_wav_file, audio_file, 48000)
+                if audio_file:
+                    report(i, 'cached' if cached else 'completed')
+                else:
+                    print(f"❌ Failed to generate audio for request {i+1}")
+                    report(i, 'failed')
+                return audio_file
+
+            segments = [run_segment(request) for request in requests]
+            if use_hybrid:
+                print(f"🎬 Creating podcast from {total} segments in {len(requests)} requests using HYBRID SSE/LONGFORM routing...")
+                results = await asyncio.gather(*segments)
+            elif use_longform and use_parallel:
+                print(f"🎬 Creating podcast from {total} segments in {len(requests)} requests using PARALLEL LONGFORM...")
+                results = await asyncio.gather(*segments)  # gather keeps script order
+            else:
+                print(f"🎬 Creating podcast from {total} segments in {len(requests)} requests using SEQUENTIAL processing...")
+                results = [await segment for segment in segments]
+
+            # Slice merged requests and join split ones back into one file per script segment
+            segment_audio = await asyncio.to_thread(
+                lambda: list(self.sync._split_planned_audio(zip(requests, results), report_segment))
+            )
+            audio_files = [audio_file for i, audio_file in segment_audio if audio_file]
+            self.sync._print_cache_stats()
+
+            if not audio_files:
+                print("❌ No audio files were generated")
+                return None
+
+            sampling_rate = 48000 if use_longform or use_hybrid else 22050
+            return await self.combine_audio_files_hq(audio_files, output_filename, sampling_rate=sampling_rate, postprocess=postprocess)
+
+        except Exception as e:
+            print(f"❌ Failed to create podcast: {str(e)}")
+            return None
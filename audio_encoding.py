@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Compressed output encodings
+Streams PCM through a local ffmpeg process to serve FLAC, Ogg/Opus or MP3 instead of raw WAV
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import namedtuple
+
+from wav_stream import COPY_BLOCK_BYTES, iter_wav_data, read_wav_info
+
+# Tunable from the environment (.env)
+FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')
+ENCODING_MP3_BITRATE = os.getenv('ENCODING_MP3_BITRATE', '128k')
+ENCODING_OPUS_BITRATE = os.getenv('ENCODING_OPUS_BITRATE', '64k')
+
+ENCODE_READ_BYTES = 64 * 1024  # Encoded bytes are passed on as soon as ffmpeg produces them
+
+# ffmpeg_args is None for WAV, which is served as-is
+Encoding = namedtuple('Encoding', 'name media_type extension encoder ffmpeg_args')
+
+ENCODINGS = {
+    'wav': Encoding('wav', 'audio/wav', 'wav', None, None),
+    'flac': Encoding('flac', 'audio/flac', 'flac', 'flac', ['-c:a', 'flac', '-f', 'flac']),
+    'opus': Encoding('opus', 'audio/ogg', 'opus', 'libopus',
+                     ['-c:a', 'libopus', '-b:a', ENCODING_OPUS_BITRATE, '-f', 'ogg']),
+    'mp3': Encoding('mp3', 'audio/mpeg', 'mp3', 'libmp3lame',
+                    ['-c:a', 'libmp3lame', '-b:a', ENCODING_MP3_BITRATE, '-f', 'mp3']),
+}
+ALIASES = {'pcm_linear': 'wav', 'pcm': 'wav', 'ogg': 'opus', 'ogg_opus': 'opus'}
+
+PCM_FORMATS = {1: 'u8', 2: 's16le', 3: 's24le', 4: 's32le'}
+
+_encoders = None
+_encoders_lock = threading.Lock()
+
+
+class EncodingError(ValueError):
+    """Unknown or locally unavailable output encoding, or the encoder failed"""
+
+
+def _ffmpeg_encoders():
+    """Audio encoders the local ffmpeg was built with (empty if there is no ffmpeg), probed once"""
+    global _encoders
+    with _encoders_lock:
+        if _encoders is None:
+            _encoders = set()
+            ffmpeg = shutil.which(FFMPEG_PATH)
+            if ffmpeg:
+                try:
+                    listing = subprocess.run([ffmpeg, '-hide_banner', '-encoders'], capture_output=True,
+                                             text=True, timeout=10).stdout
+                    # Lines look like " A....D libmp3lame  libmp3lame MP3 (MPEG audio layer 3)"
+                    _encoders = {line.split()[1] for line in listing.splitlines()
+                                 if len(line.split()) > 1 and line.split()[0].startswith('A')}
+                except (OSError, subprocess.SubprocessError) as e:
+                    print(f"⚠️  Could not list ffmpeg encoders: {e}")
+        return _encoders
+
+
+def available_encodings():
+    """Encoding names this server can produce right now"""
+    encoders = _ffmpeg_encoders()
+    return [name for name, spec in ENCODINGS.items() if spec.encoder is None or spec.encoder in encoders]
+
+
+def resolve_encoding(name):
+    """Encoding for a request's encoding field; raises EncodingError if unknown or unavailable here"""
+    key = ALIASES.get((name or 'wav').lower(), (name or 'wav').lower())
+    spec = ENCODINGS.get(key)
+    if spec is None:
+        raise EncodingError(f"Unknown encoding '{name}' (supported: {', '.join(available_encodings())})")
+    if spec.encoder is not None and spec.encoder not in _ffmpeg_encoders():
+        raise EncodingError(f"Encoding '{name}' needs ffmpeg with {spec.encoder}, which is not available on "
+                            f"this server (supported: {', '.join(available_encodings())})")
+    return spec
+
+
+def iter_encoded_pcm(pcm_blocks, frame_rate, spec, channels=1, sample_width=2, on_close=None):
+    """Encode an iterator of raw PCM blocks with ffmpeg, yielding encoded bytes as they come out.
+
+    A feeder thread writes PCM to ffmpeg's stdin while this generator reads its stdout, so
+    neither side ever holds more than a pipe buffer. pcm_blocks is consumed and closed by the
+    feeder thread, which then calls on_close(). Closing this generator early stops ffmpeg and
+    tells the feeder to stop pulling blocks."""
+    errors = tempfile.TemporaryFile()
+    try:
+        process = subprocess.Popen(
+            [shutil.which(FFMPEG_PATH) or FFMPEG_PATH, '-hide_banner', '-loglevel', 'error', '-nostdin',
+             '-f', PCM_FORMATS[sample_width], '-ar', str(frame_rate), '-ac', str(channels), '-i', 'pipe:0',
+             *spec.ffmpeg_args, 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=errors,
+        )
+    except OSError:
+        errors.close()
+        if hasattr(pcm_blocks, 'close'):
+            pcm_blocks.close()
+        if on_close:
+            on_close()
+        raise
+    failures = []
+    stopped = threading.Event()
+
+    def feed():
+        try:
+            for block in pcm_blocks:
+                if stopped.is_set():
+                    break  # Nobody reads the output any more
+                process.stdin.write(block)
+        except (BrokenPipeError, ValueError):
+            pass  # ffmpeg is gone (finished with an error, or the client went away)
+        except Exception as e:
+            failures.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            try:
+                if hasattr(pcm_blocks, 'close'):
+                    pcm_blocks.close()
+            finally:
+                if on_close:
+                    on_close()
+
+    feeder = threading.Thread(target=feed, name=f"encode-{spec.name}", daemon=True)
+    feeder.start()
+    finished = False
+    try:
+        while True:
+            chunk = process.stdout.read1(ENCODE_READ_BYTES)
+            if not chunk:
+                break
+            yield chunk
+        process.wait()
+        feeder.join()
+        finished = True
+        if failures:
+            raise EncodingError(f"Audio source failed while encoding {spec.name}: {failures[0]}")
+        if process.returncode:
+            errors.seek(0)
+            detail = errors.read().decode('utf-8', 'replace').strip().splitlines()
+            raise EncodingError(f"ffmpeg exited with {process.returncode} while encoding {spec.name}: "
+                                f"{detail[-1] if detail else 'no output'}")
+    finally:
+        if not finished:
+            stopped.set()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        process.stdout.close()
+        errors.close()
+
+
+def iter_encoded_wav(path, spec, block_size=COPY_BLOCK_BYTES):
+    """Encode a WAV file on the fly (WAV itself is streamed unchanged)"""
+    info = read_wav_info(path)
+    if spec.ffmpeg_args is None:
+        with open(info.path, 'rb') as f:
+            yield f.read(info.data_offset)
+        yield from iter_wav_data(info, block_size)
+        return
+    yield from iter_encoded_pcm(iter_wav_data(info, block_size), info.frame_rate, spec,
+                                info.channels, info.sample_width)
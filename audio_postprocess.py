@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Optional post-processing for combined podcasts
+Trims leading/trailing silence from each segment (windowed RMS), levels every segment to a target
+loudness and puts a fixed gap between them - all in fixed-size NumPy blocks, so memory stays flat
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from resampler import decode_pcm, iter_converted_pcm
+from wav_stream import COPY_BLOCK_BYTES, WavFormatError, iter_wav_data, patch_wav_sizes, validate_wav_files, wav_header
+
+# Tunable from the environment (.env)
+POSTPROCESS_SILENCE_DBFS = float(os.getenv('POSTPROCESS_SILENCE_DBFS', '-45'))  # Windows quieter than this are silence
+POSTPROCESS_PAD_SECONDS = float(os.getenv('POSTPROCESS_PAD_SECONDS', '0.05'))  # Kept around speech so onsets survive
+POSTPROCESS_TARGET_DBFS = float(os.getenv('POSTPROCESS_TARGET_DBFS', '-20'))  # RMS of the non-silent audio
+POSTPROCESS_MAX_GAIN_DB = float(os.getenv('POSTPROCESS_MAX_GAIN_DB', '12'))
+POSTPROCESS_GAP_SECONDS = float(os.getenv('POSTPROCESS_GAP_SECONDS', '0.3'))
+
+WINDOW_SECONDS = 0.02
+PEAK_CEILING = 10 ** (-1 / 20)  # Never push a segment's peak above -1dBFS
+
+PostprocessOptions = namedtuple(
+    'PostprocessOptions', 'trim level gap_seconds target_dbfs',
+    defaults=(True, True, POSTPROCESS_GAP_SECONDS, POSTPROCESS_TARGET_DBFS),
+)
+
+# What to keep of one segment and how much to scale it
+SegmentPlan = namedtuple('SegmentPlan', 'start_frame end_frame gain loudness_dbfs')
+
+
+def _window_stats(info, block_size=COPY_BLOCK_BYTES):
+    """Per-window mean square and peak over the whole file, read one window-aligned block at a time"""
+    window = max(1, int(WINDOW_SECONDS * info.frame_rate))
+    frames_per_block = max(window, (block_size // info.block_align) // window * window)
+    energies, peaks = [], []
+    for block in iter_wav_data(info, frames_per_block * info.block_align):
+        frames = decode_pcm(block, info.sample_width, info.channels)
+        power = np.square(frames).mean(axis=1)
+        magnitude = np.abs(frames).max(axis=1)
+        whole = len(power) // window * window
+        if whole:
+            energies.append(power[:whole].reshape(-1, window).mean(axis=1))
+            peaks.append(magnitude[:whole].reshape(-1, window).max(axis=1))
+        if whole < len(power):  # Short final window
+            energies.append(power[whole:].mean(keepdims=True))
+            peaks.append(magnitude[whole:].max(keepdims=True))
+    if not energies:
+        return window, np.zeros(0), np.zeros(0)
+    return window, np.concatenate(energies), np.concatenate(peaks)
+
+
+def analyze_segment(info, options=PostprocessOptions(), block_size=COPY_BLOCK_BYTES):
+    """Where the speech in a segment starts and ends, and the gain that brings it to the target loudness"""
+    window, energies, peaks = _window_stats(info, block_size)
+    loud = np.flatnonzero(energies > 10 ** (POSTPROCESS_SILENCE_DBFS / 10))
+    if not loud.size:
+        return SegmentPlan(0, info.nframes, 1.0, float('-inf'))  # All silence - leave it alone
+
+    start, end = 0, info.nframes
+    if options.trim:
+        pad = int(POSTPROCESS_PAD_SECONDS * info.frame_rate)
+        start = max(0, int(loud[0]) * window - pad)
+        end = min(info.nframes, (int(loud[-1]) + 1) * window + pad)
+
+    loudness = 10 * np.log10(energies[loud].mean())
+    gain = 1.0
+    if options.level:
+        gain_db = float(np.clip(options.target_dbfs - loudness, -POSTPROCESS_MAX_GAIN_DB, POSTPROCESS_MAX_GAIN_DB))
+        gain = min(10 ** (gain_db / 20), PEAK_CEILING / max(float(peaks.max()), 1e-9))
+    return SegmentPlan(start, end, gain, float(loudness))
+
+
+def silence_pcm(frame_count, channels=1, sample_width=2):
+    """PCM bytes of silence (8-bit audio is unsigned, so its silence is 0x80)"""
+    return (b'\x80' if sample_width == 1 else b'\x00') * (frame_count * channels * sample_width)
+
+
+def iter_postprocessed_pcm(info, frame_rate, channels=1, sample_width=2, options=PostprocessOptions(),
+                           block_size=COPY_BLOCK_BYTES):
+    """Yield one segment trimmed, levelled and converted to the target format, in bounded blocks"""
+    plan = analyze_segment(info, options, block_size)
+    yield from iter_converted_pcm(info, frame_rate, channels, sample_width, block_size,
+                                  start_frame=plan.start_frame, end_frame=plan.end_frame, gain=plan.gain)
+
+
+def postprocess_wav_files(paths, output_path, frame_rate, channels=1, sample_width=2, options=PostprocessOptions(),
+                          block_size=COPY_BLOCK_BYTES):
+    """Combine segments like concat_wav_files, trimming and levelling each one and separating them
+    by options.gap_seconds of silence. Returns {'files', 'bytes', 'frames', 'duration', 'trimmed_seconds'}."""
+    infos = validate_wav_files(paths, frame_rate, channels, sample_width, convert=True)
+    if not infos:
+        raise WavFormatError("No input segments to combine")
+    gap = silence_pcm(int(round(options.gap_seconds * frame_rate)), channels, sample_width)
+
+    output_path = str(output_path)
+    tmp_path = output_path + '.tmp'
+    data_size = 0
+    trimmed = 0.0
+    try:
+        with open(tmp_path, 'wb') as out_file:
+            out_file.write(wav_header(frame_rate, channels, sample_width, 0))
+            for n, info in enumerate(infos):
+                if n and gap:
+                    out_file.write(gap)
+                    data_size += len(gap)
+                plan = analyze_segment(info, options, block_size)
+                trimmed += (info.nframes - (plan.end_frame - plan.start_frame)) / info.frame_rate
+                for block in iter_converted_pcm(info, frame_rate, channels, sample_width, block_size,
+                                                start_frame=plan.start_frame, end_frame=plan.end_frame,
+                                                gain=plan.gain):
+                    out_file.write(block)
+                    data_size += len(block)
+            patch_wav_sizes(out_file, data_size)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    frames = data_size // (channels * sample_width)
+    return {
+        'files': len(infos),
+        'bytes': data_size,
+        'frames': frames,
+        'duration': frames / frame_rate,
+        'trimmed_seconds': trimmed,
+    }
@@ -4,19 +4,30 @@ FastAPI wrapper for the Neuphonic backend
 Provides REST endpoints for the Next.js frontend
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import json
 import os
+import time
+import asyncio
+import shutil
 import tempfile
 import uvicorn
 from pathlib import Path
 
 # Import your existing backend
 from neuphonic_backend import NeuphonicBackend
+from async_backend import AsyncNeuphonicBackend
+from job_queue import DialogueJobQueue, QueueFullError
+from script_parser import ScriptValidationError, iter_script_lines, validate_script
+from audio_postprocess import PostprocessOptions
+from audio_encoding import EncodingError, iter_encoded_pcm, iter_encoded_wav, resolve_encoding
+from artifacts import artifact_path, artifact_response, new_job_id
+from preview_cache import PREVIEW_DEFAULT_TEXT
+import metrics
 
 app = FastAPI(
     title="Voice Dialogue Studio API",
@@ -35,6 +46,34 @@ app.add_middleware(
 
 # Initialize backend
 backend = NeuphonicBackend()
+# Endpoints await the async front so one generation never blocks /health, /voices or other users
+async_backend = AsyncNeuphonicBackend(backend)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Per-endpoint latency histogram (for streaming responses, the time until audio starts flowing)"""
+    started = time.monotonic()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The route template, not the raw path, so job ids don't explode the label set
+        route = request.scope.get("route")
+        metrics.REQUEST_SECONDS.labels(
+            method=request.method, endpoint=getattr(route, "path", "unmatched"), status=str(status)
+        ).observe(time.monotonic() - started)
+
+@app.on_event("startup")
+async def start_storage_janitor():
+    """Expire and evict old outputs in the background for as long as the server runs"""
+    backend.storage.start()
+
+@app.on_event("startup")
+async def warm_voice_previews():
+    """Synthesize the default preview of every catalog voice in the background, so first clicks are instant"""
+    backend.preview_cache.warm_catalog(backend.voice_catalog)
 
 # Pydantic models for API
 class VoiceCloneRequest(BaseModel):
@@ -54,19 +93,43 @@ class DialogueGenerationRequest(BaseModel):
     speed_mapping: Dict[str, float] = {}  # Keep for SSE mode
     use_longform: bool = False
     use_parallel: bool = False  # Add parallel processing flag
+    use_hybrid: bool = False  # Route each segment to SSE or longform, whichever is faster
+    postprocess: bool = False  # Trim edge silence, level loudness and space segments evenly
+    gap_seconds: Optional[float] = None  # Gap between post-processed segments (default POSTPROCESS_GAP_SECONDS)
     sampling_rate: int = 48000
     encoding: str = "pcm_linear"
 
 class VoicePreviewRequest(BaseModel):
     voice_id: str
-    text: str = "Hello, this is a voice preview."
+    text: str = PREVIEW_DEFAULT_TEXT  # The text warmed for every voice, so the default preview is instant
+    encoding: str = "pcm_linear"
+
+def output_encoding(name):
+    """Encoding for a request's encoding field, or a 400 if this server can't produce it"""
+    try:
+        return resolve_encoding(name)
+    except EncodingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def audio_file_response(http_request, path, filename, encoding, job_id):
+    """Serve a generated WAV as-is (ETag, 304s and ranges), or encoded on the fly (FLAC/Opus/MP3).
+    X-Artifact-URL points at the stored WAV, which players can re-fetch, seek and resume."""
+    headers = {"X-Job-Id": job_id, "X-Artifact-URL": f"/artifacts/{job_id}/{Path(path).name}"}
+    if encoding.ffmpeg_args is None:
+        return await artifact_response(http_request, path, "audio/wav", filename, headers, storage=backend.storage)
+    backend.storage.touch(path)
+    return StreamingResponse(
+        backend.storage.hold(path, iter_encoded_wav(path, encoding)),
+        media_type=encoding.media_type,
+        headers={**headers, "Content-Disposition": f'attachment; filename="{Path(filename).stem}.{encoding.extension}"'}
+    )
 
 # Voice management endpoints
 @app.get("/voices")
 async def list_voices(cloned_only: bool = False):
     """List all available voices"""
     try:
-        voices = backend.list_voices(show_cloned_only=cloned_only)
+        voices = await async_backend.list_voices(show_cloned_only=cloned_only)
         return {"voices": voices, "status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -90,7 +153,9 @@ async def clone_voice(
         
         try:
             # Clone the voice
-            voice_id = backend.clone_voice(voice_name, temp_file_path, tags)
+            voice_id = await async_backend.clone_voice(voice_name, temp_file_path, tags)
+            if voice_id:
+                backend.preview_cache.warm([voice_id])
             
             return {
                 "voice_id": voice_id,
@@ -105,23 +170,22 @@ async def clone_voice(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/voices/preview")
-async def preview_voice(request: VoicePreviewRequest):
+async def preview_voice(request: VoicePreviewRequest, http_request: Request):
     """Generate a voice preview"""
+    encoding = output_encoding(request.encoding)
+    job_id = new_job_id()
     try:
-        # Use longform for reliable preview generation (it's working well)
-        audio_file = backend.generate_longform_audio(
-            text=request.text,
-            voice_id=request.voice_id,
-            output_filename=f"preview_{request.voice_id[:8]}.wav",
-            speed=1.0  # Normal speed for preview
-        )
+        # Repeat previews are a copy out of the preview cache; a miss is synthesized over SSE
+        job_backend = async_backend.for_job(job_id)
+        with backend.storage.pinned(job_backend.output_dir):
+            audio_file = await job_backend.generate_preview_audio(
+                voice_id=request.voice_id,
+                text=request.text,
+                output_filename="preview.wav"
+            )
         
         if audio_file and os.path.exists(audio_file):
-            return FileResponse(
-                audio_file,
-                media_type="audio/wav",
-                filename=f"preview_{request.voice_id[:8]}.wav"
-            )
+            return await audio_file_response(http_request, audio_file, f"preview_{request.voice_id[:8]}.wav", encoding, job_id)
         else:
             raise HTTPException(status_code=500, detail="Failed to generate preview")
             
@@ -141,25 +205,25 @@ async def delete_voice(voice_id: str):
 
 # Audio generation endpoints
 @app.post("/generate/simple")
-async def generate_simple_audio(request: AudioGenerationRequest):
+async def generate_simple_audio(request: AudioGenerationRequest, http_request: Request):
     """Generate audio using SSE (simple/fast mode)"""
+    encoding = output_encoding(request.encoding)
+    job_id = new_job_id()
     try:
         print(f"🎯 SSE Generation Request: {request.text[:50]}... Speed: {request.speed}")
         
-        audio_file = backend.generate_simple_audio(
-            text=request.text,
-            voice_id=request.voice_id,
-            speed=request.speed,  # Pass the speed parameter
-            output_filename=f"simple_{request.voice_id[:8]}.wav"
-        )
+        job_backend = async_backend.for_job(job_id)
+        with backend.storage.pinned(job_backend.output_dir):
+            audio_file = await job_backend.generate_simple_audio(
+                text=request.text,
+                voice_id=request.voice_id,
+                speed=request.speed,  # Pass the speed parameter
+                output_filename="simple.wav"
+            )
         
         if audio_file and os.path.exists(audio_file):
             print(f"✅ SSE audio generated: {audio_file}")
-            return FileResponse(
-                audio_file,
-                media_type="audio/wav",
-                filename=f"simple_{request.voice_id[:8]}.wav"
-            )
+            return await audio_file_response(http_request, audio_file, f"simple_{request.voice_id[:8]}.wav", encoding, job_id)
         else:
             print("❌ SSE generation failed - no audio file created")
             raise HTTPException(status_code=500, detail="SSE generation failed - no audio generated")
@@ -168,84 +232,292 @@ async def generate_simple_audio(request: AudioGenerationRequest):
         print(f"❌ SSE generation error: {e}")
         raise HTTPException(status_code=500, detail=f"SSE generation failed: {str(e)}")
 
+@app.post("/generate/simple/stream")
+async def generate_simple_audio_stream(request: AudioGenerationRequest):
+    """Stream SSE audio to the client as it is synthesized (WAV with a streaming header)"""
+    print(f"🎯 SSE Streaming Request: {request.text[:50]}... Speed: {request.speed}")
+    
+    audio_stream = async_backend.stream_simple_audio(
+        text=request.text,
+        voice_id=request.voice_id,
+        speed=request.speed,
+        sampling_rate=request.sampling_rate
+    )
+    
+    # Wait for the header and first chunk before answering, so upstream failures are still real HTTP errors
+    try:
+        first_bytes = await audio_stream.__anext__()
+    except Exception as e:
+        print(f"❌ SSE streaming error: {e}")
+        raise HTTPException(status_code=500, detail=f"SSE generation failed: {str(e)}")
+    
+    async def body():
+        yield first_bytes
+        async for audio_bytes in audio_stream:
+            yield audio_bytes
+    
+    return StreamingResponse(
+        body(),
+        media_type="audio/wav",
+        headers={
+            "Content-Disposition": f'inline; filename="simple_{request.voice_id[:8]}.wav"',
+            "X-Audio-Sample-Rate": str(request.sampling_rate),
+            "X-Audio-Format": "pcm_s16le; channels=1",
+            "Cache-Control": "no-store",
+        }
+    )
+
 @app.post("/generate/longform")
-async def generate_longform_audio(request: AudioGenerationRequest):
+async def generate_longform_audio(request: AudioGenerationRequest, http_request: Request):
     """Generate high-quality audio using longform inference"""
+    encoding = output_encoding(request.encoding)
+    job_id = new_job_id()
     try:
-        audio_file = backend.generate_longform_audio(
-            text=request.text,
-            voice_id=request.voice_id,
-            speed=request.speed,
-            output_filename=f"longform_{request.voice_id}.wav"
-        )
+        job_backend = async_backend.for_job(job_id)
+        with backend.storage.pinned(job_backend.output_dir):
+            audio_file = await job_backend.generate_longform_audio(
+                text=request.text,
+                voice_id=request.voice_id,
+                speed=request.speed,
+                output_filename="longform.wav"
+            )
         
         if audio_file and os.path.exists(audio_file):
-            return FileResponse(
-                audio_file,
-                media_type="audio/wav",
-                filename=f"longform_{request.voice_id}.wav"
-            )
+            return await audio_file_response(http_request, audio_file, f"longform_{request.voice_id}.wav", encoding, job_id)
         else:
             raise HTTPException(status_code=500, detail="Failed to generate longform audio")
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/generate/dialogue")
-async def generate_dialogue(request: DialogueGenerationRequest):
-    """Generate dialogue from script"""
+def postprocess_options(request):
+    """PostprocessOptions for a dialogue request, or None when post-processing is off"""
+    if not request.postprocess:
+        return None
+    if request.gap_seconds is None:
+        return PostprocessOptions()
+    if not 0 <= request.gap_seconds <= 10:
+        raise HTTPException(status_code=400, detail="gap_seconds must be between 0 and 10")
+    return PostprocessOptions(gap_seconds=request.gap_seconds)
+
+def validate_dialogue_script(request):
+    """Reject unmapped speakers, empty lines and bad options before anything is queued or synthesized"""
+    postprocess_options(request)
+    output_encoding(request.encoding)
+    voice_mapping = backend._load_voice_mapping(request.voice_mapping)
     try:
-        # Create a temporary script file
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".txt") as script_file:
-            script_file.write(request.script)
-            script_file_path = script_file.name
-        
-        # Update voice mapping
-        backend._update_voice_mapping_bulk(request.voice_mapping)
-        
-        try:
-            # Generate the podcast
-            output_file = backend.create_podcast_from_script(
+        return validate_script(iter_script_lines(request.script.splitlines()), voice_mapping)
+    except ScriptValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def dialogue_mode(request):
+    """Metrics label for how a dialogue is synthesized"""
+    if request.use_hybrid:
+        return "hybrid"
+    mode = "longform" if request.use_longform else "sse"
+    return f"{mode}_parallel" if request.use_parallel else mode
+
+def run_dialogue_job(job):
+    """Worker-side body of a dialogue job: write the script to disk and build the podcast"""
+    request = job.params
+    started = time.monotonic()
+    output_file = None
+    
+    # Create a temporary script file
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".txt") as script_file:
+        script_file.write(request.script)
+        script_file_path = script_file.name
+    
+    try:
+        # Generate the podcast
+        # Segments and the podcast land in outputs/jobs/<job_id>/, so jobs never share files;
+        # the directory is pinned so the storage janitor leaves it alone while the job runs
+        job_backend = backend.for_job(job.job_id)
+        with backend.storage.pinned(job_backend.output_dir):
+            output_file = job_backend.create_podcast_from_script(
                 script_file=script_file_path,
-                output_filename="dialogue_output.wav",
+                output_filename="dialogue.wav",
                 use_longform=request.use_longform,
                 speed_mapping=request.speed_mapping,  # Pass speed mapping (for SSE only)
-                use_parallel=request.use_parallel     # Pass parallel processing flag
+                use_parallel=request.use_parallel,    # Pass parallel processing flag
+                use_hybrid=request.use_hybrid,
+                postprocess=postprocess_options(request),
+                progress_callback=job.update_segment,
+                voice_mapping=request.voice_mapping  # Per-job; never written to the shared mapping
             )
-            
-            if output_file and os.path.exists(output_file):
-                return FileResponse(
-                    output_file,
-                    media_type="audio/wav",
-                    filename="dialogue_output.wav"
-                )
-            else:
-                raise HTTPException(status_code=500, detail="Failed to generate dialogue")
-                
-        finally:
-            # Clean up temp script file
-            os.unlink(script_file_path)
-            
+        return output_file
+    finally:
+        # Clean up temp script file
+        os.unlink(script_file_path)
+        metrics.DIALOGUE_SECONDS.labels(
+            mode=dialogue_mode(request), outcome="completed" if output_file else "failed"
+        ).observe(time.monotonic() - started)
+
+# Dialogue generation runs on background workers so long episodes don't hold the HTTP request open
+dialogue_jobs = DialogueJobQueue(run_dialogue_job)
+
+def collect_metrics():
+    """In-flight gauges and cache hit ratios, read from each component's stats at scrape time"""
+    queue = dialogue_jobs.stats()
+    metrics.IN_FLIGHT.labels(kind="dialogue_jobs_running").set(queue["running"])
+    metrics.IN_FLIGHT.labels(kind="dialogue_jobs_queued").set(queue["queued"])
+    metrics.IN_FLIGHT.labels(kind="longform_jobs").set(backend.longform_jobs.in_flight)
+    metrics.IN_FLIGHT.labels(kind="upstream_connections").set(backend.clients.stats()["in_use"])
+    metrics.CACHE_HIT_RATIO.labels(cache="segments").set(backend.segment_cache.stats()["hit_ratio"])
+    metrics.CACHE_HIT_RATIO.labels(cache="previews").set(backend.preview_cache.stats()["hit_ratio"])
+
+metrics.add_collector(collect_metrics)
+
+@app.post("/generate/dialogue", status_code=202)
+async def generate_dialogue(request: DialogueGenerationRequest):
+    """Queue dialogue generation from script - poll /status/{job_id}, then fetch /download/{job_id}"""
+    validate_dialogue_script(request)
+    try:
+        job = dialogue_jobs.submit(request)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "position": dialogue_jobs.position(job),
+        "status_url": f"/status/{job.job_id}",
+        "download_url": f"/download/{job.job_id}"
+    }
+
+@app.post("/generate/dialogue/stream")
+async def generate_dialogue_stream(request: DialogueGenerationRequest):
+    """Stream the dialogue in script order - each segment is sent once it and all earlier ones are done.
+    WAV by default; compressed encodings are produced on the fly from the same PCM stream."""
+    validate_dialogue_script(request)
+    encoding = output_encoding(request.encoding)
+    sampling_rate = 48000 if request.use_longform or request.use_hybrid else 22050
+    
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".txt") as script_file:
+        script_file.write(request.script)
+        script_file_path = script_file.name
+    
+    # Segment files for this stream get their own directory, removed when the stream ends
+    stream_backend = backend.for_job(new_job_id())
+    backend.storage.pin(stream_backend.output_dir)
+    audio_stream = stream_backend.stream_podcast_from_script(
+        script_file=script_file_path,
+        use_longform=request.use_longform,
+        speed_mapping=request.speed_mapping,
+        use_parallel=request.use_parallel,
+        use_hybrid=request.use_hybrid,
+        postprocess=postprocess_options(request),
+        voice_mapping=request.voice_mapping
+    )
+    
+    # Parse the script and build the header before answering, so a bad script is still a real HTTP error
+    try:
+        header = await asyncio.to_thread(next, audio_stream)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        os.unlink(script_file_path)
+        shutil.rmtree(stream_backend.output_dir, ignore_errors=True)
+        backend.storage.unpin(stream_backend.output_dir)
+        raise HTTPException(status_code=500, detail=f"Dialogue streaming failed: {str(e)}")
+    
+    def finish_stream():
+        os.unlink(script_file_path)
+        shutil.rmtree(stream_backend.output_dir, ignore_errors=True)
+        backend.storage.unpin(stream_backend.output_dir)
+    
+    def body():
+        # Segment generation blocks, so Starlette iterates this in its threadpool
+        if encoding.ffmpeg_args is None:
+            try:
+                yield header
+                yield from audio_stream
+            finally:
+                audio_stream.close()
+                finish_stream()
+            return
+        # The encoder's feeder thread owns audio_stream (the PCM after the header): it stops pulling
+        # segments once the client is gone and cleans up only after its last write into the directory
+        encoded = iter_encoded_pcm(audio_stream, sampling_rate, encoding, on_close=finish_stream)
+        try:
+            yield from encoded
+        finally:
+            encoded.close()
+    
+    return StreamingResponse(
+        body(),
+        media_type=encoding.media_type,
+        headers={
+            "Content-Disposition": f'inline; filename="dialogue_stream.{encoding.extension}"',
+            "X-Audio-Sample-Rate": str(sampling_rate),
+            "X-Audio-Format": "pcm_s16le; channels=1" if encoding.ffmpeg_args is None else encoding.name,
+            "Cache-Control": "no-store",
+        }
+    )
 
 # Utility endpoints
 @app.get("/status/{job_id}")
 async def check_status(job_id: str):
-    """Check generation status (placeholder for async operations)"""
-    # This is a placeholder - your current backend is synchronous
-    return {"status": "completed", "progress": 100}
+    """Check dialogue generation status, including per-segment progress"""
+    job = dialogue_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    status = job.to_dict()
+    if job.status == 'queued':
+        status["position"] = dialogue_jobs.position(job)
+    return status
 
 @app.get("/download/{job_id}")
-async def download_audio(job_id: str):
-    """Download generated audio (placeholder)"""
-    # This is a placeholder for async download functionality
-    raise HTTPException(status_code=404, detail="File not found")
+async def download_audio(job_id: str, http_request: Request, encoding: Optional[str] = None):
+    """Download the finished dialogue for a job, in the job's encoding unless ?encoding= overrides it"""
+    job = dialogue_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    spec = output_encoding(encoding or job.params.encoding)
+    if job.status == 'failed':
+        raise HTTPException(status_code=500, detail=job.error or "Failed to generate dialogue")
+    if job.status != 'completed':
+        raise HTTPException(status_code=409, detail=f"Job is {job.status} ({job.progress}% complete)")
+    if not job.output_file or not os.path.exists(job.output_file):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    return await audio_file_response(http_request, job.output_file, "dialogue_output.wav", spec, job_id)
+
+@app.api_route("/artifacts/{job_id}/{filename}", methods=["GET", "HEAD"])
+async def get_artifact(job_id: str, filename: str, http_request: Request):
+    """A stored job artifact (WAV), with ETag / If-None-Match and byte-range support for seeking and resuming"""
+    path = artifact_path(backend.output_dir, job_id, filename)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    media_type = "audio/wav" if path.suffix == ".wav" else "application/octet-stream"
+    return await artifact_response(http_request, path, media_type, headers={"X-Job-Id": job_id}, storage=backend.storage)
+
+@app.get("/queue")
+async def queue_status():
+    """Dialogue queue depth and worker counts"""
+    return dialogue_jobs.stats()
+
+@app.get("/storage")
+async def storage_status():
+    """Disk usage of outputs/, the quota and TTLs, and what the janitor has removed so far"""
+    return backend.storage.stats()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: per-stage synthesis timings, request latency, in-flight work, cache hit ratios"""
+    rendered = metrics.render()
+    if rendered is None:
+        raise HTTPException(status_code=501, detail="Metrics are disabled (install prometheus_client, METRICS_ENABLED=1)")
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "message": "Voice Dialogue Studio API is running"}
+    return {
+        "status": "healthy",
+        "message": "Voice Dialogue Studio API is running",
+        "upstream": backend.clients.stats()  # Neuphonic connections opened vs reused, calls in flight
+    }
 
 @app.get("/sample-script")
 async def get_sample_script():
@@ -267,18 +539,6 @@ async def get_sample_script():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Add a helper method to the backend for bulk voice mapping updates
-def _update_voice_mapping_bulk(self, voice_mapping: Dict[str, str]):
-    """Update voice mapping with multiple entries"""
-    mapping = self._load_voice_mapping()
-    mapping.update(voice_mapping)
-    
-    with open(self.voice_mapping_file, 'w') as f:
-        json.dump(mapping, f, indent=4)
-
-# Monkey patch the method to the backend
-NeuphonicBackend._update_voice_mapping_bulk = _update_voice_mapping_bulk
-
 if __name__ == "__main__":
     print("🚀 Starting Voice Dialogue Studio API server...")
     print("📡 API will be available at: http://localhost:8000")
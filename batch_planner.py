@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Request batch planner
+Sits between script parsing and synthesis: merges short same-speaker lines into one request,
+splits overlong lines at sentence boundaries, and slices merged audio back into segments
+"""
+
+import os
+import re
+import sys
+import array
+from collections import namedtuple
+
+from wav_stream import COPY_BLOCK_BYTES, read_wav_info, wav_header
+
+# Tunable from the environment (.env)
+BATCH_MERGE_UNDER_CHARS = int(os.getenv('BATCH_MERGE_UNDER_CHARS', '200'))  # 0 disables merging
+BATCH_SSE_MAX_CHARS = int(os.getenv('BATCH_SSE_MAX_CHARS', '500'))  # SSE is most reliable under ~500 chars
+BATCH_LONGFORM_MAX_CHARS = int(os.getenv('BATCH_LONGFORM_MAX_CHARS', '3000'))
+BATCH_SPLIT_SEARCH_SECONDS = float(os.getenv('BATCH_SPLIT_SEARCH_SECONDS', '0.4'))
+
+SPLIT_WINDOW_SECONDS = 0.02  # RMS window used to find the pause between merged lines
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+TERMINAL_PUNCTUATION = ('.', '!', '?', '…', '"', "'", '”', '’')
+
+# One upstream call. segments holds (segment_index, text_length) for every script segment it
+# covers; a long line split across calls has part/part_count, otherwise part_count is 1.
+PlannedRequest = namedtuple('PlannedRequest', 'index speaker text line segments part part_count')
+
+
+def split_sentences(text, max_chars):
+    """Pack whole sentences into chunks of at most max_chars (very long sentences break at a space)"""
+    chunks, current = [], ''
+    for sentence in SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _with_stop(text):
+    """End merged lines with punctuation so the voice pauses where we will cut"""
+    return text if text.endswith(TERMINAL_PUNCTUATION) else text + '.'
+
+
+def plan_requests(segments, max_chars=BATCH_SSE_MAX_CHARS, merge_under_chars=BATCH_MERGE_UNDER_CHARS):
+    """Turn ScriptSegments into PlannedRequests, lazily and in script order.
+
+    Consecutive lines by the same speaker that are each shorter than merge_under_chars are
+    merged while the request stays within max_chars; lines longer than max_chars are split
+    at sentence boundaries. max_chars=0 disables splitting (and caps nothing)."""
+    index = 0
+    run = []  # Short lines by one speaker waiting to be merged
+    run_chars = 0
+
+    def merged(run):
+        if len(run) == 1:
+            segment = run[0]
+            return PlannedRequest(index, segment.speaker, segment.text, segment.line,
+                                  ((segment.index, len(segment.text)),), 0, 1)
+        text = ' '.join(_with_stop(segment.text) for segment in run[:-1]) + ' ' + run[-1].text
+        return PlannedRequest(index, run[0].speaker, text, run[0].line,
+                              tuple((segment.index, len(segment.text)) for segment in run), 0, 1)
+
+    for segment in segments:
+        length = len(segment.text)
+        mergeable = merge_under_chars and length < merge_under_chars
+        fits = not max_chars or run_chars + 1 + length <= max_chars
+        if run and not (mergeable and segment.speaker == run[0].speaker and fits):
+            yield merged(run)
+            index += 1
+            run, run_chars = [], 0
+
+        if mergeable:
+            run.append(segment)
+            run_chars += length + (1 if run_chars else 0)
+        elif max_chars and length > max_chars:
+            chunks = split_sentences(segment.text, max_chars)
+            for part, chunk in enumerate(chunks):
+                yield PlannedRequest(index, segment.speaker, chunk, segment.line,
+                                     ((segment.index, length),), part, len(chunks))
+                index += 1
+        else:
+            yield PlannedRequest(index, segment.speaker, segment.text, segment.line,
+                                 ((segment.index, length),), 0, 1)
+            index += 1
+
+    if run:
+        yield merged(run)
+
+
+def request_filename(request):
+    """Output filename for a planned request's audio"""
+    first = request.segments[0][0]
+    if request.part_count > 1:
+        return f"segment_{first:03d}_{request.speaker}_part{request.part + 1}of{request.part_count}.wav"
+    if len(request.segments) > 1:
+        return f"batch_{first:03d}-{request.segments[-1][0]:03d}_{request.speaker}.wav"
+    return f"segment_{first:03d}_{request.speaker}.wav"
+
+
+def _read_samples(f, info, start_frame, end_frame):
+    """16-bit samples for [start_frame, end_frame) of the first channel"""
+    f.seek(info.data_offset + start_frame * info.block_align)
+    samples = array.array('h')
+    samples.frombytes(f.read((end_frame - start_frame) * info.block_align))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples[::info.channels] if info.channels > 1 else samples
+
+
+def find_quiet_frame(f, info, estimate, search_seconds=BATCH_SPLIT_SEARCH_SECONDS):
+    """Frame near estimate at the centre of the quietest short window (the pause between lines)"""
+    search = int(search_seconds * info.frame_rate)
+    window = max(1, int(SPLIT_WINDOW_SECONDS * info.frame_rate))
+    start = max(0, estimate - search)
+    end = min(info.nframes, estimate + search)
+    if end - start <= window:
+        return estimate
+
+    samples = _read_samples(f, info, start, end)
+    best_frame, best_energy = estimate, None
+    for offset in range(0, len(samples) - window + 1, window // 2 or 1):
+        energy = sum(sample * sample for sample in samples[offset:offset + window])
+        frame = start + offset + window // 2
+        # Among equally quiet windows (a whole pause), prefer the one closest to the estimate
+        if best_energy is None or energy < best_energy or (
+                energy == best_energy and abs(frame - estimate) < abs(best_frame - estimate)):
+            best_frame, best_energy = frame, energy
+    return best_frame
+
+
+def _write_frames(f, info, start_frame, end_frame, output_path, block_size=COPY_BLOCK_BYTES):
+    remaining = (end_frame - start_frame) * info.block_align
+    f.seek(info.data_offset + start_frame * info.block_align)
+    with open(output_path, 'wb') as out:
+        out.write(wav_header(info.frame_rate, info.channels, info.sample_width, remaining))
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            out.write(block)
+            remaining -= len(block)
+
+
+def slice_merged_audio(path, text_lengths, output_paths):
+    """Cut one merged request's WAV into per-segment files.
+
+    Boundaries are first estimated from each line's share of the characters, then moved to
+    the quietest point nearby so cuts land in the pause between lines."""
+    info = read_wav_info(path)
+    if info.sample_width != 2:
+        raise ValueError(f"{path}: only 16-bit audio can be sliced")
+
+    total_chars = sum(text_lengths) or 1
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        chars = 0
+        for length in text_lengths[:-1]:
+            chars += length
+            estimate = int(info.nframes * chars / total_chars)
+            boundaries.append(max(boundaries[-1], find_quiet_frame(f, info, estimate)))
+        boundaries.append(info.nframes)
+
+        for output_path, start, end in zip(output_paths, boundaries, boundaries[1:]):
+            _write_frames(f, info, start, end, str(output_path))
+    return [str(output_path) for output_path in output_paths]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Shared benchmark helpers: synthetic PCM fixtures, peak RSS and fresh-process workers
+Used by run_suite.py and the bench_*.py comparisons.
+"""
+
+import os
+import sys
+import json
+import resource
+import subprocess
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from wav_stream import wav_header
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def noise_second(rate):
+    """One second of reproducible speech-level noise as 16-bit PCM"""
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(rate) * 3000).clip(-32768, 32767).astype('<i2').tobytes()
+
+
+def write_segments(folder, seconds, segment_seconds, rate, name_format):
+    """16-bit mono segments adding up to seconds of audio; returns their paths in order.
+
+    name_format can use {index} (from 0), {number} (from 1) and {speaker} (alternating Rowan/Alex)."""
+    block = noise_second(rate)
+    paths = []
+    remaining = seconds
+    while int(remaining * rate) > 0:  # Float lengths can leave less than a frame behind
+        length = min(segment_seconds, remaining)
+        index = len(paths)
+        speaker = 'Alex' if index % 2 else 'Rowan'
+        path = os.path.join(folder, name_format.format(index=index, number=index + 1, speaker=speaker))
+        data_size = int(length * rate) * 2
+        with open(path, 'wb') as f:
+            f.write(wav_header(rate, 1, 2, data_size))
+            written = 0
+            while written < data_size:
+                chunk = block[:data_size - written]
+                f.write(chunk)
+                written += len(chunk)
+        paths.append(path)
+        remaining -= length
+    return paths
+
+
+def run_in_fresh_process(script, *args):
+    """Run script --worker ... in a new interpreter, so its ru_maxrss only reflects that one run.
+    The worker prints its result as JSON on its last line."""
+    output = subprocess.run([sys.executable, script, '--worker', *map(str, args)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak memory of combining segments vs total audio length
+Compares the streaming combiner (wav_stream.concat_wav_files) with the old readframes() approach.
+
+Usage: python benchmarks/bench_combine.py [--minutes 1 10 30] [--segment-seconds 60] [--rate 48000]
+"""
+
+import os
+import json
+import time
+import wave
+import argparse
+import tempfile
+
+from _common import peak_rss_mb, run_in_fresh_process, write_segments
+from wav_stream import concat_wav_files
+
+
+def combine_legacy(paths, output_path, rate):
+    """The previous combine_audio_files_hq body: whole segments through readframes()"""
+    with wave.open(output_path, 'wb') as output_wav:
+        output_wav.setnchannels(1)
+        output_wav.setsampwidth(2)
+        output_wav.setframerate(rate)
+        for path in paths:
+            with wave.open(path, 'rb') as input_wav:
+                output_wav.writeframes(input_wav.readframes(input_wav.getnframes()))
+
+
+def run_worker(method, folder, rate):
+    """Worker side of run_in_fresh_process: one combine with one method"""
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.startswith('segment_'))
+    output_path = os.path.join(folder, f"combined_{method}.wav")
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if method == 'streaming':
+        concat_wav_files(paths, output_path, frame_rate=rate)
+    else:
+        combine_legacy(paths, output_path, rate)
+    elapsed = time.perf_counter() - started
+    os.unlink(output_path)
+    print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark combine peak memory vs audio length')
+    parser.add_argument('--minutes', type=int, nargs='+', default=[1, 10, 30])
+    parser.add_argument('--segment-seconds', type=int, default=60)
+    parser.add_argument('--rate', type=int, default=48000)
+    parser.add_argument('--worker', choices=['streaming', 'legacy'], help=argparse.SUPPRESS)
+    parser.add_argument('--folder', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.folder, args.rate)
+        return
+
+    print(f"{'audio':>8} {'method':>10} {'time (s)':>9} {'peak RSS (MB)':>14} {'over baseline':>14}")
+    for minutes in args.minutes:
+        with tempfile.TemporaryDirectory() as folder:
+            write_segments(folder, minutes * 60, args.segment_seconds, args.rate, "segment_{index:04d}.wav")
+            for method in ('streaming', 'legacy'):
+                result = run_in_fresh_process(__file__, method, '--folder', folder, '--rate', args.rate)
+                growth = result['peak_rss_mb'] - result['baseline_rss_mb']
+                print(f"{minutes:>6}m {method:>10} {result['seconds']:>9.2f} "
+                      f"{result['peak_rss_mb']:>14.1f} {growth:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
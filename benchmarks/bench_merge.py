@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: merging SSE segments with silence gaps
+Compares segment_merger.merge_wav_files (preallocated, NumPy block copies) with the old pydub
+merge_segments loop (podcast += seg; podcast += gap), which copies the whole podcast per segment.
+
+Usage: python benchmarks/bench_merge.py [--segments 50 200 800] [--segment-seconds 5] [--gap 0.3] [--rate 22050]
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+
+from _common import peak_rss_mb, run_in_fresh_process, write_segments
+from segment_merger import merge_wav_files
+
+
+def merge_legacy(paths, output_path, gap_sec):
+    """The previous merge_segments body"""
+    from pydub import AudioSegment
+    gap, podcast = AudioSegment.silent(int(gap_sec * 1000)), AudioSegment.silent(0)
+    for i, fname in enumerate(paths):
+        podcast += AudioSegment.from_wav(fname)
+        if i < len(paths) - 1:
+            podcast += gap
+    podcast.export(output_path, format="wav")
+
+
+def run_worker(method, folder, gap_sec):
+    """Worker side of run_in_fresh_process: one merge with one method"""
+    paths = [os.path.join(folder, name) for name in os.listdir(folder) if name[0].isdigit()]
+    paths.sort(key=lambda path: int(os.path.basename(path).split('_')[0]))
+    output_path = os.path.join(folder, f"merged_{method}.wav")
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if method == 'numpy':
+        merge_wav_files(paths, output_path, gap_sec=gap_sec)
+    else:
+        merge_legacy(paths, output_path, gap_sec)
+    elapsed = time.perf_counter() - started
+    os.unlink(output_path)
+    print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark segment merging time and peak memory')
+    parser.add_argument('--segments', type=int, nargs='+', default=[50, 200, 800])
+    parser.add_argument('--segment-seconds', type=float, default=5)
+    parser.add_argument('--gap', type=float, default=0.3)
+    parser.add_argument('--rate', type=int, default=22050)
+    parser.add_argument('--worker', choices=['numpy', 'pydub'], help=argparse.SUPPRESS)
+    parser.add_argument('--folder', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.folder, args.gap)
+        return
+
+    try:
+        import pydub  # noqa: F401
+        methods = ('numpy', 'pydub')
+    except ImportError:
+        print("⚠️ pydub not installed - benchmarking the NumPy merger only")
+        methods = ('numpy',)
+
+    print(f"{'segments':>9} {'audio':>8} {'method':>7} {'time (s)':>9} {'peak RSS (MB)':>14} {'over baseline':>14}")
+    for count in args.segments:
+        minutes = count * (args.segment_seconds + args.gap) / 60
+        with tempfile.TemporaryDirectory() as folder:
+            # Named like create_podcast_notlongform's output
+            write_segments(folder, count * args.segment_seconds, args.segment_seconds, args.rate,
+                           "{number:02d}_{speaker}.wav")
+            for method in methods:
+                result = run_in_fresh_process(__file__, method, '--folder', folder, '--gap', args.gap)
+                growth = result['peak_rss_mb'] - result['baseline_rss_mb']
+                print(f"{count:>9} {minutes:>7.1f}m {method:>7} {result['seconds']:>9.2f} "
+                      f"{result['peak_rss_mb']:>14.1f} {growth:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
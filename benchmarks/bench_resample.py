@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resampling throughput
+Converts synthetic WAV files through resampler.iter_converted_pcm (NumPy polyphase windowed-sinc)
+and the old pure-Python linear interpolator, reporting seconds of audio per CPU-second and peak
+traced memory. Memory should stay flat as the input grows.
+
+Usage: python benchmarks/bench_resample.py [--seconds 60 600] [--legacy-seconds 30]
+"""
+
+import os
+import sys
+import time
+import array
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from resampler import encode_pcm, iter_converted_pcm
+from wav_stream import iter_wav_data, read_wav_info, wav_header
+
+# (label, source rate, source width, source channels, target rate)
+CONVERSIONS = [
+    ('SSE -> longform', 22050, 2, 1, 48000),
+    ('44.1k -> 48k', 44100, 2, 1, 48000),
+    ('48k -> SSE', 48000, 2, 1, 22050),
+    ('24-bit stereo', 44100, 3, 2, 48000),
+]
+
+
+def write_source(path, seconds, rate, sample_width, channels):
+    """Speech-band noise plus a tone, written one second at a time"""
+    rng = np.random.default_rng(0)
+    with open(path, 'wb') as f:
+        f.write(wav_header(rate, channels, sample_width, seconds * rate * channels * sample_width))
+        t = np.arange(rate) / rate
+        for _ in range(seconds):
+            second = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.1 * rng.standard_normal(rate)
+            f.write(encode_pcm(np.repeat(second[:, None], channels, axis=1).astype(np.float32), sample_width))
+
+
+def legacy_linear(info, target_rate):
+    """The previous LinearResampler loop (16-bit mono only)"""
+    step = info.frame_rate / target_rate
+    pos, prev = 0.0, None
+    for block in iter_wav_data(info):
+        samples = array.array('h')
+        samples.frombytes(block)
+        buf = samples if prev is None else array.array('h', [prev]) + samples
+        out = array.array('h')
+        last = len(buf) - 1
+        while pos < last:
+            i = int(pos)
+            a = buf[i]
+            out.append(int(round(a + (buf[i + 1] - a) * (pos - i))))
+            pos += step
+        pos -= last
+        prev = buf[last]
+        yield out.tobytes()
+
+
+def measure(blocks, seconds):
+    """Drain a block iterator; returns (audio seconds per CPU second, peak traced MB)"""
+    tracemalloc.start()
+    started = time.process_time()
+    for _ in blocks:
+        pass
+    elapsed = time.process_time() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds / max(elapsed, 1e-9), peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark resampling throughput and memory')
+    parser.add_argument('--seconds', type=int, nargs='+', default=[60, 600])
+    parser.add_argument('--legacy-seconds', type=int, default=30, help='Input length for the slow linear baseline')
+    args = parser.parse_args()
+
+    print(f"{'conversion':>16} {'audio':>7} {'method':>10} {'audio s / CPU s':>16} {'peak (MB)':>10}")
+    with tempfile.TemporaryDirectory() as folder:
+        for label, rate, sample_width, channels, target in CONVERSIONS:
+            lengths = [(seconds, 'polyphase') for seconds in args.seconds]
+            if sample_width == 2 and channels == 1 and args.legacy_seconds:
+                lengths.append((args.legacy_seconds, 'linear'))
+            for seconds, method in lengths:
+                path = os.path.join(folder, f"source_{rate}_{sample_width}_{channels}_{seconds}.wav")
+                if not os.path.exists(path):
+                    write_source(path, seconds, rate, sample_width, channels)
+                info = read_wav_info(path)
+                if method == 'polyphase':
+                    blocks = iter_converted_pcm(info, target, channels=1, sample_width=2)
+                else:
+                    blocks = legacy_linear(info, target)
+                throughput, peak = measure(blocks, seconds)
+                print(f"{label:>16} {seconds:>6}s {method:>10} {throughput:>16.1f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
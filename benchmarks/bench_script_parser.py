@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parsing large dialogue scripts
+Compares script_parser (lazy, line-based) with the two old whole-file parsers: split('<') and
+the per-line regex. Reports throughput, time to the first segment and peak Python allocations.
+
+Usage: python benchmarks/bench_script_parser.py [--lines 10000 100000 1000000] [--words 25]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from script_parser import iter_script, validate_script
+
+WORDS = "the quick brown fox jumps over a lazy dog while rowan and alex talk about history science and time".split()
+
+
+def write_script(path, lines, words):
+    """Synthetic two-speaker script; every tenth segment wraps onto a continuation line"""
+    rng = random.Random(0)
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(lines):
+            speaker = 'Alex' if n % 2 else 'Rowan'
+            text = ' '.join(rng.choice(WORDS) for _ in range(words))
+            if n % 10 == 0:
+                half = len(text) // 2
+                text = text[:half] + '\n' + text[half:]
+            f.write(f"<{speaker}>: {text}\n")
+
+
+def legacy_split(path):
+    """The old create_podcast.process_script / NeuphonicBackend._process_script"""
+    with open(path, 'r') as file:
+        content = file.read()
+    results = []
+    for split in content.split('<'):
+        if '>' in split:
+            voice_name, text = split.split('>', 1)
+            results.append((voice_name.strip(), text.strip()))
+    return iter(results)
+
+
+def legacy_regex(path):
+    """The old create_podcast_notlongform.parse_script"""
+    pat, out = re.compile(r"^\s*<([^>]+)>\s*(.+)$"), []
+    with open(path, encoding="utf-8") as fp:
+        for ln in fp:
+            m = pat.match(ln)
+            if m:
+                out.append((m.group(1).strip(), m.group(2).strip()))
+    return iter(out)
+
+
+def measure(make_iterator, path):
+    """Time to first segment, total time and peak traced memory for consuming every segment"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    segments = make_iterator(path)
+    next(segments)
+    first = time.perf_counter() - started
+    count = 1 + sum(1 for _ in segments)
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, first, total, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark script parsing on large synthetic scripts')
+    parser.add_argument('--lines', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--words', type=int, default=25)
+    args = parser.parse_args()
+
+    methods = [
+        ('script_parser', iter_script),
+        ('legacy split', legacy_split),
+        ('legacy regex', legacy_regex),
+    ]
+    mapping = {'Alex': 'a', 'Rowan': 'r'}
+
+    print(f"{'lines':>9} {'method':>14} {'segments':>9} {'first (ms)':>11} {'total (s)':>10} "
+          f"{'segments/s':>11} {'peak (MB)':>10}")
+    for lines in args.lines:
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'script.txt')
+            write_script(path, lines, args.words)
+            for name, make_iterator in methods:
+                count, first, total, peak = measure(make_iterator, path)
+                print(f"{lines:>9} {name:>14} {count:>9} {first * 1000:>11.2f} {total:>10.2f} "
+                      f"{count / total:>11.0f} {peak / 1024 / 1024:>10.1f}")
+
+            started = time.perf_counter()
+            summary = validate_script(path, mapping)
+            elapsed = time.perf_counter() - started
+            print(f"{lines:>9} {'validate':>14} {summary['segments']:>9} {'':>11} {elapsed:>10.2f} "
+                  f"{summary['segments'] / elapsed:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
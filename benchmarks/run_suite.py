@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: the local audio data path
+Runs each operation on synthetic PCM fixtures (22.05 kHz / 48 kHz mono, seconds to hours of audio)
+in a fresh process and reports throughput and peak memory. Results can be saved as a baseline and
+later runs compared against it. Fully offline - no Neuphonic calls are made.
+
+Operations:
+  save_wav   NeuphonicBackend._save_high_quality_wav (longform audio written with the wave module)
+  sse_write  NeuphonicBackend.generate_simple_audio fed SSE-sized chunks by a stand-in SSE client (22.05 kHz only)
+  combine    NeuphonicBackend.combine_audio_files_hq over 60 s segments
+  merge      create_podcast_notlongform.merge_segments over 5 s segments with 0.3 s gaps
+  parse      script_parser.validate_script + iter_script over a script of matching length
+
+Usage: python benchmarks/run_suite.py [--seconds 60 600 3600] [--rates 22050 48000] [--ops combine merge]
+                                      [--repeat 3] [--save-baseline [PATH]] [--compare [PATH]] [--tolerance 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from _common import ROOT, noise_second, peak_rss_mb, run_in_fresh_process, write_segments
+
+OPERATIONS = ['save_wav', 'sse_write', 'combine', 'merge', 'parse']
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+COMBINE_SEGMENT_SECONDS = 60
+MERGE_SEGMENT_SECONDS = 5
+SSE_CHUNK_SECONDS = 0.2  # Roughly the audio carried by one SSE message
+SSE_RATE = 22050  # generate_simple_audio always asks SSE for 22.05 kHz
+SCRIPT_SECONDS_PER_LINE = 10  # A 25-word line is about ten seconds of speech
+WORDS = "the quick brown fox jumps over a lazy dog while rowan and alex talk about history science and time".split()
+
+
+def write_script(path, seconds):
+    rng = random.Random(0)
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(max(1, seconds // SCRIPT_SECONDS_PER_LINE)):
+            speaker = 'Alex' if n % 2 else 'Rowan'
+            f.write(f"<{speaker}> {' '.join(rng.choice(WORDS) for _ in range(25))}\n")
+
+
+class ReplaySSE:
+    """Stands in for SSEClient: send() replays the same prebuilt chunks, so only the write path is timed"""
+
+    def __init__(self, chunks, repeat):
+        self.chunks = chunks
+        self.repeat = repeat
+
+    def send(self, text, tts_config):
+        for _ in range(self.repeat):
+            yield from self.chunks
+
+
+class ReplayClients:
+    """The two ClientPool calls generate_simple_audio makes"""
+
+    def __init__(self, sse):
+        self._sse = sse
+
+    def sse(self):
+        return self._sse
+
+    def connection(self):
+        return contextlib.nullcontext()
+
+
+def prepare_fixture(op, folder, seconds, rate):
+    """Input files for one operation (the PCM for save_wav and sse_write is built in the worker)"""
+    if op == 'combine':
+        write_segments(folder, seconds, COMBINE_SEGMENT_SECONDS, rate, "segment_{index:04d}_{speaker}.wav")
+    elif op == 'merge':
+        write_segments(folder, seconds, MERGE_SEGMENT_SECONDS, rate, "{index:04d}_{speaker}.wav")
+    elif op == 'parse':
+        write_script(os.path.join(folder, 'script.txt'), seconds)
+
+
+def input_bytes(folder):
+    return sum(path.stat().st_size for path in Path(folder).iterdir() if path.is_file())
+
+
+def import_operation(op):
+    """Import what an operation needs up front, so neither its timing nor its RSS growth includes imports"""
+    if op in ('save_wav', 'sse_write', 'combine'):
+        import neuphonic_backend  # noqa: F401
+    elif op == 'merge':
+        os.environ.setdefault('NEUPHONIC_API_KEY', 'offline-benchmark')  # Checked at import, never used
+        import create_podcast_notlongform  # noqa: F401
+    elif op == 'parse':
+        import script_parser  # noqa: F401
+
+
+def run_operation(op, folder, seconds, rate):
+    """Run one operation once; returns (elapsed seconds, bytes processed)"""
+    output_path = os.path.join(folder, 'output.wav')
+    if op == 'save_wav':
+        from neuphonic_backend import NeuphonicBackend
+        audio_data = noise_second(rate) * seconds  # The API takes the whole clip as bytes, so RSS growth includes it
+        started = time.perf_counter()
+        NeuphonicBackend._save_high_quality_wav(None, audio_data, output_path, sampling_rate=rate)
+        return time.perf_counter() - started, len(audio_data)
+
+    if op == 'sse_write':
+        from neuphonic_backend import NeuphonicBackend
+        second = noise_second(SSE_RATE)
+        chunk_bytes = int(SSE_CHUNK_SECONDS * SSE_RATE) * 2
+        chunks = [SimpleNamespace(data=SimpleNamespace(audio=second[i:i + chunk_bytes]))
+                  for i in range(0, len(second), chunk_bytes)]
+        backend = NeuphonicBackend.__new__(NeuphonicBackend)  # The SSE write path only needs these
+        backend.output_dir = Path(folder)
+        backend.clients = ReplayClients(ReplaySSE(chunks, seconds))
+        backend.sse_stats = deque(maxlen=200)
+        started = time.perf_counter()
+        if backend.generate_simple_audio("offline benchmark", voice_id='offline-benchmark',
+                                         output_filename='output.wav') is None:
+            raise RuntimeError("generate_simple_audio failed")
+        return time.perf_counter() - started, len(second) * seconds
+
+    if op == 'combine':
+        from neuphonic_backend import NeuphonicBackend
+        backend = NeuphonicBackend.__new__(NeuphonicBackend)  # combine only needs output_dir
+        backend.output_dir = Path(folder)
+        paths = sorted(str(path) for path in Path(folder).glob('segment_*.wav'))
+        processed = input_bytes(folder)
+        started = time.perf_counter()
+        if backend.combine_audio_files_hq(paths, 'output.wav', sampling_rate=rate) is None:
+            raise RuntimeError("combine_audio_files_hq failed")
+        return time.perf_counter() - started, processed
+
+    if op == 'merge':
+        from create_podcast_notlongform import merge_segments
+        processed = input_bytes(folder)
+        started = time.perf_counter()
+        merge_segments(folder, output_path, gap_sec=0.3)
+        return time.perf_counter() - started, processed
+
+    if op == 'parse':
+        from script_parser import iter_script, validate_script
+        script_path = os.path.join(folder, 'script.txt')
+        started = time.perf_counter()
+        validate_script(script_path)
+        for _ in iter_script(script_path):
+            pass
+        return time.perf_counter() - started, os.path.getsize(script_path)
+
+    raise ValueError(f"Unknown operation {op}")
+
+
+def run_worker(op, folder, seconds, rate, repeat):
+    """Worker side of run_in_fresh_process: repeat one case and report its best time and RSS growth"""
+    import io
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import_operation(op)
+    baseline = peak_rss_mb()
+    timings = []
+    processed = 0
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):  # The pipeline's progress prints
+            elapsed, processed = run_operation(op, folder, seconds, rate)
+        timings.append(elapsed)
+        output_path = os.path.join(folder, 'output.wav')
+        if os.path.exists(output_path):
+            os.unlink(output_path)
+    print(json.dumps({
+        'seconds': min(timings),
+        'bytes': processed,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': peak_rss_mb() - baseline,
+    }))
+
+
+def result_key(op, rate, seconds):
+    return f"{op}/{rate or '-'}/{seconds}"
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Print throughput and memory against a saved baseline; returns the keys that regressed"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != environment():
+        print(f"⚠️  Baseline was recorded on {baseline.get('environment')}; numbers may not be comparable")
+
+    regressions = []
+    print(f"\n{'operation':>28} {'throughput':>11} {'RSS growth (MB)':>16}")
+    for key, result in results.items():
+        before = baseline['results'].get(key)
+        if before is None:
+            print(f"{key:>28} {'(new)':>11}")
+            continue
+        speed = result['realtime_x'] / before['realtime_x'] if before['realtime_x'] else float('inf')
+        memory = result['rss_growth_mb'] - before['rss_growth_mb']
+        slower = speed < 1 - tolerance
+        # Small absolute RSS changes are allocator noise
+        heavier = memory > max(5.0, tolerance * before['rss_growth_mb'])
+        flag = '  ❌ regression' if slower or heavier else ''
+        print(f"{key:>28} {speed:>10.2f}x {memory:>+16.1f}{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the local audio data path on synthetic fixtures')
+    parser.add_argument('--seconds', type=int, nargs='+', default=[60, 600, 3600], help='Audio lengths to test')
+    parser.add_argument('--rates', type=int, nargs='+', default=[22050, 48000])
+    parser.add_argument('--ops', nargs='+', choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the fastest is reported')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed throughput loss before flagging')
+    parser.add_argument('--worker', choices=OPERATIONS, help=argparse.SUPPRESS)
+    parser.add_argument('--folder', help=argparse.SUPPRESS)
+    parser.add_argument('--rate', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--length', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.folder, args.length, args.rate, args.repeat)
+        return
+
+    results = {}
+    print(f"{'operation':>28} {'time (s)':>9} {'x realtime':>11} {'MB/s':>9} {'RSS growth (MB)':>16}")
+    for op in args.ops:
+        if op == 'parse':
+            rates = [None]  # Parsing doesn't depend on the audio rate
+        elif op == 'sse_write':
+            rates = [SSE_RATE]
+        else:
+            rates = args.rates
+        for rate in rates:
+            for seconds in args.seconds:
+                with tempfile.TemporaryDirectory() as folder:
+                    prepare_fixture(op, folder, seconds, rate)
+                    result = run_in_fresh_process(__file__, op, '--folder', folder, '--length', seconds,
+                                                  '--rate', rate or 0, '--repeat', args.repeat)
+                result['audio_seconds'] = seconds
+                result['realtime_x'] = seconds / max(result['seconds'], 1e-9)
+                result['mb_per_s'] = result['bytes'] / 1024 / 1024 / max(result['seconds'], 1e-9)
+                key = result_key(op, rate, seconds)
+                results[key] = result
+                print(f"{key:>28} {result['seconds']:>9.3f} {result['realtime_x']:>11.0f} "
+                      f"{result['mb_per_s']:>9.0f} {result['rss_growth_mb']:>16.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'results': results}, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} case(s) regressed beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Shared Neuphonic client provider
+One client and one set of TTS endpoint objects per process (per event loop for async ones).
+SSE synthesis goes through one keep-alive httpx client per process (per event loop for async),
+bounded at NEUPHONIC_MAX_CONNECTIONS, with counters of connections opened vs reused.
+"""
+
+import os
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+from pyneuphonic import Neuphonic, TTSConfig
+from pyneuphonic.models import to_dict
+
+# Tunable from the environment (.env)
+NEUPHONIC_MAX_CONNECTIONS = int(os.getenv('NEUPHONIC_MAX_CONNECTIONS', '16'))
+NEUPHONIC_KEEPALIVE_SECONDS = float(os.getenv('NEUPHONIC_KEEPALIVE_SECONDS', '30'))
+
+SSE_TIMEOUT_SECONDS = 20  # Same default as the SDK's SSEClient.send
+
+# httpcore trace events that mean the request had to open a new connection
+CONNECT_EVENTS = ('connection.connect_tcp.complete', 'connection.connect_unix_socket.complete')
+
+
+def _speak_request(endpoint, text, tts_config, timeout):
+    """Arguments for the SSE speak request, built the way SSEClient.send builds them"""
+    if not isinstance(tts_config, TTSConfig):
+        tts_config = TTSConfig(**(tts_config or {}))
+    assert isinstance(text, str), "`text` should be an instance of type `str`."
+    return {
+        'method': 'POST',
+        'url': f"{endpoint.http_url}/sse/speak/{tts_config.lang_code}",
+        'headers': endpoint.headers,
+        'json': {'text': text, **to_dict(tts_config)},
+        'timeout': timeout,
+    }
+
+
+class PooledSSEClient:
+    """SSEClient.send over the pool's keep-alive httpx client (the SDK opens a new connection per call)"""
+
+    def __init__(self, pool, endpoint):
+        self._pool = pool
+        self.endpoint = endpoint
+
+    def send(self, text, tts_config=None, timeout=SSE_TIMEOUT_SECONDS):
+        connected = []
+
+        def trace(name, info):
+            if name in CONNECT_EVENTS:
+                connected.append(name)
+
+        request = _speak_request(self.endpoint, text, tts_config, timeout)
+        with self._pool.http_client().stream(**request, extensions={'trace': trace}) as response:
+            self._pool._count_connection(bool(connected))
+            if not response.is_success:
+                response.read()
+                self.endpoint.raise_for_status(response, "SSE synthesis failed.")
+            for message in response.iter_lines():
+                parsed_message = self.endpoint._parse_message(message)
+                if parsed_message is not None:
+                    yield parsed_message
+
+
+class AsyncPooledSSEClient:
+    """AsyncSSEClient.send over the event loop's keep-alive httpx.AsyncClient"""
+
+    def __init__(self, pool, endpoint):
+        self._pool = pool
+        self.endpoint = endpoint
+
+    async def send(self, text, tts_config=None, timeout=SSE_TIMEOUT_SECONDS):
+        connected = []
+
+        async def trace(name, info):
+            if name in CONNECT_EVENTS:
+                connected.append(name)
+
+        request = _speak_request(self.endpoint, text, tts_config, timeout)
+        async with self._pool.async_http_client().stream(**request, extensions={'trace': trace}) as response:
+            self._pool._count_connection(bool(connected))
+            if not response.is_success:
+                await response.aread()
+                self.endpoint.raise_for_status(response, "SSE synthesis failed.")
+            async for message in response.aiter_lines():
+                parsed_message = self.endpoint._parse_message(message)
+                if parsed_message is not None:
+                    yield parsed_message
+
+
+class ClientPool:
+    """Hands out the shared Neuphonic client, its TTS endpoints and keep-alive HTTP connections.
+
+    Sync endpoints (SSEClient, LongformInference) are stateless between calls and shared by
+    every thread; async ones (AsyncSSEClient) are kept per event loop. sse() and async_sse()
+    send over pooled connections; longform calls still go through the SDK's own httpx calls.
+    connection() and async_connection() bound how many upstream calls are open at once across
+    all pipelines.
+    """
+
+    def __init__(self, api_key, max_connections=NEUPHONIC_MAX_CONNECTIONS):
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.in_use = 0
+        self._client = None
+        self._endpoints = {}  # kind -> shared sync endpoint
+        self._async_endpoints = weakref.WeakKeyDictionary()  # event loop -> {kind: endpoint}
+        self._http = None
+        self._async_http = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._async_slots = weakref.WeakKeyDictionary()  # event loop -> Semaphore
+        self._lock = threading.Lock()
+
+    def _client_locked(self):
+        if self._client is None:
+            self._client = Neuphonic(api_key=self.api_key)
+        return self._client
+
+    @property
+    def client(self):
+        """The process-wide Neuphonic client (voices, clones, endpoint factories)"""
+        with self._lock:
+            return self._client_locked()
+
+    def _limits(self):
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections,
+                            keepalive_expiry=NEUPHONIC_KEEPALIVE_SECONDS)
+
+    def http_client(self):
+        """Process-wide keep-alive httpx client for upstream calls"""
+        with self._lock:
+            if self._http is None:
+                self._http = httpx.Client(limits=self._limits())
+            return self._http
+
+    def async_http_client(self):
+        """Keep-alive httpx.AsyncClient for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_http.get(loop)
+            if client is None:
+                client = self._async_http[loop] = httpx.AsyncClient(limits=self._limits())
+            return client
+
+    def _count_connection(self, opened):
+        with self._lock:
+            if opened:
+                self.connections_opened += 1
+            else:
+                self.connections_reused += 1
+
+    def endpoint(self, kind):
+        """Shared sync TTS endpoint, e.g. endpoint('SSEClient') or endpoint('LongformInference')"""
+        with self._lock:
+            endpoint = self._endpoints.get(kind)
+            if endpoint is None:
+                endpoint = self._endpoints[kind] = getattr(self._client_locked().tts, kind)()
+            return endpoint
+
+    def async_endpoint(self, kind):
+        """Async TTS endpoint for the running event loop, e.g. async_endpoint('AsyncSSEClient')"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            endpoints = self._async_endpoints.setdefault(loop, {})
+            endpoint = endpoints.get(kind)
+            if endpoint is None:
+                endpoint = endpoints[kind] = getattr(self._client_locked().tts, kind)()
+            return endpoint
+
+    def sse(self):
+        return PooledSSEClient(self, self.endpoint('SSEClient'))
+
+    def longform(self):
+        return self.endpoint('LongformInference')
+
+    def async_sse(self):
+        return AsyncPooledSSEClient(self, self.async_endpoint('AsyncSSEClient'))
+
+    def _track(self, delta):
+        with self._lock:
+            self.in_use += delta
+
+    @contextmanager
+    def connection(self):
+        """Hold one of max_connections upstream slots for a blocking call"""
+        with self._slots:
+            self._track(1)
+            try:
+                yield
+            finally:
+                self._track(-1)
+
+    @asynccontextmanager
+    async def async_connection(self):
+        """Hold one of max_connections upstream slots on this event loop without blocking it"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = asyncio.Semaphore(self.max_connections)
+        async with slots:
+            self._track(1)
+            try:
+                yield
+            finally:
+                self._track(-1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'connections_opened': self.connections_opened,
+                'connections_reused': self.connections_reused,
+                'in_use': self.in_use,
+                'max_connections': self.max_connections,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_client_pool(api_key=None):
+    """Process-wide ClientPool for an API key (NEUPHONIC_API_KEY by default)"""
+    api_key = api_key or os.getenv('NEUPHONIC_API_KEY')
+    with _pools_lock:
+        pool = _pools.get(api_key)
+        if pool is None:
+            pool = _pools[api_key] = ClientPool(api_key)
+        return pool
@@ -1,10 +1,14 @@
 import os
-from pyneuphonic import Neuphonic, TTSConfig
+from pyneuphonic import TTSConfig
 import json
-import time
 import requests
-import wave
 import asyncio
+from client_pool import get_client_pool
+from longform_jobs import get_longform_job_manager
+from wav_stream import concat_wav_files
+from downloads import DownloadError, download_to_file
+from resilience import RetryBudget, call_with_retry, check_response_status, download_breaker, neuphonic_breaker
+from script_parser import parse_script, validate_script
 
 semaphore = asyncio.Semaphore(3)
 
@@ -17,94 +21,68 @@ if not API_KEY:
     print("   Or create a .env file with: NEUPHONIC_API_KEY=your_actual_api_key")
     raise ValueError("Missing NEUPHONIC_API_KEY environment variable")
 
-def download_wav_from_presigned_url(job_id, presigned_url: str, output_path: str = 'output'):
+def download_wav_from_presigned_url(job_id, presigned_url: str, output_path: str = 'output', budget: RetryBudget = None):
     try:
-        response = requests.get(presigned_url)
-        response.raise_for_status()  # Raise exception for bad HTTP status
-        wav_data = response.content
-        if not wav_data:
-            print("No data received from presigned URL.")
-            return
-        file_path = output_path + f"/{job_id}.wav"
         if not os.path.exists(output_path):
             os.makedirs(output_path)
-        with open(file_path, 'wb') as f:
-            f.write(wav_data)
+        file_path = output_path + f"/{job_id}.wav"
+        # Streamed to disk in chunks over the shared keep-alive session
+        download = call_with_retry(download_to_file, presigned_url, file_path,
+                                   breaker=download_breaker, budget=budget, description=f"Download for job {job_id}")
+        print(f"Downloaded {download['bytes']} bytes for job {job_id} at {download['throughput_mb_s']:.1f} MB/s")
+    except DownloadError as e:
+        print(f"{e}")
     except requests.RequestException as e:
         print(f"Failed to download file: {e}")
 
 
 
-def generate_line(tts_client, text: str, voice_id: str = "None"):
+def generate_line(tts_client, text: str, voice_id: str = "None", budget: RetryBudget = None):
     tts_config = TTSConfig(lang_code='en', voice_id = voice_id)
-    response = tts_client.post(text=text, tts_config=tts_config)
-    response = json.loads(response.data)
-    if response["status_code"] != 200: 
-        raise Exception(f"Failed to generate job: {response['errors']}")
+    def post_job():
+        with get_client_pool(API_KEY).connection():
+            response = tts_client.post(text=text, tts_config=tts_config)
+        return check_response_status(json.loads(response.data), "Failed to generate job")
+    response = call_with_retry(post_job, breaker=neuphonic_breaker, budget=budget, description="Job submit")
     return response["data"]["job_id"]
 
-def process_script(input_path = None):
-    if input_path is None:
-        return []
-    content = []
-    with open(input_path, 'r') as file:
-        content = file.read()
-    results = []
-    splits= content.split('<')
-    for split in splits:
-        if '>' in split:
-            voice_name, text = split.split('>', 1)
-            results.append((voice_name.strip(), text.strip()))
-    return results
-
 def combine_audio_files(job_ids, output_path: str = 'output.wav'):
     output_file_path = os.path.join(output_path, 'podcast.wav')
-    with wave.open(output_file_path, 'wb') as output_wav:
-        output_wav.setnchannels(1)  # Mono
-        output_wav.setsampwidth(2)  # 16-bit samples
-        output_wav.setframerate(48000)  # Sample rate
-        for job_id in job_ids:
-            file_path = os.path.join(output_path, f"{job_id}.wav")
-            if os.path.exists(file_path):
-                with wave.open(file_path, 'rb') as input_wav:
-                    frames = input_wav.readframes(input_wav.getnframes())
-                    output_wav.writeframes(frames)
-            else:
-                print(f"Warning: File {file_path} does not exist. Skipping.")
+    file_paths = []
+    for job_id in job_ids:
+        file_path = os.path.join(output_path, f"{job_id}.wav")
+        if os.path.exists(file_path):
+            file_paths.append(file_path)
+        else:
+            print(f"Warning: File {file_path} does not exist. Skipping.")
+    # Validates every header first, then copies PCM in fixed-size blocks
+    concat_wav_files(file_paths, output_file_path, frame_rate=48000, channels=1, sample_width=2)
     print(f"Combined audio saved to {output_file_path}")
     
     
 
 def create_podcast_line(voice_name, text, output_path: str = 'output.wav', voice_name_to_id_mapping = None):
-    # Initialize the TTS client
-    client = Neuphonic(api_key=API_KEY)
-    tts = client.tts.LongformInference()
+    # Shared TTS endpoint - lines no longer each build their own client
+    tts = get_client_pool(API_KEY).longform()
     voice_id = voice_name_to_id_mapping[voice_name]
     print(f"Processing voice: {voice_name} with ID: {voice_id} and text: {text}")
-    job_id = generate_line(tts, text, voice_id=voice_id)
+    budget = RetryBudget()  # Shared by this line's submit, status checks and download
+    job_id = generate_line(tts, text, voice_id=voice_id, budget=budget)
     if job_id == None: 
         raise Exception(f"Failed to generate job for voice {voice_name} with text: {text}")
     print(f"Generated job ID: {job_id} for voice: {voice_id}")
     if job_id:
-        raw_response = tts.get(job_id)
-        response = json.loads(raw_response.data)
-        while response["status_code"] != 200:
-            print(f"Job {job_id} not ready yet, waiting...")
-            time.sleep(5)
-            raw_response = tts.get(job_id)
-            if raw_response.errors:
-                raise Exception(f"Error getting job {job_id}: {raw_response.errors}")
-            response = json.loads(raw_response.data)
-        if response["status_code"] == 200:
-            audio_url = response['data']['audio_url']
-            print(f"Presigned URL for job {job_id}: {audio_url}")
-            download_wav_from_presigned_url(job_id, audio_url,output_path)
-        else:
-            raise Exception(f"Failed to get presigned URL for job {job_id}: {response['errors']}")
+        # Wait on the shared polling loop rather than sleeping in this thread
+        job_result = get_longform_job_manager().submit(tts, job_id, text, budget).result()
+        audio_url = job_result['audio_url']
+        print(f"Presigned URL for job {job_id}: {audio_url}")
+        download_wav_from_presigned_url(job_id, audio_url,output_path, budget)
     return job_id
 
 async def create_podcast(input_path = None, output_path: str = 'output.wav', voice_name_to_id_mapping = None, concurrency_limit: int = 3):
-    processed_script = process_script(input_path)
+    # Unmapped speakers and empty lines fail here, before any job is submitted
+    validate_script(input_path, voice_name_to_id_mapping)
+    processed_script = parse_script(input_path)
     all_job_ids = [None] * len(processed_script)  # pre-allocate ordered list
     async def runner(index, voice_name, text):
         async with semaphore:
@@ -112,10 +90,14 @@ async def create_podcast(input_path = None, output_path: str = 'output.wav', voi
             if job_id is None:
                 raise Exception(f"Failed to create job for line {index}: {voice_name} with text: {text}")
             all_job_ids[index] = job_id  # store at correct position
-    tasks = [asyncio.create_task(runner(i, voice_name, text)) for i, (voice_name, text) in enumerate(processed_script)]
-    await asyncio.gather(*tasks)
+    tasks = [asyncio.create_task(runner(i, voice_name, text)) for i, voice_name, text, line in processed_script]
+    # One line failing after its retries must not cancel every other line
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"Line {index} failed after retries: {result}")
     print(f"All jobs completed. Job IDs: {all_job_ids}")
-    combine_audio_files(all_job_ids, output_path)
+    combine_audio_files([job_id for job_id in all_job_ids if job_id is not None], output_path)
 
 
 def main(input_path='script.txt', output_path='./podcast', voice_name_to_id_mapping=None):
@@ -1,9 +1,12 @@
-import asyncio, re, pathlib
-from pyneuphonic import Neuphonic, TTSConfig
+import asyncio, pathlib
+from pyneuphonic import TTSConfig
 from pyneuphonic._utils import async_save_audio
-from pydub import AudioSegment
-import glob
 import os
+import re
+from client_pool import get_client_pool
+from resilience import RetryBudget, async_call_with_retry, neuphonic_breaker
+from script_parser import iter_script, validate_script
+from segment_merger import merge_wav_files
 
 # Secure API key handling - use environment variable
 API_KEY = os.getenv('NEUPHONIC_API_KEY')
@@ -16,50 +19,49 @@ if not API_KEY:
 
 semaphore = asyncio.Semaphore(3) # I WOULD RECOMMEND NOT EXCEEDING 3 CONCURRENT REQUESTS
 
-def parse_script(path: str) -> list[tuple[str, str]]:
-    pat, out = re.compile(r"^\s*<([^>]+)>\s*(.+)$"), []
-    with open(path, encoding="utf-8") as fp:
-        for ln in fp:
-            m = pat.match(ln)
-            if m:
-                out.append((m.group(1).strip(), m.group(2).strip()))
-    return out
-
 async def synthesize(text: str, out_path: pathlib.Path, voice_id: str, speed: float = 0.9):
     async with semaphore:
-        client = Neuphonic(api_key=API_KEY)
-        sse      = client.tts.AsyncSSEClient()
+        sse      = get_client_pool(API_KEY).async_sse()  # Shared across lines on this event loop
         cfg      = TTSConfig(
             lang_code="en", 
             voice_id=voice_id,
             speed=speed  # Custom speed per voice
         )
-        resp     = sse.send(text, tts_config=cfg)
-        await async_save_audio(resp, str(out_path))
+        async def send_and_save():
+            # Each attempt opens a fresh stream and rewrites the whole file
+            async with get_client_pool(API_KEY).async_connection():
+                resp = sse.send(text, tts_config=cfg)
+                await async_save_audio(resp, str(out_path))
+        await async_call_with_retry(send_and_save, breaker=neuphonic_breaker, budget=RetryBudget(),
+                                    description=f"SSE synthesis for {out_path.name}")
         print(f"✅ Generated: {out_path.name} (speed: {speed}x)")
 
-def merge_segments(folder: str, outfile: str, gap_sec: float = 0.3,) -> None:
-    gap, podcast = AudioSegment.silent(int(gap_sec * 1000)), AudioSegment.silent(0)
-    seg_files = sorted([f for f in glob.glob(f"{folder}*.wav")])
-    print(f"🔗 Merging {len(seg_files)} segments...")
-    for i, fname in enumerate(seg_files):
-        print(f"  📄 Adding: {fname}")
-        seg = AudioSegment.from_wav(fname)
-        podcast += seg
-        if i < len(seg_files) - 1:
-            podcast += gap
-    podcast.export(outfile, format="wav")
-    print(f"🎉 Final podcast saved: {outfile}")
+def _segment_number(path):
+    """Leading segment index of a generated file (01_Alex.wav -> 1)"""
+    match = re.match(r"(\d+)_", os.path.basename(path))
+    return int(match.group(1)) if match else float("inf")
+
+def merge_segments(folder: str, outfile: str, gap_sec: float = 0.3, files=None) -> None:
+    # Script order: the files main() generated, or the folder sorted by segment number (not by name,
+    # which puts 100_ before 11_)
+    if files is None:
+        files = sorted((str(p) for p in pathlib.Path(folder).glob("[0-9]*_*.wav")), key=_segment_number)
+    files = [str(f) for f in files if os.path.exists(f)]
+    print(f"🔗 Merging {len(files)} segments...")
+    summary = merge_wav_files(files, outfile, gap_sec=gap_sec)
+    print(f"🎉 Final podcast saved: {outfile} ({summary['duration']:.1f}s)")
 
 async def main(script="script.txt", output_folder=""):
     # Create output folder if it doesn't exist
     os.makedirs(output_folder, exist_ok=True)
     
-    lines = parse_script(script)
-    print(f"🎬 Processing {len(lines)} segments...")
+    # Unmapped speakers and empty lines fail here, before any request is sent
+    summary = validate_script(script, VOICE_MAP)
+    print(f"🎬 Processing {summary['segments']} segments...")
     
-    tasks = []
-    for idx, (speaker, text) in enumerate(lines, 1):
+    tasks, paths = [], []
+    for segment in iter_script(script):
+        idx, speaker, text = segment.index + 1, segment.speaker, segment.text
         out_path = pathlib.Path(f"{output_folder}/{idx:02d}_{speaker}.wav")
         voice_id = VOICE_MAP.get(speaker)
         
@@ -69,11 +71,16 @@ async def main(script="script.txt", output_folder=""):
         if voice_id:
             print(f"📍 Queuing segment {idx}: {speaker} (speed: {speed}x) - {text[:50]}...")
             tasks.append(synthesize(text, out_path, voice_id, speed))
+            paths.append(out_path)
         else:
             print(f"❌ Voice '{speaker}' not found in mapping. Skipping.")
     
-    await asyncio.gather(*tasks)
-    print("✅ All segments generated!")
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    failed = [r for r in results if isinstance(r, Exception)]
+    for error in failed:
+        print(f"❌ Segment failed after retries: {error}")
+    print(f"✅ All segments generated! ({len(results) - len(failed)}/{len(results)} succeeded)")
+    return [path for path, result in zip(paths, results) if not isinstance(result, Exception)]
 
 if __name__ == "__main__":
     # Updated voice mapping to use Shiv_48k_A for Rowan
@@ -97,5 +104,6 @@ if __name__ == "__main__":
     print(f"🎙️ Alex = Alex_Demo (ID: {VOICE_MAP['Alex']}) - Speed: 0.7x (slow)")
     print(f"🎙️ Rowan = Shiv_48k_A (ID: {VOICE_MAP['Rowan']}) - Speed: 0.9x (normal-slow)")
     print("🏛️ Using Hadrian's Wall script (script4.txt)")
-    asyncio.run(main(script="script4.txt", output_folder=OUTPUTFOLDER))
-    merge_segments(folder=OUTPUTFOLDER, outfile=f"{OUTPUTFOLDER}/hadrians_wall_podcast.wav", gap_sec=0.3)
\ No newline at end of file
+    segment_files = asyncio.run(main(script="script4.txt", output_folder=OUTPUTFOLDER))
+    merge_segments(folder=OUTPUTFOLDER, outfile=f"{OUTPUTFOLDER}/hadrians_wall_podcast.wav", gap_sec=0.3,
+                   files=segment_files)
\ No newline at end of file
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Audio download subsystem
+Streams presigned-URL audio straight to disk over a shared keep-alive connection pool
+"""
+
+import os
+import time
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import DOWNLOAD_BYTES, DOWNLOAD_SECONDS
+
+# Tunable from the environment (.env)
+DOWNLOAD_POOL_SIZE = int(os.getenv('DOWNLOAD_POOL_SIZE', '16'))
+DOWNLOAD_CHUNK_BYTES = int(os.getenv('DOWNLOAD_CHUNK_BYTES', str(256 * 1024)))
+DOWNLOAD_MAX_RESUMES = int(os.getenv('DOWNLOAD_MAX_RESUMES', '3'))
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv('DOWNLOAD_CONNECT_TIMEOUT', '10'))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv('DOWNLOAD_READ_TIMEOUT', '60'))
+
+
+class DownloadError(Exception):
+    """A download finished without producing a usable file"""
+
+
+class IncompleteDownloadError(DownloadError):
+    """The connection closed before Content-Length bytes arrived"""
+
+
+class DownloadStats:
+    """Thread-safe throughput counters across all downloads in the process"""
+
+    def __init__(self):
+        self.downloads = 0
+        self.failures = 0
+        self.resumes = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, nbytes, seconds, resumes):
+        DOWNLOAD_SECONDS.labels(mode='longform').observe(seconds)  # Presigned URLs only come from longform jobs
+        DOWNLOAD_BYTES.labels(mode='longform').inc(nbytes)
+        with self._lock:
+            self.downloads += 1
+            self.bytes += nbytes
+            self.seconds += seconds
+            self.resumes += resumes
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'downloads': self.downloads,
+                'failures': self.failures,
+                'resumes': self.resumes,
+                'bytes': self.bytes,
+                'seconds': self.seconds,
+                'throughput_mb_s': (self.bytes / 1024 / 1024 / self.seconds) if self.seconds else 0.0,
+            }
+
+
+download_stats = DownloadStats()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_download_session():
+    """Process-wide keep-alive session with a bounded connection pool"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_POOL_SIZE, pool_block=True)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def _expected_total(response, offset):
+    """Total file size implied by the response headers, if the server told us"""
+    content_range = response.headers.get('Content-Range')
+    if content_range and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+
+def download_to_file(url, dest_path, session=None, chunk_size=DOWNLOAD_CHUNK_BYTES, max_resumes=DOWNLOAD_MAX_RESUMES):
+    """Stream url into dest_path in chunks, resuming with Range requests if the connection drops.
+    Returns {'bytes', 'seconds', 'resumes', 'throughput_mb_s'}."""
+    session = session or get_download_session()
+    dest_path = str(dest_path)
+    part_path = dest_path + '.part'
+    timeout = (DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_READ_TIMEOUT)
+
+    started = time.monotonic()
+    written = 0
+    resumes = 0
+
+    try:
+        with open(part_path, 'wb') as f:
+            while True:
+                headers = {'Range': f'bytes={written}-'} if written else {}
+                try:
+                    with session.get(url, stream=True, headers=headers, timeout=timeout) as response:
+                        response.raise_for_status()
+                        if written and response.status_code != 206:
+                            # Server ignored the Range header - start the file over
+                            f.seek(0)
+                            f.truncate()
+                            written = 0
+
+                        total = _expected_total(response, written)
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            if chunk:
+                                f.write(chunk)
+                                written += len(chunk)
+
+                        if total is not None and written < total:
+                            raise IncompleteDownloadError(f"Connection closed at byte {written} of {total}")
+                    break
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError, IncompleteDownloadError) as e:
+                    if resumes >= max_resumes:
+                        raise
+                    resumes += 1
+                    print(f"🔄 Download interrupted ({e}); resuming from byte {written}")
+
+        if written == 0:
+            raise DownloadError("No data received from presigned URL.")
+
+        os.replace(part_path, dest_path)
+    except Exception:
+        download_stats.record_failure()
+        if os.path.exists(part_path):
+            os.unlink(part_path)
+        raise
+
+    seconds = time.monotonic() - started
+    download_stats.record(written, seconds, resumes)
+    return {
+        'bytes': written,
+        'seconds': seconds,
+        'resumes': resumes,
+        'throughput_mb_s': (written / 1024 / 1024 / seconds) if seconds else 0.0,
+    }
+
+
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> client
+_async_clients_lock = threading.Lock()
+
+
+def get_async_download_client():
+    """Keep-alive httpx.AsyncClient for the running event loop, with the same bounded pool size"""
+    import asyncio
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=DOWNLOAD_POOL_SIZE, max_keepalive_connections=DOWNLOAD_POOL_SIZE),
+                timeout=httpx.Timeout(DOWNLOAD_READ_TIMEOUT, connect=DOWNLOAD_CONNECT_TIMEOUT),
+            )
+            _async_clients[loop] = client
+        return client
+
+
+async def async_download_to_file(url, dest_path, client=None, chunk_size=DOWNLOAD_CHUNK_BYTES,
+                                 max_resumes=DOWNLOAD_MAX_RESUMES):
+    """Non-blocking counterpart of download_to_file() built on httpx"""
+    import httpx
+
+    client = client or get_async_download_client()
+    dest_path = str(dest_path)
+    part_path = dest_path + '.part'
+
+    started = time.monotonic()
+    written = 0
+    resumes = 0
+
+    try:
+        with open(part_path, 'wb') as f:
+            while True:
+                headers = {'Range': f'bytes={written}-'} if written else {}
+                try:
+                    async with client.stream('GET', url, headers=headers) as response:
+                        response.raise_for_status()
+                        if written and response.status_code != 206:
+                            # Server ignored the Range header - start the file over
+                            f.seek(0)
+                            f.truncate()
+                            written = 0
+
+                        total = _expected_total(response, written)
+                        async for chunk in response.aiter_bytes(chunk_size):
+                            f.write(chunk)
+                            written += len(chunk)
+
+                        if total is not None and written < total:
+                            raise IncompleteDownloadError(f"Connection closed at byte {written} of {total}")
+                    break
+                except (httpx.TransportError, IncompleteDownloadError) as e:
+                    if resumes >= max_resumes:
+                        raise
+                    resumes += 1
+                    print(f"🔄 Download interrupted ({e}); resuming from byte {written}")
+
+        if written == 0:
+            raise DownloadError("No data received from presigned URL.")
+
+        os.replace(part_path, dest_path)
+    except BaseException:
+        download_stats.record_failure()
+        if os.path.exists(part_path):
+            os.unlink(part_path)
+        raise
+
+    seconds = time.monotonic() - started
+    download_stats.record(written, seconds, resumes)
+    return {
+        'bytes': written,
+        'seconds': seconds,
+        'resumes': resumes,
+        'throughput_mb_s': (written / 1024 / 1024 / seconds) if seconds else 0.0,
+    }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Background job queue for dialogue generation
+Jobs are accepted immediately and run on a fixed pool of worker threads
+"""
+
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+
+# Tunable from the environment (.env)
+DIALOGUE_QUEUE_MAX_DEPTH = int(os.getenv('DIALOGUE_QUEUE_MAX_DEPTH', '20'))
+DIALOGUE_WORKERS = int(os.getenv('DIALOGUE_WORKERS', '2'))
+DIALOGUE_JOBS_RETAINED = int(os.getenv('DIALOGUE_JOBS_RETAINED', '200'))
+
+FINISHED_SEGMENT_STATES = ('completed', 'cached', 'failed', 'skipped')
+
+
+class QueueFullError(Exception):
+    """The queue already holds its maximum number of waiting jobs"""
+
+
+class DialogueJob:
+    """State of one dialogue generation request"""
+
+    def __init__(self, params):
+        self.job_id = uuid.uuid4().hex
+        self.params = params
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.output_file = None
+        self.error = None
+        self.segments = {}  # segment index -> state
+        self._lock = threading.Lock()
+
+    def update_segment(self, index, state):
+        """Progress callback passed to create_podcast_from_script"""
+        with self._lock:
+            self.segments[index] = state
+
+    @property
+    def progress(self):
+        """Percentage of segments that have finished (successfully or not)"""
+        if self.status == 'completed':
+            return 100
+        with self._lock:
+            if not self.segments:
+                return 0
+            done = sum(1 for state in self.segments.values() if state in FINISHED_SEGMENT_STATES)
+            return int(100 * done / len(self.segments))
+
+    def to_dict(self):
+        with self._lock:
+            segments = [{'index': index, 'status': state} for index, state in sorted(self.segments.items())]
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'progress': self.progress,
+            'segments': segments,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+        }
+
+
+class DialogueJobQueue:
+    """Bounded FIFO of dialogue jobs served by background worker threads"""
+
+    def __init__(self, run_job, max_depth=DIALOGUE_QUEUE_MAX_DEPTH, workers=DIALOGUE_WORKERS,
+                 retained=DIALOGUE_JOBS_RETAINED):
+        self.run_job = run_job  # Callable(job) -> output file path (or None on failure)
+        self.max_depth = max_depth
+        self.workers = workers
+        self.retained = retained
+
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def _ensure_workers(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"dialogue-worker-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            print(f"👷 Started {self.workers} dialogue workers (queue depth {self.max_depth})")
+
+    def submit(self, params):
+        """Enqueue a job and return it straight away. Raises QueueFullError when the queue is full."""
+        self._ensure_workers()
+        job = DialogueJob(params)
+        with self._jobs_lock:
+            self._jobs[job.job_id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._jobs_lock:
+                del self._jobs[job.job_id]
+            raise QueueFullError(f"Dialogue queue is full ({self.max_depth} jobs waiting)")
+        self._forget_old_jobs()
+        return job
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        """How many queued jobs are ahead of this one"""
+        with self._jobs_lock:
+            ahead = 0
+            for other in self._jobs.values():
+                if other is job:
+                    return ahead
+                if other.status == 'queued':
+                    ahead += 1
+        return ahead
+
+    def stats(self):
+        with self._jobs_lock:
+            states = [job.status for job in self._jobs.values()]
+        return {
+            'queued': states.count('queued'),
+            'running': states.count('running'),
+            'completed': states.count('completed'),
+            'failed': states.count('failed'),
+            'workers': self.workers,
+            'max_depth': self.max_depth,
+        }
+
+    def _forget_old_jobs(self):
+        """Keep memory bounded by dropping the oldest finished jobs"""
+        with self._jobs_lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.status in ('completed', 'failed')]
+            for job_id in finished[:max(0, len(finished) - self.retained)]:
+                del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            job.status = 'running'
+            job.started_at = time.time()
+            print(f"🏃 Dialogue job {job.job_id} started")
+            try:
+                output_file = self.run_job(job)
+                if output_file:
+                    job.output_file = output_file
+                    job.status = 'completed'
+                else:
+                    job.error = 'Failed to generate dialogue'
+                    job.status = 'failed'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+            print(f"🏁 Dialogue job {job.job_id} {job.status} in {job.finished_at - job.started_at:.1f}s")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Longform job manager
+Polls every in-flight Longform Inference job from one asyncio loop instead of one sleeping thread per job
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import LONGFORM_JOB_POLLS, LONGFORM_JOB_SECONDS, voice_label
+from resilience import (
+    RETRYABLE_STATUS_CODES,
+    UpstreamError,
+    async_call_with_retry,
+    neuphonic_breaker,
+)
+
+# Polling behaviour can be tuned from the environment (.env)
+FIRST_CHECK_SECONDS = float(os.getenv('LONGFORM_FIRST_CHECK_SECONDS', '1.0'))
+MIN_POLL_SECONDS = float(os.getenv('LONGFORM_MIN_POLL_SECONDS', '1.0'))
+MAX_POLL_SECONDS = float(os.getenv('LONGFORM_MAX_POLL_SECONDS', '5.0'))
+MAX_WAIT_SECONDS = float(os.getenv('LONGFORM_MAX_WAIT_SECONDS', '900'))
+MAX_CONCURRENT_POLLS = int(os.getenv('LONGFORM_MAX_CONCURRENT_POLLS', '8'))
+
+# Rough synthesis throughput used to guess when a job should be done
+JOB_BASE_SECONDS = 2.0
+JOB_CHARS_PER_SECOND = 150.0
+
+PENDING_STATUS_CODES = (202, 400)  # Processing or "not complete yet"
+
+
+class LongformJobError(Exception):
+    """A longform job finished without producing audio"""
+
+
+def expected_job_duration(text):
+    """Estimate how long the upstream needs for a job from its text length"""
+    return JOB_BASE_SECONDS + len(text) / JOB_CHARS_PER_SECOND
+
+
+class LongformJobManager:
+    """Tracks submitted longform jobs and resolves a future per job once its audio URL is ready"""
+
+    def __init__(self, first_check=FIRST_CHECK_SECONDS, min_interval=MIN_POLL_SECONDS,
+                 max_interval=MAX_POLL_SECONDS, max_wait=MAX_WAIT_SECONDS,
+                 max_concurrent_polls=MAX_CONCURRENT_POLLS):
+        self.first_check = first_check
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_wait = max_wait
+        self.max_concurrent_polls = max_concurrent_polls
+
+        self._loop = None
+        self._thread = None
+        self._poll_slots = None
+        self._start_lock = threading.Lock()
+        # The SDK's tts.get() is blocking, so each poll borrows a thread only for the HTTP call itself
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_polls, thread_name_prefix='longform-poll')
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_loop(self):
+        """Start the shared polling loop on first use"""
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._poll_slots = asyncio.Semaphore(self.max_concurrent_polls)
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name='longform-jobs', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def submit(self, tts, job_id, text, budget=None, voice_id=None):
+        """Watch an already-posted job. Returns a concurrent.futures.Future resolving to
+        {'job_id', 'audio_url', 'polls', 'elapsed'}. voice_id only labels the job's metrics."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._watch(tts, job_id, text, budget, voice_id), loop)
+
+    def _next_delay(self, elapsed, expected, polls):
+        """Adaptive backoff: wait towards the expected finish time, then back off gradually"""
+        remaining = expected - elapsed
+        if remaining > 0:
+            return min(max(remaining, self.min_interval), self.max_interval)
+        overdue_backoff = self.min_interval * (1.5 ** polls)
+        return min(overdue_backoff, self.max_interval)
+
+    def _poll_once(self, tts, job_id):
+        get_response = tts.get(job_id)
+        get_data = json.loads(get_response.data)
+        status_code = get_data.get("status_code")
+        if status_code in RETRYABLE_STATUS_CODES:
+            raise UpstreamError(f"Status check for job {job_id} failed: {get_data}", status_code=status_code)
+        return get_data
+
+    async def _watch(self, tts, job_id, text, budget=None, voice_id=None):
+        loop = asyncio.get_running_loop()
+        expected = expected_job_duration(text)
+        started = time.monotonic()
+        polls = 0
+        delay = min(self.first_check, expected)
+        self.in_flight += 1
+
+        try:
+            while True:
+                await asyncio.sleep(delay)
+
+                async def poll():
+                    async with self._poll_slots:
+                        return await loop.run_in_executor(self._executor, self._poll_once, tts, job_id)
+
+                # Transient status-check failures are retried here rather than failing the job
+                get_data = await async_call_with_retry(
+                    poll, breaker=neuphonic_breaker, budget=budget,
+                    description=f"Status check for job {job_id}",
+                )
+                polls += 1
+                elapsed = time.monotonic() - started
+                status_code = get_data.get("status_code")
+
+                if status_code == 200:
+                    self.completed += 1
+                    labels = {'mode': 'longform', 'voice': voice_label(voice_id)}
+                    LONGFORM_JOB_SECONDS.labels(**labels).observe(elapsed)
+                    LONGFORM_JOB_POLLS.labels(**labels).observe(polls)
+                    return {
+                        'job_id': job_id,
+                        'audio_url': get_data['data']['audio_url'],
+                        'polls': polls,
+                        'elapsed': elapsed,
+                    }
+
+                if status_code not in PENDING_STATUS_CODES:
+                    raise LongformJobError(f"Job {job_id} failed: {get_data}")
+
+                if elapsed > self.max_wait:
+                    raise LongformJobError(f"Job {job_id} still processing after {elapsed:.0f}s")
+
+                delay = self._next_delay(elapsed, expected, polls)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self):
+        """Stop the polling loop (pending futures are cancelled)"""
+        with self._start_lock:
+            if self._loop is None:
+                return
+
+            def cancel_all():
+                for task in asyncio.all_tasks():
+                    task.cancel()
+
+            self._loop.call_soon_threadsafe(cancel_all)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
+        self._executor.shutdown(wait=False)
+
+
+# Shared across every backend instance in the process
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_longform_job_manager():
+    """Process-wide job manager so all pipelines share one polling loop"""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = LongformJobManager()
+        return _default_manager
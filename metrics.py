@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics
+Per-stage synthesis timings, request latency, in-flight gauges and cache hit ratios for /metrics.
+prometheus_client is optional: without it every metric is a no-op and /metrics reports it is off.
+"""
+
+import os
+import threading
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except ImportError:
+    Counter = Gauge = Histogram = generate_latest = None
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Tunable from the environment (.env)
+METRICS_ENABLED = generate_latest is not None and os.getenv('METRICS_ENABLED', '1') != '0'
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+POLL_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 64)
+
+
+class _NoopMetric:
+    """Accepts every metric call and records nothing"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(kind, name, documentation, labelnames=(), **kwargs):
+    if not METRICS_ENABLED:
+        return _NoopMetric()
+    return kind(name, documentation, labelnames, **kwargs)
+
+
+SUBMIT_SECONDS = _metric(Histogram, 'voice_studio_submit_seconds', 'Longform job submit latency, retries included',
+                         ['mode', 'voice'], buckets=LATENCY_BUCKETS)
+LONGFORM_JOB_SECONDS = _metric(Histogram, 'voice_studio_longform_job_seconds',
+                               'Time from submit until a longform job reports its audio ready',
+                               ['mode', 'voice'], buckets=LATENCY_BUCKETS)
+LONGFORM_JOB_POLLS = _metric(Histogram, 'voice_studio_longform_job_polls', 'Status checks per longform job',
+                             ['mode', 'voice'], buckets=POLL_BUCKETS)
+DOWNLOAD_SECONDS = _metric(Histogram, 'voice_studio_download_seconds', 'Presigned audio download time',
+                           ['mode'], buckets=LATENCY_BUCKETS)
+DOWNLOAD_BYTES = _metric(Counter, 'voice_studio_download_bytes', 'Audio bytes downloaded', ['mode'])
+SSE_FIRST_CHUNK_SECONDS = _metric(Histogram, 'voice_studio_sse_first_chunk_seconds', 'SSE time to first audio chunk',
+                                  ['mode', 'voice'], buckets=LATENCY_BUCKETS)
+COMBINE_SECONDS = _metric(Histogram, 'voice_studio_combine_seconds', 'Time to combine segments into one WAV',
+                          ['mode'], buckets=LATENCY_BUCKETS)
+DIALOGUE_SECONDS = _metric(Histogram, 'voice_studio_dialogue_seconds', 'End-to-end dialogue generation time',
+                           ['mode', 'outcome'], buckets=LATENCY_BUCKETS)
+REQUEST_SECONDS = _metric(Histogram, 'voice_studio_http_request_seconds', 'API request latency per endpoint',
+                          ['method', 'endpoint', 'status'], buckets=LATENCY_BUCKETS)
+IN_FLIGHT = _metric(Gauge, 'voice_studio_in_flight', 'Work in progress right now', ['kind'])
+CACHE_HIT_RATIO = _metric(Gauge, 'voice_studio_cache_hit_ratio', 'Hits / lookups since start', ['cache'])
+
+_collectors = []
+_collectors_lock = threading.Lock()
+
+
+def voice_label(voice_id):
+    return voice_id or 'unknown'
+
+
+def add_collector(collect):
+    """Register a callable run before each scrape, for gauges read from other components' stats()"""
+    with _collectors_lock:
+        _collectors.append(collect)
+
+
+def render():
+    """(body, content type) of the current metrics in the Prometheus text format, or None when disabled"""
+    if not METRICS_ENABLED:
+        return None
+    with _collectors_lock:
+        collectors = list(_collectors)
+    for collect in collectors:
+        try:
+            collect()
+        except Exception as e:
+            print(f"⚠️  Metrics collector failed: {e}")
+    return generate_latest(), CONTENT_TYPE_LATEST
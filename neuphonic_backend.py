@@ -5,8 +5,12 @@ Provides: Voice Cloning, Voice Listing, and Simple TTS Generation
 """
 
 import os
+import copy
 import json
+import time
 import argparse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 # Load environment variables from .env file
@@ -28,33 +32,108 @@ if API_KEY == "your_api_key_here":
 os.environ['NEUPHONIC_API_KEY'] = API_KEY
 
 try:
-    from pyneuphonic import Neuphonic, TTSConfig
+    from pyneuphonic import TTSConfig
 except ImportError:
     print("❌ pyneuphonic not installed. Run: pip install pyneuphonic")
     exit(1)
 
+from wav_stream import (
+    STREAMING_DATA_SIZE,
+    WAV_HEADER_BYTES,
+    WavFormatError,
+    concat_wav_files,
+    patch_wav_sizes,
+    validate_wav_files,
+    wav_header,
+)
+from segment_cache import SegmentCache, segment_cache_key
+from preview_cache import PreviewCache
+from client_pool import get_client_pool
+from metrics import COMBINE_SECONDS, SSE_FIRST_CHUNK_SECONDS, SUBMIT_SECONDS, voice_label
+from voice_catalog import VoiceCatalog
+from voice_mapping_store import VoiceMappingStore
+from script_parser import iter_script, validate_script
+from routing import LONGFORM, ROUTING_SSE_MAX_CHARS, SSE, SegmentRouter
+from resampler import iter_converted_pcm, resample_wav_file
+from artifacts import job_dir
+from storage_janitor import StorageJanitor
+from audio_postprocess import iter_postprocessed_pcm, postprocess_wav_files, silence_pcm
+from batch_planner import (
+    BATCH_LONGFORM_MAX_CHARS,
+    BATCH_SSE_MAX_CHARS,
+    plan_requests,
+    request_filename,
+    slice_merged_audio,
+)
+from longform_jobs import get_longform_job_manager
+from downloads import DownloadError, download_to_file
+from resilience import (
+    CircuitOpenError,
+    RetryBudget,
+    UpstreamError,
+    async_call_with_retry,
+    call_with_retry,
+    check_response_status,
+    download_breaker,
+    neuphonic_breaker,
+)
+
 class NeuphonicBackend:
     def __init__(self):
-        self.client = Neuphonic(api_key=API_KEY)
+        # One pooled client and set of TTS endpoints for the whole process, shared with the CLI pipelines
+        self.clients = get_client_pool(API_KEY)
+        self.client = self.clients.client
         self.output_dir = Path("outputs")
         self.voice_mapping_file = Path("voice_mapping.json")
         
         # Create outputs directory
         self.output_dir.mkdir(exist_ok=True)
         
+        # Keeps outputs/ under its quota; shared by every for_job view so jobs can pin their directories
+        self.storage = StorageJanitor(self.output_dir)
+        
+        # Speaker -> voice ID mapping kept in memory; the file is only re-read when it changes
+        self.voice_mappings = VoiceMappingStore(self.voice_mapping_file)
+        
+        # Voice list served locally; refreshed in the background once the TTL passes
+        self.voice_catalog = VoiceCatalog(lambda: self.client.voices.list().data['voices'])
+        
+        # Reuse audio for segments that were already synthesized with identical settings
+        self.segment_cache = SegmentCache()
+        
+        # Voice previews by (voice_id, text, rate); warmed in the background by the API server
+        self.preview_cache = PreviewCache(self._synthesize_preview)
+        
+        # Time-to-first-chunk and byte counts of recent SSE requests
+        self.sse_stats = deque(maxlen=200)
+        
+        # One asyncio loop polls every in-flight longform job
+        self.longform_jobs = get_longform_job_manager()
+        self.max_parallel_requests = int(os.getenv('LONGFORM_MAX_WORKERS', '8'))
+        
+        # Learns SSE/longform latency from every segment; used to route segments in hybrid mode
+        self.segment_router = SegmentRouter()
+        
         print("🚀 Neuphonic Backend initialized")
 
+    def for_job(self, job_id):
+        """A view of this backend that writes every file into outputs/jobs/<job_id>/.
+        Clients, caches, the voice mapping and the router stay shared with this backend."""
+        view = copy.copy(self)
+        view.output_dir = job_dir(self.output_dir, job_id)
+        view.output_dir.mkdir(parents=True, exist_ok=True)
+        return view
+
     def list_voices(self, show_cloned_only=False):
         """List all available voices"""
         try:
             print("🔍 Fetching voices...")
-            response = self.client.voices.list()
-            voices = response.data['voices']
             
             if show_cloned_only:
-                voices = [v for v in voices if v.get('type') == 'Cloned Voice']
+                voices = self.voice_catalog.by_type('Cloned Voice')
                 print(f"\n👥 Found {len(voices)} cloned voices:")
             else:
+                voices = self.voice_catalog.all()
                 print(f"\n📋 Found {len(voices)} total voices:")
             
             for voice in voices:
@@ -101,8 +180,9 @@ class NeuphonicBackend:
                 print(f"   Name: {voice_name}")
                 print(f"   ID: {voice_id}")
                 
-                # Update voice mapping
+                # Update voice mapping and make the new voice visible to lookups
                 self._update_voice_mapping(voice_name, voice_id)
+                self.voice_catalog.invalidate()
                 
                 return voice_id
             else:
@@ -113,6 +193,21 @@ class NeuphonicBackend:
             print(f"❌ Voice cloning failed: {str(e)}")
             return None
 
+    def generate_preview_audio(self, voice_id, text, output_filename="preview.wav"):
+        """Voice preview from the preview cache, synthesized on a miss. Short texts go over SSE
+        (first audio in well under a second), longer ones to longform, which SSE handles poorly."""
+        sampling_rate = 22050 if len(text) <= ROUTING_SSE_MAX_CHARS else 48000
+        return self.preview_cache.fetch(voice_id, text, sampling_rate, self.output_dir / output_filename)
+
+    def _synthesize_preview(self, voice_id, text, sampling_rate, output_path):
+        """Preview cache miss: synthesize one preview to output_path at the rate of the chosen mode"""
+        output_path = Path(output_path)
+        view = copy.copy(self)
+        view.output_dir = output_path.parent
+        if sampling_rate == 22050:
+            return view.generate_simple_audio(text, voice_id=voice_id, output_filename=output_path.name)
+        return view.generate_longform_audio(text, voice_id=voice_id, output_filename=output_path.name)
+
     def _save_high_quality_wav(self, audio_data, output_path, sampling_rate=48000):
         """Save audio data as high-quality WAV file with specified sampling rate"""
         import wave
@@ -128,10 +223,6 @@ class NeuphonicBackend:
     def generate_longform_audio(self, text, voice_name=None, voice_id=None, output_filename=None, speed=1.0):
         """Generate high-quality audio using Longform Inference (48kHz) - Developer's proven approach"""
         try:
-            import requests
-            import time
-            import json
-            
             # Determine voice_id
             if voice_id is None:
                 if voice_name is None:
@@ -148,98 +239,113 @@ class NeuphonicBackend:
             print(f"   Text: {text[:100]}{'...' if len(text) > 100 else ''}")
             print(f"   Voice ID: {voice_id}")
             
-            # Use Longform Inference with developer's proven config
-            tts = self.client.tts.LongformInference()
-            tts_config = TTSConfig(
-                lang_code='en', 
-                voice_id=voice_id,
-                sampling_rate=48000  # Match developer's sample exactly
-            )
-            
-            print("⏳ Submitting longform inference job...")
-            
-            # Post the job
-            post_response = tts.post(text=text, tts_config=tts_config)
-            response_data = json.loads(post_response.data)
-            
-            if response_data.get("status_code") != 200:
-                print(f"❌ Failed to submit job: {response_data}")
+            # Every upstream call for this job draws retries from one shared budget
+            budget = RetryBudget()
+            submitted = self._submit_longform_job(text, voice_id, budget)
+            if submitted is None:
                 return None
+            tts, job_id = submitted
             
-            job_id = response_data["data"]["job_id"]
-            print(f"✅ Job submitted successfully! Job ID: {job_id}")
-            
-            # Poll for completion using developer's proven approach
+            # The shared job manager polls with adaptive backoff instead of a fixed 5-second sleep
             print("⏳ Waiting for job completion...")
+            job_result = self.longform_jobs.submit(tts, job_id, text, budget, voice_id=voice_id).result()
             
-            # Developer's approach: continuous polling with 5-second intervals
-            while True:
-                print(f"🔍 Checking job status...")
-                get_response = tts.get(job_id)
-                get_data = json.loads(get_response.data)
-                
-                if get_data.get("status_code") == 200:
-                    # Job completed successfully
-                    audio_url = get_data['data']['audio_url']
-                    print(f"🎉 Audio generation completed!")
-                    print(f"📁 Signed URL: {audio_url}")
-                    
-                    # Download the audio file using developer's approach
-                    if not output_filename:
-                        import time
-                        timestamp = int(time.time())
-                        output_filename = f"longform_{timestamp}.wav"
-                    
-                    output_path = self.output_dir / output_filename
-                    
-                    print(f"⬇️ Downloading audio to {output_path}...")
-                    audio_response = requests.get(audio_url)
-                    audio_response.raise_for_status()
-                    
-                    # Direct file write like developer's sample
-                    if not audio_response.content:
-                        print("❌ No data received from presigned URL.")
-                        return None
-                        
-                    with open(output_path, 'wb') as f:
-                        f.write(audio_response.content)
-                    
-                    print(f"✅ High-quality 48kHz audio saved: {output_path}")
-                    return str(output_path)
-                
-                elif get_data.get("status_code") in [202, 400]:  # Processing or "not complete yet"
-                    print(f"⏳ Job still processing...")
-                    time.sleep(5)  # Developer's 5-second interval
-                else:
-                    # Job failed
-                    print(f"❌ Job failed: {get_data}")
-                    return None
+            return self._download_longform_audio(job_result['audio_url'], output_filename, budget)
                 
         except Exception as e:
             print(f"❌ Longform audio generation failed: {str(e)}")
             return None
 
+    def _submit_longform_job(self, text, voice_id, budget=None):
+        """Post a Longform Inference job. Returns (tts, job_id) or None if the upstream rejected it."""
+        import json
+        
+        # Use Longform Inference with developer's proven config
+        tts = self.clients.longform()
+        tts_config = TTSConfig(
+            lang_code='en', 
+            voice_id=voice_id,
+            sampling_rate=48000  # Match developer's sample exactly
+        )
+        
+        print("⏳ Submitting longform inference job...")
+        
+        def post_job():
+            with self.clients.connection():
+                post_response = tts.post(text=text, tts_config=tts_config)
+            return check_response_status(json.loads(post_response.data), "Longform job submit")
+        
+        # Post the job (transient upstream errors are retried with backoff)
+        started = time.monotonic()
+        try:
+            response_data = call_with_retry(
+                post_job, breaker=neuphonic_breaker, budget=budget, description="Longform job submit"
+            )
+        except (UpstreamError, CircuitOpenError) as e:
+            print(f"❌ Failed to submit job: {e}")
+            return None
+        finally:
+            SUBMIT_SECONDS.labels(mode='longform', voice=voice_label(voice_id)).observe(time.monotonic() - started)
+        
+        job_id = response_data["data"]["job_id"]
+        print(f"✅ Job submitted successfully! Job ID: {job_id}")
+        return tts, job_id
+
+    def _download_longform_audio(self, audio_url, output_filename=None, budget=None):
+        """Stream a finished longform job from its presigned URL into the outputs directory"""
+        print(f"🎉 Audio generation completed!")
+        print(f"📁 Signed URL: {audio_url}")
+        
+        # Download the audio file using developer's approach
+        if not output_filename:
+            timestamp = int(time.time())
+            output_filename = f"longform_{timestamp}.wav"
+        
+        output_path = self.output_dir / output_filename
+        
+        print(f"⬇️ Downloading audio to {output_path}...")
+        try:
+            # Chunked writes over the shared keep-alive pool; resumes with Range if the connection drops
+            download = call_with_retry(
+                download_to_file, audio_url, output_path,
+                breaker=download_breaker, budget=budget, description="Audio download"
+            )
+        except DownloadError as e:
+            print(f"❌ {e}")
+            return None
+        
+        print(f"✅ High-quality 48kHz audio saved: {output_path} "
+              f"({download['bytes'] / 1024 / 1024:.1f} MB at {download['throughput_mb_s']:.1f} MB/s)")
+        return str(output_path)
+
+    def _resolve_simple_voice_id(self, voice_name=None, voice_id=None):
+        """Voice for SSE generation: explicit ID, then the voice mapping, then the first English voice"""
+        # Determine voice_id
+        if voice_name and not voice_id:
+            voice_mapping = self._load_voice_mapping()
+            voice_id = voice_mapping.get(voice_name)
+            if not voice_id:
+                print(f"❌ Voice '{voice_name}' not found in mapping")
+                return None
+        
+        if not voice_id:
+            # Use first available English voice (local catalog lookup, no upstream round-trip)
+            default_voice = self.voice_catalog.default_voice('en')
+            if default_voice:
+                voice_id = default_voice['voice_id']
+                print(f"🎙️ Using default voice: {default_voice['name']}")
+            else:
+                print("❌ No English voices available")
+                return None
+        
+        return voice_id
+
     def generate_simple_audio(self, text, voice_name=None, voice_id=None, output_filename=None, speed=1.0):
         """Generate audio using simple TTS (SSE) - for shorter texts"""
         try:
-            # Determine voice_id
-            if voice_name and not voice_id:
-                voice_mapping = self._load_voice_mapping()
-                voice_id = voice_mapping.get(voice_name)
-                if not voice_id:
-                    print(f"❌ Voice '{voice_name}' not found in mapping")
-                    return None
-            
+            voice_id = self._resolve_simple_voice_id(voice_name, voice_id)
             if not voice_id:
-                # Use first available English voice
-                voices = self.client.voices.list().data['voices']
-                english_voices = [v for v in voices if v.get('lang_code') == 'en']
-                if english_voices:
-                    voice_id = english_voices[0]['voice_id']
-                    print(f"🎙️ Using default voice: {english_voices[0]['name']}")
-                else:
-                    print("❌ No English voices available")
-                    return None
+                return None
             
             print(f"🎵 Generating simple audio...")
             print(f"   Text: {text[:100]}{'...' if len(text) > 100 else ''}")
@@ -247,7 +353,7 @@ class NeuphonicBackend:
             print(f"   Speed: {speed}x")
             
             # Use SSE for simple generation
-            sse = self.client.tts.SSEClient()
+            sse = self.clients.sse()
             tts_config = TTSConfig(
                 lang_code='en', 
                 voice_id=voice_id,
@@ -257,7 +363,6 @@ class NeuphonicBackend:
             
             # Generate filename if not provided
             if not output_filename:
-                import time
                 timestamp = int(time.time())
                 output_filename = f"simple_{timestamp}.wav"
             
@@ -265,46 +370,48 @@ class NeuphonicBackend:
             
             print("⏳ Processing audio...")
             
-            # Actually generate the audio using SSE
-            audio_chunks = []
+            # Actually generate the audio using SSE, writing each chunk to disk as it arrives
+            sse_stats = {'voice_id': voice_id, 'chars': len(text), 'first_chunk_seconds': None, 'bytes': 0}
+            
+            def stream_to_file(f):
+                # A retry restarts the stream, so audio from a failed attempt is truncated away
+                f.seek(WAV_HEADER_BYTES)
+                f.truncate()
+                started = time.monotonic()
+                sse_stats['first_chunk_seconds'] = None
+                sse_stats['bytes'] = 0
+                with self.clients.connection():
+                    for chunk in sse.send(text, tts_config):  # Remove format='wav' parameter
+                        if hasattr(chunk, 'data') and chunk.data and hasattr(chunk.data, 'audio') and chunk.data.audio:
+                            if sse_stats['first_chunk_seconds'] is None:
+                                sse_stats['first_chunk_seconds'] = time.monotonic() - started
+                            f.write(chunk.data.audio)
+                            sse_stats['bytes'] += len(chunk.data.audio)
+                sse_stats['total_seconds'] = time.monotonic() - started
+            
             try:
-                for chunk in sse.send(text, tts_config):  # Remove format='wav' parameter
-                    if hasattr(chunk, 'data') and chunk.data and hasattr(chunk.data, 'audio') and chunk.data.audio:
-                        audio_chunks.append(chunk.data.audio)
+                # SSE returns raw PCM data: placeholder header now, sizes patched once the stream ends
+                with open(str(output_path), 'wb') as f:
+                    f.write(wav_header(22050, channels=1, sample_width=2))  # 22050Hz, 16-bit, mono
+                    call_with_retry(
+                        stream_to_file, f, breaker=neuphonic_breaker, budget=RetryBudget(), description="SSE synthesis"
+                    )
+                    patch_wav_sizes(f, sse_stats['bytes'])
                 
-                # Combine and save audio chunks
-                if audio_chunks:
-                    import wave
-                    import struct
-                    
-                    # SSE returns raw PCM data, so we need to concatenate it first
-                    raw_audio_data = b''.join(audio_chunks)
-                    
-                    # Write WAV file with proper header manually (more reliable than wave module for this case)
-                    with open(str(output_path), 'wb') as f:
-                        # WAV header for 22050Hz, 16-bit, mono
-                        f.write(b'RIFF')
-                        f.write(struct.pack('<I', 36 + len(raw_audio_data)))  # File size - 8
-                        f.write(b'WAVE')
-                        f.write(b'fmt ')
-                        f.write(struct.pack('<I', 16))  # Subchunk1Size (16 for PCM)
-                        f.write(struct.pack('<H', 1))   # AudioFormat (1 = PCM)
-                        f.write(struct.pack('<H', 1))   # NumChannels (1 = mono)
-                        f.write(struct.pack('<I', 22050))  # SampleRate
-                        f.write(struct.pack('<I', 22050 * 2))  # ByteRate (SampleRate * NumChannels * BitsPerSample/8)
-                        f.write(struct.pack('<H', 2))   # BlockAlign (NumChannels * BitsPerSample/8)
-                        f.write(struct.pack('<H', 16))  # BitsPerSample
-                        f.write(b'data')
-                        f.write(struct.pack('<I', len(raw_audio_data)))  # Data size
-                        f.write(raw_audio_data)  # Write the raw PCM data
-                    
+                if sse_stats['bytes']:
+                    self._record_sse_stats(sse_stats)
+                    print(f"⏱️  First audio chunk after {sse_stats['first_chunk_seconds'] * 1000:.0f}ms, "
+                          f"{sse_stats['bytes'] / 1024:.0f} KB in {sse_stats['total_seconds']:.2f}s")
                     print(f"✅ Audio saved to: {output_path}")
                     return str(output_path)
                 else:
+                    os.unlink(output_path)
                     print("❌ No audio chunks received")
                     return None
                     
             except Exception as sse_error:
+                if output_path.exists():
+                    output_path.unlink()  # Don't leave a half-written file behind
                 print(f"❌ SSE generation error: {sse_error}")
                 print("💡 Tip: SSE works best with shorter texts (under 500 characters)")
                 return None
@@ -313,197 +420,554 @@ class NeuphonicBackend:
             print(f"❌ Failed to generate simple audio: {str(e)}")
             return None
 
-    def _load_voice_mapping(self):
-        """Load voice name to ID mapping"""
-        if self.voice_mapping_file.exists():
-            with open(self.voice_mapping_file, 'r') as f:
-                return json.load(f)
-        return {}
+    async def stream_simple_audio(self, text, voice_id, speed=1.0, sampling_rate=22050):
+        """Stream SSE audio as a WAV byte stream - yields a streaming header plus the first chunk, then each chunk as it arrives"""
+        sse = self.clients.async_sse()
+        tts_config = TTSConfig(
+            lang_code='en', 
+            voice_id=voice_id,
+            sampling_rate=sampling_rate,
+            speed=speed
+        )
+        
+        async def open_stream():
+            # Only the wait for the first chunk can be retried - after that, audio is already on the wire
+            started = time.monotonic()
+            stream = sse.send(text, tts_config=tts_config)
+            async for chunk in stream:
+                if hasattr(chunk, 'data') and chunk.data and hasattr(chunk.data, 'audio') and chunk.data.audio:
+                    return stream, chunk.data.audio, time.monotonic() - started
+            raise UpstreamError("No audio chunks received", retryable=False)
+        
+        started = time.monotonic()
+        # The upstream slot is held for as long as audio is flowing
+        async with self.clients.async_connection():
+            stream, first_audio, first_chunk_seconds = await async_call_with_retry(
+                open_stream, breaker=neuphonic_breaker, budget=RetryBudget(), description="SSE stream"
+            )
+            print(f"⏱️  First streamed chunk after {first_chunk_seconds * 1000:.0f}ms")
+            # Observed now, so streams the client abandons still count
+            self._observe_sse_first_chunk(voice_id, first_chunk_seconds, streamed=True)
+        
+            # Data size is unknown up front, so use the streaming placeholder sizes
+            yield wav_header(sampling_rate, channels=1, sample_width=2, data_size=STREAMING_DATA_SIZE) + first_audio
+        
+            total_bytes = len(first_audio)
+            async for chunk in stream:
+                if hasattr(chunk, 'data') and chunk.data and hasattr(chunk.data, 'audio') and chunk.data.audio:
+                    total_bytes += len(chunk.data.audio)
+                    yield chunk.data.audio
+        
+        self.sse_stats.append({
+            'voice_id': voice_id,
+            'chars': len(text),
+            'first_chunk_seconds': first_chunk_seconds,
+            'total_seconds': time.monotonic() - started,
+            'bytes': total_bytes,
+            'streamed': True,
+        })
+
+    def _observe_sse_first_chunk(self, voice_id, seconds, streamed=False):
+        SSE_FIRST_CHUNK_SECONDS.labels(mode='sse_stream' if streamed else 'sse', voice=voice_label(voice_id)).observe(
+            seconds)
+
+    def _record_sse_stats(self, sse_stats):
+        """Keep one finished SSE request's timings and feed them to the first-chunk histogram"""
+        self.sse_stats.append(sse_stats)
+        if sse_stats.get('first_chunk_seconds') is not None:
+            self._observe_sse_first_chunk(sse_stats.get('voice_id'), sse_stats['first_chunk_seconds'])
+
+    def _load_voice_mapping(self, overrides=None):
+        """Voice name to ID mapping, with any per-request entries layered on top (not persisted)"""
+        return self.voice_mappings.resolve(overrides)
 
     def _update_voice_mapping(self, voice_name, voice_id):
         """Update voice mapping with new voice"""
-        mapping = self._load_voice_mapping()
-        mapping[voice_name] = voice_id
-        
-        with open(self.voice_mapping_file, 'w') as f:
-            json.dump(mapping, f, indent=4)
-        
+        self.voice_mappings.update({voice_name: voice_id})
         print(f"📝 Updated voice mapping: {voice_name} -> {voice_id}")
 
-    def combine_audio_files_hq(self, audio_files, output_filename="combined_48khz.wav", sampling_rate=48000):
-        """Combine multiple high-quality audio files - simplified approach"""
+    def _update_voice_mapping_bulk(self, voice_mapping):
+        """Update voice mapping with multiple entries"""
+        self.voice_mappings.update(voice_mapping)
+
+    def combine_audio_files_hq(self, audio_files, output_filename="combined_48khz.wav", sampling_rate=48000, postprocess=None):
+        """Combine multiple high-quality audio files - streamed in fixed-size blocks with constant memory
+
+        postprocess (PostprocessOptions) trims edge silence, levels loudness and inserts gaps between segments."""
         try:
-            import wave
             import os
             
             output_path = self.output_dir / output_filename
             
             print(f"🔗 Combining {len(audio_files)} audio files at {sampling_rate}Hz...")
             
-            with wave.open(str(output_path), 'wb') as output_wav:
-                output_wav.setnchannels(1)  # Mono
-                output_wav.setsampwidth(2)  # 16-bit samples
-                output_wav.setframerate(sampling_rate)  # Use high-quality sampling rate
-                
-                for i, file_path in enumerate(audio_files):
-                    if os.path.exists(file_path):
-                        print(f"  📄 Adding file {i+1}/{len(audio_files)}: {os.path.basename(file_path)}")
-                        with wave.open(file_path, 'rb') as input_wav:
-                            # Verify the input file has the expected sampling rate
-                            input_rate = input_wav.getframerate()
-                            if input_rate != sampling_rate:
-                                print(f"⚠️  Warning: File {file_path} has {input_rate}Hz, expected {sampling_rate}Hz")
-                            
-                            frames = input_wav.readframes(input_wav.getnframes())
-                            output_wav.writeframes(frames)
-                    else:
-                        print(f"❌ Warning: File {file_path} does not exist. Skipping.")
+            existing_files = []
+            for file_path in audio_files:
+                if os.path.exists(file_path):
+                    existing_files.append(file_path)
+                else:
+                    print(f"❌ Warning: File {file_path} does not exist. Skipping.")
             
+            # Every header is validated before the output is touched, so a bad segment fails fast;
+            # segments at another rate or sample width are resampled to the target on the way in
+            started = time.monotonic()
+            if postprocess:
+                combined = postprocess_wav_files(existing_files, output_path, sampling_rate, options=postprocess)
+                print(f"✂️  Post-processed: trimmed {combined['trimmed_seconds']:.1f}s of edge silence, "
+                      f"levelled to {postprocess.target_dbfs:g}dBFS, {postprocess.gap_seconds:g}s gaps")
+            else:
+                combined = concat_wav_files(
+                    existing_files,
+                    output_path,
+                    frame_rate=sampling_rate,
+                    channels=1,  # Mono
+                    sample_width=2  # 16-bit samples
+                )
+            
+            COMBINE_SECONDS.labels(mode='postprocess' if postprocess else 'concat').observe(time.monotonic() - started)
+            if combined.get('converted'):
+                print(f"🔄 Resampled {combined['converted']} segment(s) to {sampling_rate}Hz/16-bit mono")
             print(f"✅ High-quality combined audio saved: {output_path}")
-            print(f"📊 Final sampling rate: {sampling_rate}Hz")
+            print(f"📊 Final sampling rate: {sampling_rate}Hz ({combined['files']} files, {combined['duration']:.1f}s)")
             return str(output_path)
             
         except Exception as e:
             print(f"❌ Failed to combine audio files: {str(e)}")
             return None
 
-    def create_podcast_from_script(self, script_file, output_filename="podcast_48khz.wav", use_longform=False, speed_mapping=None, use_parallel=False):
-        """Create a complete podcast from a script file using high-quality 48kHz audio"""
+    def create_podcast_from_script(self, script_file, output_filename="podcast_48khz.wav", use_longform=False, speed_mapping=None, use_parallel=False, progress_callback=None, voice_mapping=None, use_hybrid=False, postprocess=None):
+        """Create a complete podcast from a script file using high-quality 48kHz audio
+        
+        progress_callback(segment_index, state) is called as each segment moves through
+        queued -> running -> completed / cached / failed / skipped.
+        voice_mapping entries apply to this podcast only and override the stored mapping.
+        use_hybrid routes each segment to SSE or longform, whichever is predicted to finish first,
+        runs them concurrently and brings SSE audio up to 48kHz (speed only applies to SSE segments).
+        postprocess (PostprocessOptions) trims, levels and spaces the segments when they are combined."""
         try:
             # Default speed mapping if none provided
             if speed_mapping is None:
                 speed_mapping = {}
             
-            # Process the script file (same format as your original)
-            def process_script(input_path):
-                with open(input_path, 'r') as file:
-                    content = file.read()
-                results = []
-                splits = content.split('<')
-                for split in splits:
-                    if '>' in split:
-                        voice_name, text = split.split('>', 1)
-                        results.append((voice_name.strip(), text.strip()))
-                return results
+            voice_mapping = self._load_voice_mapping(voice_mapping)
             
-            voice_mapping = self._load_voice_mapping()
-            processed_script = process_script(script_file)
+            # Unmapped speakers and empty lines are rejected before any job is submitted
+            total = validate_script(script_file, voice_mapping)['segments']
+            
+            report = progress_callback or (lambda index, state: None)
+            for i in range(total):
+                report(i, 'queued')
+            
+            segment_audio = self._iter_podcast_segments(script_file, voice_mapping, speed_mapping, use_longform, use_parallel, report, use_hybrid)
             
             # Choose processing method
-            if use_longform and use_parallel:
-                print(f"🎬 Creating podcast from {len(processed_script)} segments using PARALLEL LONGFORM...")
-                return self._create_podcast_parallel_longform(processed_script, voice_mapping, speed_mapping, output_filename)
+            if use_hybrid:
+                print(f"🎬 Creating podcast from {total} segments using HYBRID SSE/LONGFORM routing...")
+                return self._create_podcast_parallel_longform(segment_audio, output_filename, postprocess)
+            elif use_longform and use_parallel:
+                print(f"🎬 Creating podcast from {total} segments using PARALLEL LONGFORM...")
+                return self._create_podcast_parallel_longform(segment_audio, output_filename, postprocess)
             else:
-                print(f"🎬 Creating podcast from {len(processed_script)} segments using SEQUENTIAL processing...")
-                return self._create_podcast_sequential(processed_script, voice_mapping, speed_mapping, output_filename, use_longform)
+                print(f"🎬 Creating podcast from {total} segments using SEQUENTIAL processing...")
+                return self._create_podcast_sequential(segment_audio, output_filename, use_longform, postprocess)
                 
         except Exception as e:
             print(f"❌ Failed to create podcast: {str(e)}")
             return None
 
-    def _create_podcast_sequential(self, processed_script, voice_mapping, speed_mapping, output_filename, use_longform):
-        """Sequential processing (original method)"""
-        audio_files = []
+    def stream_podcast_from_script(self, script_file, use_longform=False, speed_mapping=None, use_parallel=False, progress_callback=None, voice_mapping=None, use_hybrid=False, postprocess=None):
+        """Yield the podcast as WAV bytes in script order while later segments are still generating.
+
+        The first yield is a streaming WAV header; each segment's PCM data follows as soon as
+        it and every earlier segment are finished. Failed or skipped segments are left out.
+        postprocess (PostprocessOptions) trims and levels each segment and inserts the gaps."""
+        if speed_mapping is None:
+            speed_mapping = {}
+
+        voice_mapping = self._load_voice_mapping(voice_mapping)
+        total = validate_script(script_file, voice_mapping)['segments']
+        sampling_rate = 48000 if use_longform or use_hybrid else 22050
+
+        report = progress_callback or (lambda index, state: None)
+        for i in range(total):
+            report(i, 'queued')
+
+        if use_hybrid:
+            method = "HYBRID SSE/LONGFORM routing"
+        else:
+            method = "PARALLEL LONGFORM" if use_longform and use_parallel else "SEQUENTIAL processing"
+        print(f"🎬 Streaming podcast from {total} segments using {method}...")
+        segments = self._iter_podcast_segments(script_file, voice_mapping, speed_mapping, use_longform, use_parallel, report, use_hybrid)
+
+        # Total length is unknown up front, so use the streaming placeholder sizes
+        yield wav_header(sampling_rate, channels=1, sample_width=2, data_size=STREAMING_DATA_SIZE)
+
+        started = time.monotonic()
+        streamed = 0
+        try:
+            for i, audio_file in segments:
+                if not audio_file:
+                    continue
+                try:
+                    info = validate_wav_files([audio_file], convert=True)[0]
+                except WavFormatError as e:
+                    print(f"❌ Segment {i+1} left out of stream: {e}")
+                    continue
+                if not streamed:
+                    print(f"⏱️  First dialogue audio after {time.monotonic() - started:.2f}s (segment {i+1})")
+                elif postprocess and postprocess.gap_seconds > 0:
+                    yield silence_pcm(int(round(postprocess.gap_seconds * sampling_rate)))
+                # Converted on the fly if this segment came back at another rate or sample width
+                if postprocess:
+                    blocks = iter_postprocessed_pcm(info, sampling_rate, options=postprocess)
+                else:
+                    blocks = iter_converted_pcm(info, sampling_rate)
+                for block in blocks:
+                    yield block
+                streamed += 1
+        finally:
+            segments.close()
+
+        self._print_cache_stats()
+        print(f"✅ Streamed {streamed}/{total} segments in {time.monotonic() - started:.1f}s")
+
+    def _segment_cache_key(self, text, voice_id, speed=1.0, use_longform=False):
+        """Cache key for a segment as it would be synthesized by the chosen mode"""
+        if use_longform:
+            # Longform ignores speed, so don't let it split the cache
+            return segment_cache_key(voice_id, text, 1.0, 48000, 'longform')
+        return segment_cache_key(voice_id, text, speed, 22050, 'sse')
+
+    def _load_cached_segment(self, cache_key, output_filename):
+        """Copy a cached segment into the outputs directory. Returns its path on a hit."""
+        output_path = self.output_dir / output_filename
+        if self.segment_cache.get(cache_key, output_path):
+            print(f"♻️  Cache hit: {output_filename}")
+            return str(output_path)
+        return None
+
+    def _generate_segment_cached(self, text, voice_id, output_filename, speed=1.0, use_longform=False):
+        """Generate one script segment, reusing cached audio when the same line was synthesized before.
+        Returns (audio_file or None, whether it came from the cache)."""
+        cache_key = self._segment_cache_key(text, voice_id, speed, use_longform)
+        cached_file = self._load_cached_segment(cache_key, output_filename)
+        if cached_file:
+            return cached_file, True
         
-        for i, (voice_name, text) in enumerate(processed_script):
-            print(f"\n📍 Processing segment {i+1}/{len(processed_script)}: {voice_name}")
+        started = time.monotonic()
+        if use_longform:
+            # Longform generation - don't pass speed (not working currently)
+            audio_file = self.generate_longform_audio(
+                text=text,
+                voice_id=voice_id,
+                output_filename=output_filename
+            )
+        else:
+            # Use SSE for faster generation (speed works here)
+            audio_file = self.generate_simple_audio(
+                text=text,
+                voice_id=voice_id,
+                output_filename=output_filename,
+                speed=speed
+            )
+        self.segment_router.record(LONGFORM if use_longform else SSE, text, time.monotonic() - started, ok=bool(audio_file))
+        
+        if audio_file:
+            self.segment_cache.put(cache_key, audio_file)
+        return audio_file, False
+
+    def _print_cache_stats(self):
+        """Report segment cache effectiveness for the current run"""
+        stats = self.segment_cache.stats()
+        print(f"📦 Segment cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MB)")
+
+    def _iter_podcast_segments(self, script_file, voice_mapping, speed_mapping, use_longform, use_parallel, report, use_hybrid=False):
+        """Plan upstream requests for the script, run them, and yield (segment_index, audio_file or None) in script order"""
+        planned = {}  # request index -> PlannedRequest, until its audio is sliced back into segments
+        # In hybrid mode long lines are routed to longform rather than split
+        max_chars = BATCH_LONGFORM_MAX_CHARS if use_longform or use_hybrid else BATCH_SSE_MAX_CHARS
+        
+        def requests():
+            for request in plan_requests(iter_script(script_file), max_chars=max_chars):
+                planned[request.index] = request
+                yield request
+        
+        report_request = self._request_reporter(planned.get, report)
+        if use_hybrid or (use_longform and use_parallel):
+            results = self._iter_parallel_segments(requests(), voice_mapping, speed_mapping, report_request, use_hybrid)
+        else:
+            results = self._iter_sequential_segments(requests(), voice_mapping, speed_mapping, use_longform, report_request)
+        
+        try:
+            yield from self._split_planned_audio(((planned.pop(i), audio_file) for i, audio_file in results), report)
+        finally:
+            results.close()
+
+    def _request_reporter(self, lookup_request, report):
+        """Progress callback for request indices that reports every script segment the request covers"""
+        def report_request(index, state):
+            request = lookup_request(index)
+            if request.part < request.part_count - 1 and state in ('completed', 'cached'):
+                return  # A line split across requests is only done once its last part is
+            for segment_index, length in request.segments:
+                report(segment_index, state)
+        return report_request
+
+    def _split_planned_audio(self, request_results, report):
+        """Turn (request, audio_file) pairs back into (segment_index, audio_file) pairs in script order"""
+        parts = []
+        for request, audio_file in request_results:
+            segment_indices = [segment_index for segment_index, length in request.segments]
+            if request.part_count > 1:
+                # A long line synthesized in pieces: join them once the last piece is in
+                parts.append(audio_file)
+                if request.part < request.part_count - 1:
+                    continue
+                yield segment_indices[0], self._join_request_parts(request, parts, report)
+                parts = []
+            elif len(segment_indices) > 1:
+                yield from zip(segment_indices, self._slice_merged_request(request, audio_file, report))
+            else:
+                yield segment_indices[0], audio_file
+
+    def _join_request_parts(self, request, part_files, report):
+        """Concatenate the pieces of one split line into its segment file"""
+        segment_index = request.segments[0][0]
+        output_path = self.output_dir / f"segment_{segment_index:03d}_{request.speaker}.wav"
+        try:
+            if not all(part_files):
+                print(f"❌ Segment {segment_index+1} is missing {part_files.count(None)} of {len(part_files)} parts")
+                report(segment_index, 'failed')
+                return None
+            concat_wav_files(part_files, output_path)
+            return str(output_path)
+        except Exception as e:
+            print(f"❌ Could not join the parts of segment {segment_index+1}: {e}")
+            report(segment_index, 'failed')
+            return None
+        finally:
+            for part_file in filter(None, part_files):
+                if os.path.exists(part_file):
+                    os.unlink(part_file)
+
+    def _slice_merged_request(self, request, audio_file, report):
+        """Cut a merged request's audio into one file per script segment"""
+        segment_indices = [segment_index for segment_index, length in request.segments]
+        if not audio_file:
+            return [None] * len(segment_indices)
+        
+        output_paths = [self.output_dir / f"segment_{i:03d}_{request.speaker}.wav" for i in segment_indices]
+        try:
+            return slice_merged_audio(audio_file, [length for i, length in request.segments], output_paths)
+        except Exception as e:
+            print(f"❌ Could not slice {os.path.basename(audio_file)} into segments: {e}")
+            for i in segment_indices:
+                report(i, 'failed')
+            return [None] * len(segment_indices)
+        finally:
+            os.unlink(audio_file)
+
+    def _iter_sequential_segments(self, requests, voice_mapping, speed_mapping, use_longform, report=None):
+        """Generate planned requests one at a time, yielding (request_index, audio_file or None) as each finishes.
+        requests is consumed lazily, so the script never has to be held in memory."""
+        report = report or (lambda index, state: None)
+        
+        for request in requests:
+            i, voice_name, text = request.index, request.speaker, request.text
+            covered = ', '.join(str(segment_index + 1) for segment_index, length in request.segments)
+            print(f"\n📍 Processing request {i+1}: {voice_name} (segment {covered})")
             
             voice_id = voice_mapping.get(voice_name)
             if not voice_id:
                 print(f"❌ Voice '{voice_name}' not found in mapping. Skipping.")
+                report(i, 'skipped')
+                yield i, None
                 continue
             
             # Determine speed for this segment
             speed = speed_mapping.get(voice_name, 1.0)
             
-            # Generate individual audio file
-            segment_filename = f"segment_{i:03d}_{voice_name}.wav"
-            if use_longform:
-                # Longform generation - don't pass speed (not working currently)
-                audio_file = self.generate_longform_audio(
-                    text=text,
-                    voice_id=voice_id,
-                    output_filename=segment_filename
-                )
-            else:
-                # Use SSE for faster generation (speed works here)
-                audio_file = self.generate_simple_audio(
-                    text=text,
-                    voice_id=voice_id,
-                    output_filename=segment_filename,
-                    speed=speed
-                )
+            # Generate individual audio file (or reuse a cached one)
+            segment_filename = request_filename(request)
+            report(i, 'running')
+            audio_file, cached = self._generate_segment_cached(
+                text=text,
+                voice_id=voice_id,
+                output_filename=segment_filename,
+                speed=speed,
+                use_longform=use_longform
+            )
             
             if audio_file:
-                audio_files.append(audio_file)
+                report(i, 'cached' if cached else 'completed')
             else:
-                print(f"❌ Failed to generate audio for segment {i+1}")
+                print(f"❌ Failed to generate audio for request {i+1}")
+                report(i, 'failed')
+            yield i, audio_file
+
+    def _create_podcast_sequential(self, segment_audio, output_filename, use_longform, postprocess=None):
+        """Sequential processing (original method)"""
+        audio_files = [audio_file for i, audio_file in segment_audio if audio_file]
+        
+        self._print_cache_stats()
         
         # Combine all segments
         if audio_files:
             # Use appropriate sampling rate based on generation method
             if use_longform:
                 # Longform uses 48kHz
-                final_podcast = self.combine_audio_files_hq(audio_files, output_filename, sampling_rate=48000)
+                final_podcast = self.combine_audio_files_hq(audio_files, output_filename, sampling_rate=48000, postprocess=postprocess)
             else:
                 # SSE uses 22kHz
-                final_podcast = self.combine_audio_files_hq(audio_files, output_filename, sampling_rate=22050)
+                final_podcast = self.combine_audio_files_hq(audio_files, output_filename, sampling_rate=22050, postprocess=postprocess)
             return final_podcast
         else:
             print("❌ No audio files were generated")
             return None
 
-    def _create_podcast_parallel_longform(self, processed_script, voice_mapping, speed_mapping, output_filename):
-        """Parallel longform processing with proper ordering"""
-        from concurrent.futures import ThreadPoolExecutor
+    def _iter_parallel_segments(self, requests, voice_mapping, speed_mapping, report=None, use_hybrid=False):
+        """Run every planned request in parallel, yielding (request_index, audio_file or None) in script order.
+        
+        A request is yielded as soon as it and every request before it have finished, so
+        consumers can use the start of the episode while later lines are still synthesizing.
+        Requests use longform unless use_hybrid, where the router picks SSE or longform for each
+        and SSE audio is resampled to longform's 48kHz."""
+        report = report or (lambda index, state: None)
         
         # Prepare tasks with original indices
         tasks = []
-        for i, (voice_name, text) in enumerate(processed_script):
+        finished = {}  # index -> audio file (None when skipped/failed), waiting for its turn
+        for request in requests:
+            i, voice_name, text = request.index, request.speaker, request.text
             voice_id = voice_mapping.get(voice_name)
             if voice_id:
                 speed = speed_mapping.get(voice_name, 1.0)
-                segment_filename = f"segment_{i:03d}_{voice_name}.wav"
+                segment_filename = request_filename(request)
                 tasks.append((i, voice_name, text, voice_id, speed, segment_filename))
             else:
                 print(f"❌ Voice '{voice_name}' not found in mapping. Skipping segment {i+1}.")
+                report(i, 'skipped')
+                finished[i] = None
         
-        if not tasks:
-            print("❌ No valid segments to process")
-            return None
+        if tasks:
+            print(f"🚀 Submitting {len(tasks)} {'routed' if use_hybrid else 'longform'} requests in parallel...")
+        
+        # Each segment gets its own retry budget shared by its submit, status checks and download
+        budgets = {task[0]: RetryBudget() for task in tasks}
+        started = {}
+        
+        def run_sse_segment(task_data):
+            """Synthesize over SSE right here and bring the audio up to 48kHz"""
+            i, voice_name, text, voice_id, speed, segment_filename = task_data
+            report(i, 'running')
+            audio_file, cached = self._generate_segment_cached(text, voice_id, segment_filename, speed=speed, use_longform=False)
+            if audio_file:
+                audio_file = resample_wav_file(audio_file, 48000)
+                print(f"✅ Segment {i+1} ({voice_name}) completed over SSE")
+                report(i, 'cached' if cached else 'completed')
+            else:
+                report(i, 'failed')
+            return (i, audio_file, None)
         
-        print(f"🚀 Submitting {len(tasks)} longform jobs in parallel...")
+        def submit_segment(task_data):
+            """Check the cache, otherwise post the job and hand it to the shared poller"""
+            i, voice_name, text, voice_id, speed, segment_filename = task_data
+            
+            try:
+                if use_hybrid and self.segment_router.choose(text) == SSE:
+                    return run_sse_segment(task_data)
+                
+                cache_key = self._segment_cache_key(text, voice_id, speed, use_longform=True)
+                cached_file = self._load_cached_segment(cache_key, segment_filename)
+                if cached_file:
+                    report(i, 'cached')
+                    return (i, cached_file, None)
+                
+                print(f"🎵 Starting segment {i+1}: {voice_name} - {text[:50]}...")
+                report(i, 'running')
+                budget = budgets[i]
+                started[i] = time.monotonic()
+                submitted = self._submit_longform_job(text, voice_id, budget)
+                if submitted is None:
+                    print(f"❌ Segment {i+1} ({voice_name}) failed")
+                    self.segment_router.record(LONGFORM, text, time.monotonic() - started[i], ok=False)
+                    report(i, 'failed')
+                    return (i, None, None)
+                
+                tts, job_id = submitted
+                return (i, None, self.longform_jobs.submit(tts, job_id, text, budget, voice_id=voice_id))
+                    
+            except Exception as e:
+                print(f"❌ Segment {i+1} ({voice_name}) error: {str(e)}")
+                report(i, 'failed')
+                return (i, None, None)
         
-        def generate_segment(task_data):
-            """Generate a single segment in parallel"""
+        def download_segment(task_data, job_future):
+            """Download a finished job and remember it in the segment cache"""
             i, voice_name, text, voice_id, speed, segment_filename = task_data
-            print(f"🎵 Starting segment {i+1}: {voice_name} - {text[:50]}...")
             
+            result = None
             try:
-                # Parallel longform generation - don't pass speed (not working currently)
-                result = self.generate_longform_audio(
-                    text=text,
-                    voice_id=voice_id,
-                    output_filename=segment_filename
-                )
+                job_result = job_future.result()
+                result = self._download_longform_audio(job_result['audio_url'], segment_filename, budgets[i])
                 
                 if result:
-                    print(f"✅ Segment {i+1} ({voice_name}) completed")
-                    return (i, result)  # Return with original index
+                    self.segment_cache.put(self._segment_cache_key(text, voice_id, speed, use_longform=True), result)
+                    print(f"✅ Segment {i+1} ({voice_name}) completed after {job_result['polls']} status checks")
+                    report(i, 'completed')
                 else:
                     print(f"❌ Segment {i+1} ({voice_name}) failed")
-                    return (i, None)
+                    report(i, 'failed')
                     
             except Exception as e:
                 print(f"❌ Segment {i+1} ({voice_name}) error: {str(e)}")
-                return (i, None)
+                report(i, 'failed')
+            
+            self.segment_router.record(LONGFORM, text, time.monotonic() - started[i], ok=bool(result))
+            return (i, result)  # Return with original index
         
-        # Run parallel generation
-        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
-            results = list(executor.map(generate_segment, tasks))
+        # A bounded pool only does the short submit/download calls, while waiting on the jobs
+        # happens in the job manager's single polling loop
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_parallel_requests, len(tasks))))
+        pending = {executor.submit(submit_segment, task): ('submit', task) for task in tasks}
+        next_index = 0
+        try:
+            while True:
+                # Hand over the finished prefix of the script
+                while next_index in finished:
+                    yield next_index, finished.pop(next_index)
+                    next_index += 1
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, task = pending.pop(future)
+                    if stage == 'submit':
+                        i, cached_file, job_future = future.result()
+                        if job_future is None:
+                            finished[i] = cached_file
+                        else:
+                            pending[job_future] = ('job', task)
+                    elif stage == 'job':
+                        pending[executor.submit(download_segment, task, future)] = ('download', task)
+                    else:
+                        i, result = future.result()
+                        finished[i] = result
+        finally:
+            # If the consumer stopped early, don't start downloads nobody will read
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _create_podcast_parallel_longform(self, segment_audio, output_filename, postprocess=None):
+        """Parallel longform processing with proper ordering"""
+        # Results arrive already sorted by original script order (critical!)
+        results = list(segment_audio)
         
-        # Sort results by original script order (critical!)
-        results.sort(key=lambda x: x[0])
+        segment_count = len(results)
+        if not segment_count:
+            print("❌ No valid segments to process")
+            return None
         
         # Extract successful audio files in correct order
         audio_files_ordered = []
@@ -514,7 +978,8 @@ class NeuphonicBackend:
                 audio_files_ordered.append(result)
                 successful_indices.append(i+1)
         
-        print(f"✅ Parallel processing completed: {len(audio_files_ordered)}/{len(tasks)} segments successful")
+        print(f"✅ Parallel processing completed: {len(audio_files_ordered)}/{segment_count} segments successful")
+        self._print_cache_stats()
         print(f"📋 Successful segments (in script order): {successful_indices}")
         
         if audio_files_ordered:
@@ -522,11 +987,12 @@ class NeuphonicBackend:
             final_podcast = self.combine_audio_files_hq(
                 audio_files_ordered, 
                 output_filename, 
-                sampling_rate=48000
+                sampling_rate=48000,
+                postprocess=postprocess
             )
             
-            if len(audio_files_ordered) < len(tasks):
-                failed_count = len(tasks) - len(audio_files_ordered)
+            if len(audio_files_ordered) < segment_count:
+                failed_count = segment_count - len(audio_files_ordered)
                 print(f"⚠️  Note: {failed_count} segments failed but podcast created with remaining segments in order")
             
             return final_podcast
@@ -621,8 +1087,7 @@ if __name__ == "__main__":
     }
     
     # Save the voice mapping
-    with open("voice_mapping.json", "w") as f:
-        json.dump(voice_mapping, f, indent=2)
+    backend._update_voice_mapping_bulk(voice_mapping)
     print("✅ Updated voice_mapping.json")
     
     # Test longform podcast creation
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Voice preview cache
+Previews keyed by (voice_id, text, sampling rate), filled on first use and warmed in the
+background for every catalog voice, so a repeat preview is a local file copy
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+from segment_cache import SegmentCache, segment_cache_key
+
+# Tunable from the environment (.env)
+PREVIEW_CACHE_DIR = os.getenv('PREVIEW_CACHE_DIR', 'cache/previews')
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv('PREVIEW_CACHE_MAX_BYTES', str(256 * 1024 ** 2)))  # 256 MB
+PREVIEW_WARM_WORKERS = int(os.getenv('PREVIEW_WARM_WORKERS', '2'))  # 0 disables background warming
+
+PREVIEW_DEFAULT_TEXT = "Hello, this is a voice preview."
+
+
+def preview_cache_key(voice_id, text, sampling_rate):
+    return segment_cache_key(voice_id, text, 1.0, sampling_rate, 'preview')
+
+
+class PreviewCache:
+    """Disk cache of voice previews with single-flight misses and background warming.
+
+    synthesize(voice_id, text, sampling_rate, output_path) writes one preview and returns its
+    path (or None). A click that arrives while the same preview is being warmed waits for that
+    synthesis instead of starting a second one.
+    """
+
+    def __init__(self, synthesize, cache_dir=PREVIEW_CACHE_DIR, max_bytes=PREVIEW_CACHE_MAX_BYTES,
+                 warm_workers=PREVIEW_WARM_WORKERS):
+        self._synthesize = synthesize
+        self.store = SegmentCache(cache_dir, max_bytes)
+        self.scratch_dir = Path(cache_dir) / 'warming'
+        self.warm_workers = warm_workers
+        self.warmed = 0
+        self.warm_failures = 0
+        self._pending = {}  # key -> Future set when its synthesis finishes
+        self._warming = set()  # keys queued or running in the warm pool
+        self._tasks = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def _synthesize_once(self, key, voice_id, text, sampling_rate, dest_path):
+        """Synthesize into dest_path unless another thread is already making this preview"""
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+
+        if not owner:
+            pending.result()
+            if self.store.get(key, dest_path):
+                return str(dest_path)
+            # That attempt failed (or the cache is disabled) - make our own
+            return self._synthesize(voice_id, text, sampling_rate, dest_path)
+
+        try:
+            audio_file = self._synthesize(voice_id, text, sampling_rate, dest_path)
+            if audio_file:
+                self.store.put(key, audio_file)
+            return audio_file
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set_result(None)
+
+    def fetch(self, voice_id, text, sampling_rate, dest_path):
+        """Write the preview to dest_path: a file copy when cached, otherwise synthesized (and cached).
+        Returns the path, or None if synthesis failed."""
+        key = preview_cache_key(voice_id, text, sampling_rate)
+        if self.store.get(key, dest_path):
+            return str(dest_path)
+        return self._synthesize_once(key, voice_id, text, sampling_rate, dest_path)
+
+    def _warm_one(self, key, voice_id, text, sampling_rate):
+        scratch_path = self.scratch_dir / f"{key}.wav"
+        try:
+            if key in self.store:
+                return
+            self.scratch_dir.mkdir(parents=True, exist_ok=True)
+            ok = self._synthesize_once(key, voice_id, text, sampling_rate, scratch_path)
+        except Exception as e:
+            ok = False
+            print(f"⚠️  Preview warm-up failed for {voice_id}: {e}")
+        finally:
+            scratch_path.unlink(missing_ok=True)
+            with self._lock:
+                self._warming.discard(key)
+        with self._lock:
+            if ok:
+                self.warmed += 1
+            else:
+                self.warm_failures += 1
+
+    def _work(self):
+        while True:
+            fn, args = self._tasks.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"⚠️  Preview warm-up task failed: {e}")
+
+    def _submit(self, fn, *args):
+        """Run fn on the warm pool (daemon threads, so a pending warm-up never delays shutdown)"""
+        with self._lock:
+            while len(self._workers) < self.warm_workers:
+                worker = threading.Thread(target=self._work, name=f'preview-warm-{len(self._workers)}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        self._tasks.put((fn, args))
+
+    def warm(self, voice_ids, text=PREVIEW_DEFAULT_TEXT, sampling_rate=22050):
+        """Queue background synthesis of the preview for each voice that isn't cached or queued yet"""
+        if self.warm_workers <= 0 or not self.store.enabled:
+            return 0
+        queued = 0
+        for voice_id in voice_ids:
+            key = preview_cache_key(voice_id, text, sampling_rate)
+            with self._lock:
+                if key in self._warming:
+                    continue
+                self._warming.add(key)
+            if key in self.store:
+                with self._lock:
+                    self._warming.discard(key)
+                continue
+            self._submit(self._warm_one, key, voice_id, text, sampling_rate)
+            queued += 1
+        return queued
+
+    def _warm_catalog(self, voice_catalog, text, sampling_rate):
+        try:
+            voice_ids = [voice['voice_id'] for voice in voice_catalog.all() if voice.get('voice_id')]
+        except Exception as e:
+            print(f"⚠️  Could not list voices to warm previews: {e}")
+            return
+        queued = self.warm(voice_ids, text, sampling_rate)
+        if queued:
+            print(f"🔥 Warming {queued} voice previews in the background")
+
+    def warm_catalog(self, voice_catalog, text=PREVIEW_DEFAULT_TEXT, sampling_rate=22050):
+        """Warm the default preview of every catalog voice without blocking the caller"""
+        if self.warm_workers > 0 and self.store.enabled:
+            self._submit(self._warm_catalog, voice_catalog, text, sampling_rate)
+
+    def stats(self):
+        with self._lock:
+            warming = {'warmed': self.warmed, 'warm_failures': self.warm_failures, 'warming': len(self._warming)}
+        return {**self.store.stats(), **warming}
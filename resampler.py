@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Sample-rate and sample-format conversion for WAV segments
+Brings SSE (22050Hz) and longform (48000Hz) audio - or any PCM rate, width and channel count -
+to a common format so they can be combined. Works block by block with NumPy, so memory stays flat.
+"""
+
+import os
+from math import ceil, gcd
+
+import numpy as np
+
+from wav_stream import COPY_BLOCK_BYTES, iter_wav_data, patch_wav_sizes, read_wav_info, wav_header
+
+# Tunable from the environment (.env)
+RESAMPLE_ZERO_CROSSINGS = int(os.getenv('RESAMPLE_ZERO_CROSSINGS', '16'))  # Filter half-length; more = sharper, slower
+RESAMPLE_MAX_PHASES = int(os.getenv('RESAMPLE_MAX_PHASES', '1024'))  # Odd ratios (44100->48001) share quantized phases
+
+ROLLOFF = 0.95  # Passband edge as a fraction of the lower Nyquist frequency
+KAISER_BETA = 8.6  # ~80dB stopband
+OUTPUT_CHUNK_FRAMES = 65536  # Bounds the index arrays built per pass, whatever the input block size
+
+
+class PolyphaseResampler:
+    """Streaming windowed-sinc resampler for float32 frames of shape (n, channels).
+    Feed blocks in order with process() and call flush() once at the end; filter state
+    carries across block boundaries, so output is identical however the input is chunked."""
+
+    def __init__(self, src_rate, dst_rate, channels=1, zero_crossings=RESAMPLE_ZERO_CROSSINGS,
+                 max_phases=RESAMPLE_MAX_PHASES):
+        divisor = gcd(src_rate, dst_rate)
+        self.up = dst_rate // divisor  # Output position advances by down/up input samples
+        self.down = src_rate // divisor
+        self.channels = channels
+
+        # Downsampling narrows the passband, so the kernel widens to keep the same attenuation
+        cutoff = min(1.0, self.up / self.down) * ROLLOFF
+        self.half = int(ceil(zero_crossings / cutoff))
+        self.phases = min(self.up, max_phases)
+
+        # One row of taps per fractional phase; taps cover input offsets -half+1 .. half
+        offsets = np.arange(-self.half + 1, self.half + 1, dtype=np.float64)
+        distance = offsets[None, :] - (np.arange(self.phases, dtype=np.float64) / self.phases)[:, None]
+        ratio = np.clip(distance / self.half, -1.0, 1.0)
+        window = np.i0(KAISER_BETA * np.sqrt(1.0 - ratio * ratio)) / np.i0(KAISER_BETA)
+        bank = cutoff * np.sinc(cutoff * distance) * window
+        bank /= bank.sum(axis=1, keepdims=True)  # Unity gain at DC for every phase
+        self._taps = np.ascontiguousarray(bank.T, dtype=np.float32)  # (taps, phases)
+
+        # Pending input, primed with silence so the first output sees a full look-behind
+        self._buffer = np.zeros((self.half - 1, channels), dtype=np.float32)
+        self._position = 0  # Next output's position in the buffer, in 1/up input samples
+        self._consumed = 0
+        self._produced = 0
+
+    def _run(self):
+        taps = 2 * self.half
+        last_start = len(self._buffer) - taps  # Latest buffer index a full tap window can start at
+        if last_start < 0:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        count = max(0, -(-((last_start + 1) * self.up - self._position) // self.down))
+        if not count:
+            return np.zeros((0, self.channels), dtype=np.float32)
+
+        out = np.zeros((count, self.channels), dtype=np.float32)
+        for first in range(0, count, OUTPUT_CHUNK_FRAMES):
+            positions = self._position + np.arange(first, min(count, first + OUTPUT_CHUNK_FRAMES),
+                                                   dtype=np.int64) * self.down
+            starts = positions // self.up
+            phases = (positions % self.up) * self.phases // self.up
+            chunk = out[first:first + len(positions)]
+            # One vectorized multiply-add per tap across every output in the chunk
+            for tap in range(taps):
+                chunk += self._taps[tap][phases][:, None] * self._buffer[tap:][starts]
+
+        # Keep only what the next output still needs
+        next_position = self._position + count * self.down
+        drop = next_position // self.up
+        self._buffer = self._buffer[drop:]
+        self._position = next_position - drop * self.up
+        self._produced += count
+        return out
+
+    def process(self, frames):
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, self.channels)
+        self._consumed += len(frames)
+        self._buffer = np.concatenate((self._buffer, frames))
+        return self._run()
+
+    def flush(self):
+        """Drain the filter; total output is ceil(input * dst_rate / src_rate) frames"""
+        expected = -(-self._consumed * self.up // self.down)
+        self._buffer = np.concatenate((self._buffer, np.zeros((self.half, self.channels), dtype=np.float32)))
+        out = self._run()
+        return out[:max(0, expected - (self._produced - len(out)))]
+
+
+def decode_pcm(data, sample_width, channels):
+    """Little-endian PCM bytes -> float32 frames (n, channels) in [-1, 1)"""
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        value = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = ((value << 8) >> 8).astype(np.float32) / 8388608.0  # Sign-extend 24 -> 32 bits
+    elif sample_width == 4:
+        samples = (np.frombuffer(data, dtype='<i4').astype(np.float64) / 2147483648.0).astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width * 8}-bit")
+    return samples.reshape(-1, channels)
+
+
+def encode_pcm(frames, sample_width):
+    """float32 frames -> little-endian PCM bytes, clipped to the target range"""
+    if sample_width not in (1, 2, 3, 4):
+        raise ValueError(f"Unsupported sample width: {sample_width * 8}-bit")
+    scale = float(1 << (sample_width * 8 - 1))  # Same scale decode_pcm divides by, so round trips are exact
+    values = np.clip(np.round(frames.astype(np.float64) * scale), -scale, scale - 1)
+    if sample_width == 1:
+        return (values + 128).astype(np.uint8).tobytes()
+    if sample_width == 3:
+        return values.astype('<i4').reshape(-1).view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return values.astype(f'<i{sample_width}').tobytes()
+
+
+def remix(frames, channels):
+    """Match channel count: average down to mono, or copy mono out to every channel"""
+    if frames.shape[1] == channels:
+        return frames
+    if channels == 1:
+        return frames.mean(axis=1, keepdims=True, dtype=np.float32)
+    if frames.shape[1] == 1:
+        return np.repeat(frames, channels, axis=1)
+    raise ValueError(f"Can't remix {frames.shape[1]} channels to {channels}")
+
+
+def iter_converted_pcm(info, frame_rate, channels=1, sample_width=2, block_size=COPY_BLOCK_BYTES,
+                       start_frame=0, end_frame=None, gain=1.0):
+    """Yield a WAV file's PCM data converted to frame_rate/channels/sample_width, in bounded blocks.
+    start_frame/end_frame select a range of the source and gain scales it on the way through.
+    Ranges already in the target format with unity gain are passed through untouched."""
+    if (info.frame_rate, info.channels, info.sample_width, gain) == (frame_rate, channels, sample_width, 1.0):
+        yield from iter_wav_data(info, block_size, start_frame, end_frame)
+        return
+
+    resampler = PolyphaseResampler(info.frame_rate, frame_rate, channels) if info.frame_rate != frame_rate else None
+    block_size = max(info.block_align, block_size - block_size % info.block_align)
+    for block in iter_wav_data(info, block_size, start_frame, end_frame):
+        frames = remix(decode_pcm(block, info.sample_width, info.channels), channels)
+        if gain != 1.0:
+            frames *= gain
+        if resampler:
+            frames = resampler.process(frames)
+        if len(frames):
+            yield encode_pcm(frames, sample_width)
+    if resampler:
+        tail = resampler.flush()
+        if len(tail):
+            yield encode_pcm(tail, sample_width)
+
+
+def resample_wav_file(src_path, target_rate, dst_path=None, block_size=COPY_BLOCK_BYTES):
+    """Write src_path at target_rate to dst_path (default: replace src_path). Memory stays bounded by block_size."""
+    info = read_wav_info(src_path)
+    dst_path = str(dst_path or src_path)
+    if info.frame_rate == target_rate and dst_path == str(src_path):
+        return dst_path
+
+    tmp_path = dst_path + '.resample.tmp'
+    written = 0
+    try:
+        with open(tmp_path, 'wb') as dst:
+            dst.write(wav_header(target_rate, info.channels, info.sample_width, 0))
+            for block in iter_converted_pcm(info, target_rate, info.channels, info.sample_width, block_size):
+                dst.write(block)
+                written += len(block)
+            patch_wav_sizes(dst, written)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return dst_path
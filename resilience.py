@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Shared resilience layer for upstream calls
+Exponential backoff with jitter, per-job retry budgets and circuit breakers
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+
+# Tunable from the environment (.env)
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '4'))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '20'))
+RETRY_BUDGET_PER_JOB = int(os.getenv('RETRY_BUDGET_PER_JOB', '10'))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', '30'))
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# The SDK reports SSE failures as plain exceptions: "Status 503 error received: ..."
+_STATUS_IN_MESSAGE = re.compile(r'\bStatus (\d{3})\b')
+
+
+class UpstreamError(Exception):
+    """An upstream call returned an error status"""
+
+    def __init__(self, message, status_code=None, retryable=None):
+        super().__init__(message)
+        self.status_code = status_code
+        if retryable is None:
+            retryable = status_code in RETRYABLE_STATUS_CODES
+        self.retryable = retryable
+
+
+class CircuitOpenError(Exception):
+    """The circuit breaker is open, so the call was not attempted"""
+
+
+def status_code_of(exc):
+    """Best-effort extraction of an HTTP status code from an exception"""
+    status_code = getattr(exc, 'status_code', None)
+    if status_code is not None:
+        return status_code
+    response = getattr(exc, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) is not None:
+        return response.status_code
+    match = _STATUS_IN_MESSAGE.search(str(exc))
+    return int(match.group(1)) if match else None
+
+
+def is_retryable(exc):
+    """Decide whether a failed call is worth another attempt"""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, UpstreamError):
+        return exc.retryable
+
+    status_code = status_code_of(exc)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+
+    # Connection resets, timeouts and similar transport failures (requests / httpx / stdlib)
+    if isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    transport_errors = ('ConnectionError', 'Timeout', 'TransportError', 'ChunkedEncodingError',
+                        'RemoteProtocolError', 'ReadError', 'ConnectError')
+    return any(cls.__name__.endswith(transport_errors) for cls in type(exc).__mro__)
+
+
+def check_response_status(response_data, description='Upstream call'):
+    """Raise UpstreamError unless a Neuphonic JSON response reports status 200"""
+    status_code = response_data.get("status_code")
+    if status_code != 200:
+        raise UpstreamError(f"{description} failed: {response_data}", status_code=status_code)
+    return response_data
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        """Delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class RetryBudget:
+    """Caps the total number of retries one job may spend across all of its calls"""
+
+    def __init__(self, max_retries=RETRY_BUDGET_PER_JOB):
+        self.max_retries = max_retries
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self):
+        with self._lock:
+            if self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, then lets a single probe through after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError if calls should not reach the upstream right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is open - upstream unavailable")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"Circuit '{self.name}' is half-open - waiting on probe call")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"✅ Circuit '{self.name}' closed - upstream recovered")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """The call was abandoned (cancelled, interrupted) without saying anything about upstream health"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"🚧 Circuit '{self.name}' opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def _should_retry(exc, attempt, policy, budget, description):
+    if not is_retryable(exc) or attempt >= policy.max_attempts:
+        return False
+    if budget is not None and not budget.try_spend():
+        print(f"⚠️  {description}: retry budget exhausted")
+        return False
+    return True
+
+
+def call_with_retry(fn, *args, policy=None, breaker=None, budget=None, description='Upstream call', **kwargs):
+    """Call fn(*args, **kwargs), retrying retryable failures with backoff"""
+    policy = policy or DEFAULT_POLICY
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            # Only failures that say something about upstream health count against the breaker
+            if breaker is not None:
+                if is_retryable(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if not _should_retry(e, attempt, policy, budget, description):
+                raise
+            delay = policy.backoff(attempt)
+            print(f"🔁 {description} failed ({e}); retry {attempt}/{policy.max_attempts - 1} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled or interrupted: free a half-open probe so later calls aren't locked out
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+async def async_call_with_retry(fn, *args, policy=None, breaker=None, budget=None, description='Upstream call', **kwargs):
+    """Await fn(*args, **kwargs), retrying retryable failures with backoff"""
+    policy = policy or DEFAULT_POLICY
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            if breaker is not None:
+                if is_retryable(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if not _should_retry(e, attempt, policy, budget, description):
+                raise
+            delay = policy.backoff(attempt)
+            print(f"🔁 {description} failed ({e}); retry {attempt}/{policy.max_attempts - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled or interrupted: free a half-open probe so later calls aren't locked out
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+# Shared breakers: one for the Neuphonic API, one for presigned audio downloads
+neuphonic_breaker = CircuitBreaker('neuphonic')
+download_breaker = CircuitBreaker('audio-download')
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Per-segment routing between SSE and longform
+Predicts each mode's latency from text length using observed timings and picks the faster one
+"""
+
+import os
+import threading
+
+from longform_jobs import JOB_BASE_SECONDS, JOB_CHARS_PER_SECOND, MIN_POLL_SECONDS
+
+# Tunable from the environment (.env)
+ROUTING_SSE_MAX_CHARS = int(os.getenv('ROUTING_SSE_MAX_CHARS', '500'))  # SSE gets fragile on longer text
+ROUTING_DECAY = float(os.getenv('ROUTING_DECAY', '0.9'))  # Weight kept by older observations
+ROUTING_PRIOR_WEIGHT = float(os.getenv('ROUTING_PRIOR_WEIGHT', '3'))
+
+SSE = 'sse'
+LONGFORM = 'longform'
+
+
+class LatencyModel:
+    """Online fit of seconds = overhead + per_char * chars, with older samples decaying away"""
+
+    def __init__(self, overhead, per_char, decay=ROUTING_DECAY, prior_weight=ROUTING_PRIOR_WEIGHT):
+        self.decay = decay
+        self.prior = (overhead, per_char)
+        self.observations = 0
+        self.failures = 0.0  # Decayed failure rate
+        # Weighted least-squares sums: the prior is two fixed pseudo-observations that keep the fit
+        # sane while data is scarce; real observations decay so recent behaviour dominates
+        self._prior = self._sums([(chars, overhead + per_char * chars, prior_weight / 2) for chars in (100, 1000)])
+        self._observed = [0.0] * 5
+
+    @staticmethod
+    def _sums(points):
+        sums = [0.0] * 5
+        for chars, seconds, weight in points:
+            for n, value in enumerate((1, chars, seconds, chars * chars, chars * seconds)):
+                sums[n] += weight * value
+        return sums
+
+    def record(self, chars, seconds, ok=True):
+        self.failures = self.failures * self.decay + (0.0 if ok else 1.0 - self.decay)
+        if ok:
+            point = self._sums([(chars, seconds, 1.0)])
+            self._observed = [old * self.decay + new for old, new in zip(self._observed, point)]
+            self.observations += 1
+
+    def coefficients(self):
+        w, sx, sy, sxx, sxy = (prior + observed for prior, observed in zip(self._prior, self._observed))
+        denominator = w * sxx - sx * sx
+        if abs(denominator) < 1e-9:
+            return self.prior
+        per_char = max(0.0, (w * sxy - sx * sy) / denominator)
+        overhead = max(0.0, (sy - per_char * sx) / w)
+        return overhead, per_char
+
+    def predict(self, chars):
+        """Expected seconds, inflated by the chance of having to retry"""
+        overhead, per_char = self.coefficients()
+        return (overhead + per_char * chars) / max(0.05, 1.0 - self.failures)
+
+
+class SegmentRouter:
+    """Chooses SSE or longform per segment and learns from how each call actually went"""
+
+    def __init__(self, sse_max_chars=ROUTING_SSE_MAX_CHARS):
+        self.sse_max_chars = sse_max_chars
+        self.models = {
+            # Priors: SSE streams almost immediately; longform pays job setup plus polling slack
+            SSE: LatencyModel(overhead=0.5, per_char=0.012),
+            LONGFORM: LatencyModel(overhead=JOB_BASE_SECONDS + MIN_POLL_SECONDS,
+                                   per_char=1.0 / JOB_CHARS_PER_SECOND),
+        }
+        self.routed = {SSE: 0, LONGFORM: 0}
+        self._lock = threading.Lock()
+
+    def choose(self, text):
+        """'sse' or 'longform' for this text"""
+        chars = len(text)
+        with self._lock:
+            if chars > self.sse_max_chars:
+                mode = LONGFORM
+            else:
+                mode = min((SSE, LONGFORM), key=lambda name: self.models[name].predict(chars))
+            self.routed[mode] += 1
+        return mode
+
+    def record(self, mode, text, seconds, ok=True):
+        with self._lock:
+            self.models[mode].record(len(text), seconds, ok)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    'routed': self.routed[name],
+                    'observations': model.observations,
+                    'failure_rate': model.failures,
+                    'overhead_seconds': model.coefficients()[0],
+                    'seconds_per_char': model.coefficients()[1],
+                }
+                for name, model in self.models.items()
+            }
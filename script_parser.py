@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Dialogue script parser
+Reads the `<Speaker> text` format lazily, one line at a time, for every pipeline
+"""
+
+import re
+from collections import namedtuple
+
+# "<Alex> Hello" and "<Alex>: Hello" both start a segment for Alex, wherever the tag sits on the line
+SPEAKER_TAG = re.compile(r'<([^<>]+)>\s*:?')
+
+ScriptSegment = namedtuple('ScriptSegment', 'index speaker text line')  # line is 1-based, where the tag appears
+
+
+class ScriptValidationError(ValueError):
+    """The script has problems that would only surface after paid API calls"""
+
+    def __init__(self, problems, max_listed=20):
+        self.problems = problems
+        listed = problems[:max_listed]
+        if len(problems) > max_listed:
+            listed.append(f"... and {len(problems) - max_listed} more")
+        super().__init__("Invalid script:\n  " + "\n  ".join(listed))
+
+
+def iter_script_lines(lines):
+    """Yield ScriptSegments from an iterable of lines without holding the whole script.
+
+    Every speaker tag begins a segment; following untagged, non-blank lines are continuations
+    of it. A tag left empty by another tag on the same line ("<Rowan><Alex> Hi") is dropped,
+    so the text goes to the last speaker. Text before the first tag is ignored."""
+    index = 0
+    speaker = None
+    parts = []
+    start_line = 0
+
+    for line_number, line in enumerate(lines, 1):
+        pieces = SPEAKER_TAG.split(line)  # [text, tag, text, tag, text, ...]
+        text = pieces[0].strip()
+        if text and speaker is not None:
+            parts.append(text)
+        for tag, text in zip(pieces[1::2], pieces[2::2]):
+            if speaker is not None and (parts or start_line != line_number):
+                yield ScriptSegment(index, speaker, ' '.join(parts), start_line)
+                index += 1
+            speaker = tag.strip()
+            text = text.strip()
+            parts = [text] if text else []
+            start_line = line_number
+
+    if speaker is not None:
+        yield ScriptSegment(index, speaker, ' '.join(parts), start_line)
+
+
+def iter_script(path):
+    """Lazily parse a script file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_script_lines(f)
+
+
+def parse_script(path):
+    """Parse a whole script file into a list of ScriptSegments"""
+    return list(iter_script(path))
+
+
+def validate_script(segments, voice_mapping=None):
+    """Check every segment before anything is synthesized.
+
+    Takes a path or an iterable of ScriptSegments. Raises ScriptValidationError listing
+    empty segments and speakers missing from voice_mapping (when given); otherwise returns
+    {'segments', 'speakers', 'chars'}."""
+    if isinstance(segments, str) or hasattr(segments, '__fspath__'):
+        segments = iter_script(segments)
+
+    problems = []
+    speakers = {}
+    count = 0
+    chars = 0
+    for segment in segments:
+        count += 1
+        chars += len(segment.text)
+        speakers[segment.speaker] = speakers.get(segment.speaker, 0) + 1
+        if not segment.text:
+            problems.append(f"line {segment.line}: <{segment.speaker}> has no text")
+        if voice_mapping is not None and not voice_mapping.get(segment.speaker):
+            problems.append(f"line {segment.line}: no voice mapped for speaker '{segment.speaker}'")
+
+    if not count:
+        problems.append("no <Speaker> lines found")
+    if problems:
+        raise ScriptValidationError(problems)
+
+    return {'segments': count, 'speakers': speakers, 'chars': chars}
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Content-addressed segment audio cache
+Stores synthesized segment WAVs on disk keyed by a hash of everything that affects the audio
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Defaults can be overridden from the environment (.env)
+DEFAULT_CACHE_DIR = os.getenv('SEGMENT_CACHE_DIR', 'cache/segments')
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv('SEGMENT_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))  # 2 GB
+
+
+def normalize_text(text):
+    """Collapse whitespace so cosmetic edits to a script don't invalidate its audio"""
+    return ' '.join(text.split())
+
+
+def segment_cache_key(voice_id, text, speed, sampling_rate, mode):
+    """Hash (voice_id, normalized text, speed, sampling_rate, mode) into a cache key"""
+    payload = json.dumps(
+        [voice_id, normalize_text(text), round(float(speed), 3), int(sampling_rate), mode],
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SegmentCache:
+    """Size-bounded LRU cache of segment audio files on disk"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # key -> size in bytes, least recently used first
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_existing()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.wav"
+
+    def _load_existing(self):
+        """Rebuild the LRU order from files left by previous runs (mtime = last use)"""
+        found = []
+        for path in self.cache_dir.glob('*/*.wav'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        with self._lock:
+            self._evict_locked()
+
+    def __contains__(self, key):
+        """Whether key is cached, without counting a lookup or touching its recency"""
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, dest_path):
+        """Copy a cached segment to dest_path. Returns True on a hit."""
+        if not self.enabled:
+            self.misses += 1
+            return False
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+
+        entry_path = self._entry_path(key)
+        try:
+            shutil.copyfile(entry_path, dest_path)
+            os.utime(entry_path)  # Persist recency for the next process
+        except OSError:
+            # Entry vanished underneath us - treat as a miss
+            with self._lock:
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._total_bytes -= size
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, src_path):
+        """Store a freshly synthesized segment under key"""
+        if not self.enabled:
+            return
+
+        try:
+            size = os.path.getsize(src_path)
+        except OSError:
+            return
+        if size > self.max_bytes:
+            return
+
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{threading.get_ident()}.tmp")
+        try:
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            print(f"⚠️  Could not cache segment {os.path.basename(str(src_path))}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict_locked()
+
+    def _evict_locked(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            self._entry_path(key).unlink(missing_ok=True)
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
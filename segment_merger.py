@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Linear-time segment merger
+Lays segments and silence gaps out in one preallocated WAV, in script order, with NumPy block copies
+"""
+
+import os
+
+import numpy as np
+
+from wav_stream import COPY_BLOCK_BYTES, WAV_HEADER_BYTES, WavFormatError, validate_wav_files, wav_header
+
+
+def sample_dtype(sample_width):
+    """NumPy dtype for little-endian PCM samples of this width"""
+    if sample_width == 1:
+        return np.dtype('u1')  # 8-bit WAV is unsigned
+    if sample_width in (2, 4):
+        return np.dtype(f'<i{sample_width}')
+    raise WavFormatError(f"Unsupported sample width: {sample_width * 8}-bit")
+
+
+def merge_wav_files(paths, output_path, gap_sec=0.3, frame_rate=None, channels=1, sample_width=2,
+                    block_size=COPY_BLOCK_BYTES):
+    """Merge WAV segments in the given order with gap_sec of silence between them.
+
+    The total length is computed from the headers first and the output is preallocated at
+    its final size (gaps are never written, they are the file's zero-filled holes), then each
+    segment is copied to its offset in fixed-size sample blocks. Time is linear in the output
+    length and memory is one block. Returns {'files', 'bytes', 'frames', 'duration', 'gap_frames'}."""
+    infos = validate_wav_files(paths, frame_rate, channels, sample_width)
+    if not infos:
+        raise WavFormatError("No input segments to merge")
+    frame_rate = infos[0].frame_rate
+
+    dtype = sample_dtype(sample_width)
+    block_align = channels * sample_width
+    gap_frames = max(0, int(round(gap_sec * frame_rate)))
+    block_samples = max(channels, (block_size // block_align) * channels)
+
+    # Where each segment lands in the output data chunk, in frames
+    offsets = []
+    total_frames = 0
+    for n, info in enumerate(infos):
+        if n:
+            total_frames += gap_frames
+        offsets.append(total_frames)
+        total_frames += info.nframes
+    data_size = total_frames * block_align
+
+    output_path = str(output_path)
+    tmp_path = output_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as out:
+            out.write(wav_header(frame_rate, channels, sample_width, data_size))
+            out.truncate(WAV_HEADER_BYTES + data_size)  # Preallocate; unwritten ranges read back as silence
+            if sample_width == 1 and gap_frames:
+                # 8-bit silence is 0x80, not zero - fill the gaps explicitly
+                silence = np.full(gap_frames * channels, 0x80, dtype=dtype)
+                for offset in offsets[1:]:
+                    out.seek(WAV_HEADER_BYTES + (offset - gap_frames) * block_align)
+                    silence.tofile(out)
+
+            for info, offset in zip(infos, offsets):
+                remaining = info.nframes * channels
+                out.seek(WAV_HEADER_BYTES + offset * block_align)
+                with open(info.path, 'rb') as src:
+                    src.seek(info.data_offset)
+                    while remaining > 0:
+                        block = np.fromfile(src, dtype=dtype, count=min(block_samples, remaining))
+                        if not block.size:
+                            break
+                        block.tofile(out)
+                        remaining -= block.size
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return {
+        'files': len(infos),
+        'bytes': data_size,
+        'frames': total_frames,
+        'duration': total_frames / frame_rate,
+        'gap_frames': gap_frames,
+    }
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Disk-quota janitor for the outputs directory
+Expires generated files by class (segments, previews, final audio), evicts least recently
+accessed files when over quota, and never touches files that a job or download has pinned
+"""
+
+import os
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# Tunable from the environment (.env); a TTL or quota of 0 disables that rule
+STORAGE_MAX_BYTES = int(os.getenv('STORAGE_MAX_BYTES', str(5 * 1024 ** 3)))  # 5 GB
+STORAGE_SEGMENT_TTL_SECONDS = float(os.getenv('STORAGE_SEGMENT_TTL_SECONDS', '3600'))
+STORAGE_PREVIEW_TTL_SECONDS = float(os.getenv('STORAGE_PREVIEW_TTL_SECONDS', '86400'))
+STORAGE_FINAL_TTL_SECONDS = float(os.getenv('STORAGE_FINAL_TTL_SECONDS', str(7 * 86400)))
+STORAGE_SWEEP_SECONDS = float(os.getenv('STORAGE_SWEEP_SECONDS', '300'))
+
+GRACE_SECONDS = 60  # Files and directories this fresh may still be being written
+SEGMENT = 'segment'
+PREVIEW = 'preview'
+FINAL = 'final'
+
+
+def classify(filename):
+    """'segment' for per-line intermediates, 'preview' for voice previews, 'final' for everything else"""
+    if filename.startswith(('segment_', 'batch_')):
+        return SEGMENT
+    if filename.startswith('preview'):
+        return PREVIEW
+    return FINAL
+
+
+class StorageJanitor:
+    """Keeps a directory tree under a byte quota with per-class TTLs and access-time LRU eviction"""
+
+    def __init__(self, root, max_bytes=STORAGE_MAX_BYTES, ttls=None, interval=STORAGE_SWEEP_SECONDS):
+        self.root = os.path.abspath(str(root))
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {
+            SEGMENT: STORAGE_SEGMENT_TTL_SECONDS,
+            PREVIEW: STORAGE_PREVIEW_TTL_SECONDS,
+            FINAL: STORAGE_FINAL_TTL_SECONDS,
+        }
+        self.interval = interval
+        self.deleted = Counter()  # reason -> files
+        self.freed_bytes = 0
+        self.last_sweep = None
+        self._usage = {'files': 0, 'bytes': 0}
+        self._pins = Counter()  # absolute path -> holders
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def pin(self, path):
+        with self._lock:
+            self._pins[os.path.abspath(str(path))] += 1
+
+    def unpin(self, path):
+        key = os.path.abspath(str(path))
+        with self._lock:
+            self._pins[key] -= 1
+            if self._pins[key] <= 0:
+                del self._pins[key]
+
+    @contextmanager
+    def pinned(self, path):
+        """Protect a file, or a whole job directory, from deletion for the duration of the block"""
+        self.pin(path)
+        try:
+            yield
+        finally:
+            self.unpin(path)
+
+    def hold(self, path, iterable):
+        """Iterate iterable (e.g. a response body) with path pinned until it is exhausted or closed"""
+        with self.pinned(path):
+            yield from iterable
+
+    def _is_pinned_locked(self, path):
+        while len(path) >= len(self.root):
+            if path in self._pins:
+                return True
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return False
+
+    def touch(self, path):
+        """Record an access (atime only, so ETags keyed on mtime stay valid) for LRU eviction"""
+        try:
+            stat = os.stat(path)
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        except OSError:
+            pass
+
+    def _scan(self):
+        """Every file under root as (last_access, size, path, class, fresh)"""
+        now = time.time()
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Removed while we were looking
+                last_access = max(stat.st_atime, stat.st_mtime)
+                files.append((last_access, stat.st_size, path, classify(name), now - stat.st_mtime < GRACE_SECONDS))
+        return files
+
+    def _delete(self, path, reason):
+        """Unlink unless pinned; the pin check and unlink happen under the lock so a new pin can't race it"""
+        with self._lock:
+            if self._is_pinned_locked(path):
+                return False
+            try:
+                size = os.path.getsize(path)
+                os.unlink(path)
+            except OSError:
+                return False
+            self.deleted[reason] += 1
+            self.freed_bytes += size
+        return True
+
+    def _remove_empty_dirs(self):
+        """Drop emptied job directories so the tree (and listing it) doesn't keep growing"""
+        now = time.time()
+        for dirpath, _, _ in os.walk(self.root, topdown=False):
+            if dirpath == self.root:
+                continue
+            with self._lock:
+                if self._is_pinned_locked(dirpath):
+                    continue
+                try:
+                    if not os.listdir(dirpath) and now - os.stat(dirpath).st_mtime >= GRACE_SECONDS:
+                        os.rmdir(dirpath)
+                except OSError:
+                    pass
+
+    def sweep(self):
+        """One pass: drop expired files, then least recently accessed ones until under quota"""
+        now = time.time()
+        kept = []
+        for last_access, size, path, file_class, fresh in self._scan():
+            ttl = self.ttls.get(file_class, 0)
+            if not fresh and ttl and now - last_access > ttl and self._delete(path, f'expired_{file_class}'):
+                continue
+            kept.append((last_access, size, path, fresh))
+
+        total = sum(size for _, size, _, _ in kept)
+        count = len(kept)
+        if self.max_bytes and total > self.max_bytes:
+            for last_access, size, path, fresh in sorted(kept):
+                if total <= self.max_bytes:
+                    break
+                if not fresh and self._delete(path, 'quota'):
+                    total -= size
+                    count -= 1
+
+        self._remove_empty_dirs()
+        with self._lock:
+            self._usage = {'files': count, 'bytes': total}
+            self.last_sweep = time.time()
+        return total
+
+    def _run(self):
+        while True:  # First sweep right away - the disk may already be full
+            try:
+                started = time.monotonic()
+                before = sum(self.deleted.values())
+                total = self.sweep()
+                removed = sum(self.deleted.values()) - before
+                if removed:
+                    print(f"🧹 Storage sweep removed {removed} files in {time.monotonic() - started:.2f}s "
+                          f"({total / 1024 / 1024:.0f} MB in use)")
+            except Exception as e:
+                print(f"⚠️  Storage sweep failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """Sweep in a daemon thread every interval seconds (request handling never waits on it)"""
+        with self._lock:
+            if self._thread or self.interval <= 0:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='storage-janitor', daemon=True)
+            self._thread.start()
+        print(f"🧹 Storage janitor watching {self.root} (quota {self.max_bytes / 1024 ** 3:.1f} GB, "
+              f"sweep every {self.interval:g}s)")
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._usage,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': dict(self.ttls),
+                'pinned': len(self._pins),
+                'deleted': dict(self.deleted),
+                'freed_bytes': self.freed_bytes,
+                'last_sweep': self.last_sweep,
+            }
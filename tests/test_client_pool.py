@@ -0,0 +1,64 @@
+import asyncio
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from pyneuphonic._sse import AsyncSSEClient, SSEClient
+
+from client_pool import AsyncPooledSSEClient, ClientPool, PooledSSEClient
+
+AUDIO = b'\x01\x00' * 100
+
+
+class SpeakHandler(BaseHTTPRequestHandler):
+    """Answers /sse/speak/<lang> with two SSE audio messages over a keep-alive connection"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        message = json.dumps({'status_code': 200, 'data': {'audio': base64.b64encode(AUDIO).decode()}})
+        body = f"event: message\ndata: {message}\n\n".encode() * 2
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SpeakHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"localhost:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_sse_calls_reuse_one_keepalive_connection(base_url):
+    pool = ClientPool('test-key')
+    sse = PooledSSEClient(pool, SSEClient(api_key='test-key', base_url=base_url))
+    for _ in range(3):
+        chunks = list(sse.send("Hello", {'voice_id': 'v1'}))
+        assert [chunk.data.audio for chunk in chunks] == [AUDIO, AUDIO]
+    assert pool.stats()['connections_opened'] == 1
+    assert pool.stats()['connections_reused'] == 2
+
+
+def test_async_sse_calls_reuse_one_keepalive_connection(base_url):
+    pool = ClientPool('test-key')
+
+    async def scenario():
+        sse = AsyncPooledSSEClient(pool, AsyncSSEClient(api_key='test-key', base_url=base_url))
+        for _ in range(3):
+            chunks = [chunk async for chunk in sse.send("Hello", {'voice_id': 'v1'})]
+            assert [chunk.data.audio for chunk in chunks] == [AUDIO, AUDIO]
+        await pool.async_http_client().aclose()
+
+    asyncio.run(scenario())
+    assert pool.stats()['connections_opened'] == 1
+    assert pool.stats()['connections_reused'] == 2
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+import audio_encoding
+
+# Stands in for ffmpeg: lists a FLAC encoder and passes PCM straight through
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys
+if '-encoders' in sys.argv:
+    print(" A....D flac                 FLAC")
+    sys.exit(0)
+while True:
+    block = sys.stdin.buffer.read1(4096)
+    if not block:
+        break
+    sys.stdout.buffer.write(block)
+    sys.stdout.buffer.flush()
+"""
+
+
+class StubStreamBackend:
+    """Streams a header, then one segment file per block; the second segment blocks on in_flight"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.output_dir.mkdir(parents=True)
+        self.in_flight = threading.Event()
+        self.release = threading.Event()
+        self.pulled = []
+
+    def stream_podcast_from_script(self, **kwargs):
+        yield b'RIFF-header'
+        index = 0
+        while True:
+            if index:
+                self.in_flight.set()
+                self.release.wait(10)
+            (self.output_dir / f"segment_{index}.wav").write_bytes(b'\0' * 4410)
+            self.pulled.append(index)
+            yield b'\0' * 4410
+            index += 1
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    ffmpeg = tmp_path / 'ffmpeg'
+    ffmpeg.write_text(FAKE_FFMPEG)
+    ffmpeg.chmod(0o755)
+    monkeypatch.setattr(audio_encoding, 'FFMPEG_PATH', str(ffmpeg))
+    monkeypatch.setattr(audio_encoding, '_encoders', None)
+    monkeypatch.chdir(tmp_path)
+    import backend_api
+    return backend_api
+
+
+def test_encoded_stream_cleans_up_after_the_feeder_when_the_client_leaves(api, tmp_path, monkeypatch):
+    stream_backend = StubStreamBackend(tmp_path / 'job')
+    monkeypatch.setattr(api.backend, 'for_job', lambda job_id: stream_backend)
+    request = api.DialogueGenerationRequest(script="<Alex> Hello there", voice_mapping={'Alex': 'voice-1'},
+                                            encoding='flac')
+
+    async def read_one_chunk_and_leave():
+        response = await api.generate_dialogue_stream(request)
+        body = response.body_iterator
+        assert await body.__anext__()
+        await asyncio.to_thread(stream_backend.in_flight.wait, 10)
+        await body.aclose()  # The client disconnects while the second segment is synthesizing
+
+    asyncio.run(read_one_chunk_and_leave())
+    feeder = next(thread for thread in threading.enumerate() if thread.name == 'encode-flac')
+
+    # The feeder is still writing into the job directory, so it must not be gone yet
+    assert stream_backend.output_dir.exists()
+    assert api.backend.storage.stats()['pinned'] == 1
+
+    stream_backend.release.set()
+    feeder.join(10)
+    assert not feeder.is_alive()
+    assert not stream_backend.output_dir.exists()
+    assert api.backend.storage.stats()['pinned'] == 0
+    assert stream_backend.pulled == [0, 1]  # No segment is started once nobody is listening
@@ -0,0 +1,49 @@
+import asyncio
+
+from resilience import CircuitBreaker, async_call_with_retry, call_with_retry
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_cancelled_half_open_probe_lets_the_next_call_through():
+    breaker = half_open_breaker()
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        probe = asyncio.create_task(async_call_with_retry(hang, breaker=breaker))
+        await started.wait()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+        async def ok():
+            return 'ok'
+
+        return await async_call_with_retry(ok, breaker=breaker)
+
+    assert asyncio.run(scenario()) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_interrupted_sync_probe_lets_the_next_call_through():
+    breaker = half_open_breaker()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    try:
+        call_with_retry(interrupted, breaker=breaker)
+    except KeyboardInterrupt:
+        pass
+    assert call_with_retry(lambda: 'ok', breaker=breaker) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
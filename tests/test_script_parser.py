@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from script_parser import ScriptValidationError, iter_script, iter_script_lines, validate_script
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# script4.txt line 34
+STACKED_TAGS = ("<Rowan><Alex> You know, while we're talking about the construction, there's something even "
+                "more fascinating about Hadrian's Wall that often gets overlooked... the incredible mix of people "
+                "who actually lived and worked there.")
+
+
+def test_stacked_tags_give_the_text_to_the_last_speaker():
+    segments = list(iter_script_lines(["<Rowan> Right.", STACKED_TAGS]))
+    assert [(s.speaker, s.line) for s in segments] == [('Rowan', 1), ('Alex', 2)]
+    assert segments[1].text.startswith("You know, while")
+    assert '<' not in segments[1].text
+
+
+def test_script4_has_no_tags_left_in_spoken_text():
+    segments = list(iter_script(os.path.join(ROOT, 'script4.txt')))
+    assert all('<' not in s.text and '>' not in s.text for s in segments)
+    assert {s.line: s.speaker for s in segments if s.line in (34, 63, 92)} == {34: 'Alex', 63: 'Alex', 92: 'Alex'}
+
+
+def test_tag_mid_line_starts_a_new_segment():
+    segments = list(iter_script_lines(["<Alex>: Hello <Rowan> Hi there"]))
+    assert [(s.speaker, s.text) for s in segments] == [('Alex', 'Hello'), ('Rowan', 'Hi there')]
+
+
+def test_continuation_lines_and_lone_tags():
+    segments = list(iter_script_lines(["intro is ignored", "<Alex>", "first", "second", "<Rowan>"]))
+    assert [(s.speaker, s.text, s.line) for s in segments] == [('Alex', 'first second', 2), ('Rowan', '', 5)]
+
+
+def test_validate_reports_empty_segments_and_unmapped_speakers():
+    with pytest.raises(ScriptValidationError) as error:
+        validate_script(iter_script_lines(["<Alex> Hi", "<Rowan>"]), {'Alex': 'voice-1'})
+    assert error.value.problems == ["line 2: <Rowan> has no text", "line 2: no voice mapped for speaker 'Rowan'"]
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+In-process voice catalog cache
+Serves voice lookups locally with a TTL and stale-while-revalidate background refresh
+"""
+
+import os
+import time
+import threading
+
+# Tunable from the environment (.env)
+VOICE_CATALOG_TTL_SECONDS = float(os.getenv('VOICE_CATALOG_TTL_SECONDS', '300'))
+
+
+class VoiceCatalog:
+    """Indexed copy of the upstream voice list.
+
+    Fresh entries are served directly. Once the TTL passes, lookups keep returning the
+    stale copy while one background thread refetches it. After invalidate() (e.g. a new
+    clone) the next lookup waits for a fresh list so the new voice is visible.
+    """
+
+    def __init__(self, fetch_voices, ttl=VOICE_CATALOG_TTL_SECONDS):
+        self._fetch_voices = fetch_voices  # Callable returning a list of voice dicts
+        self.ttl = ttl
+
+        self._voices = []
+        self._by_id = {}
+        self._by_name = {}
+        self._by_lang = {}
+        self._by_type = {}
+        self._loaded_at = None
+        self._valid = False
+        self._refreshing = False
+        self._generation = 0  # Bumped by invalidate() so an in-flight refresh can't mark old data valid
+        self._lock = threading.Lock()
+        self._load_lock = threading.RLock()
+
+        self.fetches = 0
+        self.hits = 0
+        self.stale_hits = 0
+
+    def _index(self, voices):
+        by_id, by_name, by_lang, by_type = {}, {}, {}, {}
+        for voice in voices:
+            by_id[voice.get('voice_id')] = voice
+            by_name.setdefault(voice.get('name'), voice)
+            by_lang.setdefault(voice.get('lang_code'), []).append(voice)
+            by_type.setdefault(voice.get('type'), []).append(voice)
+        return by_id, by_name, by_lang, by_type
+
+    def refresh(self):
+        """Fetch the voice list from upstream and rebuild every index"""
+        with self._load_lock:
+            with self._lock:
+                generation = self._generation
+            voices = list(self._fetch_voices())
+            indexes = self._index(voices)
+            with self._lock:
+                self._voices = voices
+                self._by_id, self._by_name, self._by_lang, self._by_type = indexes
+                self._loaded_at = time.monotonic()
+                self._valid = generation == self._generation
+                self.fetches += 1
+        return voices
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"⚠️  Voice catalog refresh failed, serving stale voices: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_loaded(self):
+        """Load synchronously when empty/invalidated, revalidate in the background when stale"""
+        with self._lock:
+            if self._valid:
+                if time.monotonic() - self._loaded_at < self.ttl:
+                    self.hits += 1
+                    return
+                self.stale_hits += 1
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, name='voice-catalog-refresh', daemon=True).start()
+                return
+
+        with self._load_lock:
+            # Another caller may have loaded it while we waited
+            with self._lock:
+                if self._valid:
+                    return
+            self.refresh()
+
+    def invalidate(self):
+        """Force the next lookup to fetch a fresh list (call after cloning or deleting a voice)"""
+        with self._lock:
+            self._valid = False
+            self._generation += 1
+
+    def all(self):
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._voices)
+
+    def get(self, voice_id):
+        self._ensure_loaded()
+        with self._lock:
+            return self._by_id.get(voice_id)
+
+    def by_name(self, name):
+        self._ensure_loaded()
+        with self._lock:
+            return self._by_name.get(name)
+
+    def by_lang(self, lang_code):
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._by_lang.get(lang_code, []))
+
+    def by_type(self, voice_type):
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._by_type.get(voice_type, []))
+
+    def default_voice(self, lang_code='en'):
+        """First voice for a language, or None"""
+        self._ensure_loaded()
+        with self._lock:
+            voices = self._by_lang.get(lang_code)
+            return voices[0] if voices else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'voices': len(self._voices),
+                'fetches': self.fetches,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'age_seconds': (time.monotonic() - self._loaded_at) if self._loaded_at else None,
+                'ttl_seconds': self.ttl,
+            }
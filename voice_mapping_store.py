@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Voice mapping store
+Speaker name -> voice ID mapping held in memory, persisted atomically to voice_mapping.json
+"""
+
+import os
+import json
+import stat
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+# How often (seconds) to stat the file for edits made outside this process
+VOICE_MAPPING_CHECK_SECONDS = float(os.getenv('VOICE_MAPPING_CHECK_SECONDS', '2'))
+
+
+class VoiceMappingStore:
+    """Concurrency-safe voice mapping.
+
+    Reads come from memory. The file is re-read only when its mtime/size change
+    (checked at most every check_interval seconds), and writes go to a temp file
+    that is renamed over the original so readers never see a half-written file.
+    """
+
+    def __init__(self, path, check_interval=VOICE_MAPPING_CHECK_SECONDS):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._mapping = {}
+        self._file_signature = None
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self._reload_if_changed(force=True)
+
+    def _signature(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload_if_changed(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+
+            signature = self._signature()
+            if signature == self._file_signature and not force:
+                return
+
+            if signature is None:
+                self._mapping = {}
+            else:
+                try:
+                    with open(self.path, 'r') as f:
+                        self._mapping = json.load(f)
+                except (OSError, ValueError) as e:
+                    # Keep serving the last good mapping rather than dropping every speaker
+                    print(f"⚠️  Could not reload {self.path}: {e}")
+                    return
+            self._file_signature = signature
+
+    def snapshot(self):
+        """Copy of the current mapping"""
+        self._reload_if_changed()
+        with self._lock:
+            return dict(self._mapping)
+
+    def get(self, voice_name, default=None):
+        self._reload_if_changed()
+        with self._lock:
+            return self._mapping.get(voice_name, default)
+
+    def resolve(self, overrides=None):
+        """Mapping for one request: the stored mapping with the request's own entries on top.
+        Nothing is written back, so concurrent requests can't clobber each other."""
+        mapping = self.snapshot()
+        if overrides:
+            mapping.update(overrides)
+        return mapping
+
+    def update(self, entries):
+        """Merge entries into the stored mapping and persist it atomically"""
+        with self._lock:
+            self._reload_if_changed(force=True)
+            mapping = dict(self._mapping)
+            mapping.update(entries)
+            self._write_atomic(mapping)
+            self._mapping = mapping
+            self._file_signature = self._signature()
+
+    def _write_atomic(self, mapping):
+        directory = self.path.parent
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix='.tmp', dir=str(directory))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(mapping, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates the file 0600; keep the mapping as readable as it was before
+            try:
+                mode = stat.S_IMODE(os.stat(self.path).st_mode)
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
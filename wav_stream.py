@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Streaming WAV utilities
+Header parsing/writing and constant-memory concatenation of PCM WAV files
+"""
+
+import os
+import struct
+from collections import namedtuple
+
+COPY_BLOCK_BYTES = 1024 * 1024  # Memory ceiling per copy, independent of output length
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+STREAMING_DATA_SIZE = 0xFFFFFFFF  # Placeholder size used by streamed WAV headers
+WAV_HEADER_BYTES = 44
+
+
+class WavInfo(namedtuple('WavInfo', 'path channels sample_width frame_rate data_offset data_size')):
+    """Format and data location of a PCM WAV file"""
+    __slots__ = ()
+
+    @property
+    def block_align(self):
+        return self.channels * self.sample_width
+
+    @property
+    def nframes(self):
+        return self.data_size // self.block_align
+
+    @property
+    def duration(self):
+        return self.nframes / self.frame_rate
+
+
+class WavFormatError(Exception):
+    """A WAV file is malformed or doesn't match the expected format"""
+
+
+def read_wav_info(path):
+    """Parse a PCM WAV header without reading the audio data"""
+    path = str(path)
+    file_size = os.path.getsize(path)
+    fmt = None
+
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise WavFormatError(f"{path}: not a RIFF/WAVE file")
+
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise WavFormatError(f"{path}: no data chunk found")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    raise WavFormatError(f"{path}: truncated fmt chunk")
+                format_tag, channels, frame_rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack('<H', body[24:26])[0]
+                if format_tag != WAVE_FORMAT_PCM:
+                    raise WavFormatError(f"{path}: unsupported WAV encoding (format tag {format_tag})")
+                if channels < 1 or bits % 8 or not 8 <= bits <= 32:
+                    raise WavFormatError(f"{path}: unsupported layout ({channels} channels, {bits}-bit)")
+                fmt = (channels, bits // 8, frame_rate)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise WavFormatError(f"{path}: data chunk before fmt chunk")
+                data_offset = f.tell()
+                available = file_size - data_offset
+                # Streamed headers carry a placeholder (0 or 0xFFFFFFFF) and truncated files lie
+                data_size = available if chunk_size in (0, STREAMING_DATA_SIZE) else min(chunk_size, available)
+                channels, sample_width, frame_rate = fmt
+                block_align = channels * sample_width
+                data_size -= data_size % block_align  # Whole frames only
+                return WavInfo(path, channels, sample_width, frame_rate, data_offset, data_size)
+
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+
+def wav_header(frame_rate, channels=1, sample_width=2, data_size=0):
+    """Canonical 44-byte PCM WAV header"""
+    block_align = channels * sample_width
+    riff_size = min(36 + data_size, STREAMING_DATA_SIZE)
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', riff_size, b'WAVE',
+        b'fmt ', 16, WAVE_FORMAT_PCM, channels, frame_rate,
+        frame_rate * block_align, block_align, sample_width * 8,
+        b'data', min(data_size, STREAMING_DATA_SIZE),
+    )
+
+
+def patch_wav_sizes(f, data_size):
+    """Fill in the RIFF and data sizes of a 44-byte header written with a placeholder"""
+    f.seek(4)
+    f.write(struct.pack('<I', min(36 + data_size, STREAMING_DATA_SIZE)))
+    f.seek(40)
+    f.write(struct.pack('<I', min(data_size, STREAMING_DATA_SIZE)))
+
+
+def validate_wav_files(paths, frame_rate=None, channels=1, sample_width=2, convert=False):
+    """Read every header up front; raise WavFormatError listing all files that are unusable.
+    With convert=True any readable PCM file is accepted (the caller converts it to the target format)."""
+    infos, problems = [], []
+    for path in paths:
+        try:
+            info = read_wav_info(path)
+        except (OSError, struct.error, WavFormatError) as e:
+            problems.append(str(e))
+            continue
+        if frame_rate is None:
+            frame_rate = info.frame_rate  # First readable file sets the rate for the rest
+        if convert:
+            infos.append(info)
+            continue
+        expected = (channels, sample_width, frame_rate)
+        actual = (info.channels, info.sample_width, info.frame_rate)
+        if actual != expected:
+            problems.append(
+                f"{path}: {info.frame_rate}Hz/{info.sample_width * 8}-bit/{info.channels}ch, "
+                f"expected {expected[2]}Hz/{sample_width * 8}-bit/{channels}ch"
+            )
+            continue
+        infos.append(info)
+
+    if problems:
+        raise WavFormatError("Invalid input segments:\n  " + "\n  ".join(problems))
+    return infos
+
+
+def copy_wav_data(info, out_file, block_size=COPY_BLOCK_BYTES):
+    """Append a file's PCM data to out_file in bounded blocks (zero-copy where the OS allows)"""
+    remaining = info.data_size
+    with open(info.path, 'rb') as src:
+        src.seek(info.data_offset)
+
+        if hasattr(os, 'sendfile'):
+            out_file.flush()
+            offset = info.data_offset
+            try:
+                while remaining > 0:
+                    sent = os.sendfile(out_file.fileno(), src.fileno(), offset, min(block_size, remaining))
+                    if sent == 0:
+                        break
+                    offset += sent
+                    remaining -= sent
+                # sendfile doesn't move the Python file object's position
+                out_file.seek(0, os.SEEK_END)
+                return info.data_size - remaining
+            except OSError:
+                # Not supported for this pair of files - fall back to buffered copy from where we stopped
+                out_file.seek(0, os.SEEK_END)
+                src.seek(offset)
+
+        buffer = bytearray(min(block_size, max(remaining, 1)))
+        view = memoryview(buffer)
+        while remaining > 0:
+            n = src.readinto(view[:min(len(buffer), remaining)])
+            if not n:
+                break
+            out_file.write(view[:n])
+            remaining -= n
+    return info.data_size - remaining
+
+
+def iter_wav_data(info, block_size=COPY_BLOCK_BYTES, start_frame=0, end_frame=None):
+    """Yield a file's PCM data (or frames [start_frame, end_frame)) in bounded blocks"""
+    end_frame = info.nframes if end_frame is None else min(end_frame, info.nframes)
+    remaining = max(0, end_frame - start_frame) * info.block_align
+    with open(info.path, 'rb') as src:
+        src.seek(info.data_offset + start_frame * info.block_align)
+        while remaining > 0:
+            block = src.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def concat_wav_files(paths, output_path, frame_rate=None, channels=1, sample_width=2, block_size=COPY_BLOCK_BYTES,
+                     convert=True):
+    """Concatenate PCM WAV files with constant memory. All headers are validated before anything is written.
+    Inputs in another rate, width or channel count are converted on the fly (convert=False rejects them).
+    Returns {'files', 'converted', 'bytes', 'frames', 'duration'}."""
+    from resampler import iter_converted_pcm  # resampler builds on this module
+
+    infos = validate_wav_files(paths, frame_rate, channels, sample_width, convert)
+    if frame_rate is None:
+        if not infos:
+            raise WavFormatError("No input segments to combine")
+        frame_rate = infos[0].frame_rate
+
+    output_path = str(output_path)
+    tmp_path = output_path + '.tmp'
+    data_size = 0
+    converted = 0
+    try:
+        with open(tmp_path, 'wb') as out_file:
+            out_file.write(wav_header(frame_rate, channels, sample_width, 0))
+            for info in infos:
+                if (info.frame_rate, info.channels, info.sample_width) == (frame_rate, channels, sample_width):
+                    data_size += copy_wav_data(info, out_file, block_size)
+                    continue
+                converted += 1
+                for block in iter_converted_pcm(info, frame_rate, channels, sample_width, block_size):
+                    out_file.write(block)
+                    data_size += len(block)
+            patch_wav_sizes(out_file, data_size)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    frames = data_size // (channels * sample_width)
+    return {
+        'files': len(infos),
+        'converted': converted,
+        'bytes': data_size,
+        'frames': frames,
+        'duration': frames / frame_rate,
+    }